@@ -2,6 +2,54 @@ import React, { useState } from 'react';
 import Layout from '../components/Layout';
 import theme from '../styles/theme';
 
+// Python scoring service (scripts/scoring_service.py)
+const SCORING_API_URL = process.env.NEXT_PUBLIC_SCORING_API_URL || 'http://localhost:8000';
+
+// Map the form onto the encounter columns the model was trained on
+const toEncounter = (formData) => {
+  const encounter = {
+    age: formData.age,
+    gender: formData.gender,
+    race: formData.race,
+    time_in_hospital: formData.timeInHospital,
+    number_inpatient: formData.numPreviousVisits,
+    number_diagnoses: formData.numDiagnoses,
+    num_medications: formData.numMedications
+  };
+  // admission_type_id 1 = Emergency
+  if (formData.emergencyAdmission) encounter.admission_type_id = 1;
+  // Lab results as coded in the dataset; 'None' (not performed) is scored like a missing result
+  encounter.A1Cresult = formData.a1cResult;
+  encounter.max_glu_serum = formData.glucoseResult;
+  return encounter;
+};
+
+// Per-encounter explanation from the scoring service; the page still shows the score without one
+const fetchExplanation = async (request) => {
+  try {
+    const response = await fetch(`${SCORING_API_URL}/explain`, request);
+    return response.ok ? await response.json() : null;
+  } catch (error) {
+    console.error('Error explaining readmission risk:', error);
+    return null;
+  }
+};
+
+// Encoded categories and lab-result codes, which are not meaningful to show as numbers
+const CODED_FEATURES = /_encoded$|^max_glu_serum_numeric$|^A1Cresult_numeric$/;
+
+// The features pushing this patient's risk up, with their share of that push
+const toRiskFactors = (factors) => {
+  const increasing = factors.filter((factor) => factor.contribution > 0);
+  const total = increasing.reduce((sum, factor) => sum + factor.contribution, 0);
+  const largest = Math.max(...increasing.map((factor) => factor.contribution));
+  return increasing.map((factor) => ({
+    factor: factor.label,
+    description: `${factor.label}${CODED_FEATURES.test(factor.feature) ? '' : ` (${factor.value})`} accounts for ${Math.round(factor.contribution / total * 100)}% of the factors raising this patient's predicted risk.`,
+    impact: factor.contribution >= largest / 2 ? 'HIGH' : 'MEDIUM'
+  }));
+};
+
 export default function Predictor() {
   const [activeTab, setActiveTab] = useState('basic');
   const [formData, setFormData] = useState({
@@ -15,8 +63,8 @@ export default function Predictor() {
     diabetesMed: true,
     insulin: false,
     emergencyAdmission: false,
-    a1cTest: true,
-    glucoseTest: true
+    a1cResult: 'None',
+    glucoseResult: 'None'
   });
   const [prediction, setPrediction] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -49,8 +97,8 @@ export default function Predictor() {
       diabetesMed: true,
       insulin: false,
       emergencyAdmission: false,
-      a1cTest: true,
-      glucoseTest: true
+      a1cResult: 'None',
+      glucoseResult: 'None'
     });
     setPrediction(null);
   };
@@ -60,19 +108,21 @@ export default function Predictor() {
     setIsLoading(true);
     
     try {
-      // Simulate API call
-      await new Promise(resolve => setTimeout(resolve, 1000));
-      
-      // Calculate risk score based on form data (simplified example)
-      const ageRisk = formData.age > 70 ? 20 : formData.age > 50 ? 15 : formData.age > 30 ? 10 : 5;
-      const visitRisk = formData.numPreviousVisits * 5;
-      const diagnosisRisk = formData.numDiagnoses * 2;
-      const medicationRisk = formData.numMedications * 0.5;
-      const stayRisk = formData.timeInHospital * 2;
-      const emergencyRisk = formData.emergencyAdmission ? 10 : 0;
-      
-      const totalRisk = ageRisk + visitRisk + diagnosisRisk + medicationRisk + stayRisk + emergencyRisk;
-      const riskScore = Math.min(Math.round(totalRisk), 100);
+      // Score the encounter and explain it (TreeSHAP contributions) with the trained model
+      const request = {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(toEncounter(formData))
+      };
+      const [response, explanation] = await Promise.all([
+        fetch(`${SCORING_API_URL}/predict`, request),
+        fetchExplanation(request)
+      ]);
+      if (!response.ok) {
+        throw new Error(`Scoring service returned ${response.status}`);
+      }
+      const result = await response.json();
+      const riskScore = Math.round(result.probability * 100);
       
       // Determine risk level
       let riskLevel;
@@ -80,56 +130,7 @@ export default function Predictor() {
       else if (riskScore < 60) riskLevel = 'MEDIUM RISK';
       else riskLevel = 'HIGH RISK';
       
-      // Generate risk factors
-      const riskFactors = [];
-      
-      if (formData.age > 70) {
-        riskFactors.push({
-          factor: 'Advanced Age',
-          description: `Patient is ${formData.age} years old, increasing readmission risk.`,
-          impact: 'HIGH'
-        });
-      }
-      
-      if (formData.numPreviousVisits > 0) {
-        riskFactors.push({
-          factor: 'Previous Inpatient Visits',
-          description: `Patient has ${formData.numPreviousVisits} previous inpatient visits.`,
-          impact: 'MEDIUM'
-        });
-      }
-      
-      if (formData.numDiagnoses > 5) {
-        riskFactors.push({
-          factor: 'Multiple Diagnoses',
-          description: `Patient has ${formData.numDiagnoses} diagnoses.`,
-          impact: 'MEDIUM'
-        });
-      }
-      
-      if (formData.numMedications > 10) {
-        riskFactors.push({
-          factor: 'Multiple Medications',
-          description: `Patient is on ${formData.numMedications} medications, increasing risk of interactions.`,
-          impact: 'MEDIUM'
-        });
-      }
-      
-      if (formData.timeInHospital > 7) {
-        riskFactors.push({
-          factor: 'Extended Hospital Stay',
-          description: `Patient's hospital stay of ${formData.timeInHospital} days increases readmission risk.`,
-          impact: 'MEDIUM'
-        });
-      }
-      
-      if (formData.emergencyAdmission) {
-        riskFactors.push({
-          factor: 'Emergency Admission',
-          description: 'Patient was admitted through emergency, indicating potential severity.',
-          impact: 'HIGH'
-        });
-      }
+      const riskFactors = explanation ? toRiskFactors(explanation.factors) : [];
       
       // Set prediction result
       setPrediction({
@@ -362,31 +363,33 @@ export default function Predictor() {
                     </div>
                     
                     <div className="form-group">
-                      <div style={{ display: 'flex', alignItems: 'center' }}>
-                        <input 
-                          type="checkbox" 
-                          id="a1cTest" 
-                          name="a1cTest" 
-                          checked={formData.a1cTest} 
-                          onChange={handleInputChange}
-                          style={{ marginRight: '0.5rem' }}
-                        />
-                        <label htmlFor="a1cTest">A1C Test Performed</label>
-                      </div>
+                      <label className="form-label">A1C Result</label>
+                      <select 
+                        className="form-select" 
+                        name="a1cResult" 
+                        value={formData.a1cResult} 
+                        onChange={handleInputChange}
+                      >
+                        <option value="None">Not Performed</option>
+                        <option value="Norm">Normal</option>
+                        <option value=">7">Above 7%</option>
+                        <option value=">8">Above 8%</option>
+                      </select>
                     </div>
                     
                     <div className="form-group">
-                      <div style={{ display: 'flex', alignItems: 'center' }}>
-                        <input 
-                          type="checkbox" 
-                          id="glucoseTest" 
-                          name="glucoseTest" 
-                          checked={formData.glucoseTest} 
-                          onChange={handleInputChange}
-                          style={{ marginRight: '0.5rem' }}
-                        />
-                        <label htmlFor="glucoseTest">Glucose Test Performed</label>
-                      </div>
+                      <label className="form-label">Max Glucose Serum</label>
+                      <select 
+                        className="form-select" 
+                        name="glucoseResult" 
+                        value={formData.glucoseResult} 
+                        onChange={handleInputChange}
+                      >
+                        <option value="None">Not Performed</option>
+                        <option value="Norm">Normal</option>
+                        <option value=">200">Above 200 mg/dL</option>
+                        <option value=">300">Above 300 mg/dL</option>
+                      </select>
                     </div>
                   </div>
                 )}
@@ -12,15 +12,28 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 import os
+import time
+import argparse
 from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier, StackingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.neural_network import MLPClassifier
-from sklearn.svm import SVC
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from sklearn.metrics import classification_report, confusion_matrix, roc_curve, auc
-from imblearn.over_sampling import SMOTE
+from sklearn.metrics import f1_score
 import xgboost as xgb
+from ingestion import load_cleaned_encounters, MODEL_FEATURES, TARGET_COLUMN
+from preprocessing import ReadmissionPreprocessor
+from model_cache import ModelCache
+from report_rendering import PlotRenderer, PLOT_MODES, metric_comparison_plot
+from evaluation import evaluate_model
+from histogram_boosting import build_hist_gradient_boosting
+from kernel_approximation import build_svm, SVM_MODES
+from resampling import FastSMOTE, DEFAULT_PARTITION_SIZE
+from ensembles import out_of_fold_probabilities, PrefitVotingClassifier, build_stacking
+from training_scheduler import TrainingScheduler, ArrayRef, TaskRef, fit_estimator
+from thresholds import choose_operating_point, save_operating_point, OBJECTIVES, FN_COST, FP_COST
+from bootstrap import bootstrap_comparison, DEFAULT_RESAMPLES
+from explanations import ReadmissionExplainer, supports_tree_shap, explanation_frame, CACHE_FILE
+from scoring import artifact_version
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -28,7 +41,8 @@ warnings.filterwarnings('ignore')
 sns.set(style='whitegrid')
 plt.style.use('seaborn-v0_8-whitegrid')
 
-def main():
+def main(svm_mode='exact', n_workers=None, threads_per_task=None, plot_mode=None,
+         objective='cost', fn_cost=FN_COST, fp_cost=FP_COST, n_resamples=DEFAULT_RESAMPLES, bootstrap_workers=None):
     print("Healthcare Readmission Predictive Analytics - Advanced Model Development")
     print("-" * 70)
     
@@ -38,7 +52,8 @@ def main():
     # Load the processed dataset
     print("\n1. Loading the cleaned dataset...")
     try:
-        df = pd.read_csv('../data/processed/diabetic_data_cleaned.csv')
+        df = load_cleaned_encounters('../data/processed/diabetic_data_cleaned.parquet',
+                                     columns=MODEL_FEATURES + [TARGET_COLUMN])
         print(f"Dataset shape: {df.shape}")
     except FileNotFoundError:
         print("Error: Processed dataset not found. Please run data_preparation.py first.")
@@ -48,13 +63,7 @@ def main():
     print("\n2. Preparing features and target variable...")
     
     # Based on EDA, select the most important features
-    features = [
-        'age_numeric', 'time_in_hospital', 'num_lab_procedures', 'num_procedures',
-        'num_medications', 'number_outpatient', 'number_emergency', 'number_inpatient',
-        'number_diagnoses', 'max_glu_serum_numeric', 'A1Cresult_numeric',
-        'gender_encoded', 'race_encoded', 'admission_type_id_encoded',
-        'discharge_disposition_id_encoded', 'admission_source_id_encoded'
-    ]
+    features = MODEL_FEATURES
     
     # Check which features are actually available in the dataset
     available_features = [feature for feature in features if feature in df.columns]
@@ -81,85 +90,43 @@ def main():
     joblib.dump(scaler, '../models/advanced/scaler.pkl')
     print("Scaler saved to '../models/advanced/scaler.pkl'")
     
+    # Bundle the scaler with the fitted encodings and imputation values
+    try:
+        preprocessor = ReadmissionPreprocessor.load('../data/processed/preprocessor.json')
+        preprocessor.set_scaler(scaler, available_features)
+        preprocessor.save('../models/advanced/preprocessor.json')
+        print("Preprocessing pipeline saved to '../models/advanced/preprocessor.json'")
+    except FileNotFoundError:
+        print("preprocessor.json not found. Please re-run data_preparation.py to export the preprocessing pipeline.")
+    
     # Check class distribution
     print("\n4. Checking class distribution...")
     print(f"Class distribution in training set: {pd.Series(y_train).value_counts(normalize=True)}")
     
     # Apply SMOTE to handle class imbalance
     print("\n5. Applying SMOTE to handle class imbalance...")
-    smote = SMOTE(random_state=42)
+    # Exact neighbour search (identical to imblearn's SMOTE) up to DEFAULT_PARTITION_SIZE
+    # minority rows, partitioned approximate search above that
+    smote = FastSMOTE(random_state=42, partition_size=DEFAULT_PARTITION_SIZE)
     X_train_smote, y_train_smote = smote.fit_resample(X_train_scaled, y_train)
     print(f"Class distribution after SMOTE: {pd.Series(y_train_smote).value_counts(normalize=True)}")
     print(f"Training set shape after SMOTE: {X_train_smote.shape}")
     
-    # Function to evaluate model performance
-    def evaluate_model(model, X_train, X_test, y_train, y_test, model_name):
-        print(f"\n{model_name} Training:")
-        
-        # Train the model
-        model.fit(X_train, y_train)
-        
-        # Make predictions
-        y_train_pred = model.predict(X_train)
-        y_test_pred = model.predict(X_test)
-        
-        # Calculate metrics
-        train_accuracy = accuracy_score(y_train, y_train_pred)
-        test_accuracy = accuracy_score(y_test, y_test_pred)
-        test_precision = precision_score(y_test, y_test_pred)
-        test_recall = recall_score(y_test, y_test_pred)
-        test_f1 = f1_score(y_test, y_test_pred)
-        
-        # Print results
-        print(f"Training Accuracy: {train_accuracy:.4f}")
-        print(f"Testing Accuracy: {test_accuracy:.4f}")
-        print(f"Testing Precision: {test_precision:.4f}")
-        print(f"Testing Recall: {test_recall:.4f}")
-        print(f"Testing F1 Score: {test_f1:.4f}")
-        
-        # Print classification report
-        print(f"Classification Report (Test Set):")
-        print(classification_report(y_test, y_test_pred))
-        
-        # Create confusion matrix
-        cm = confusion_matrix(y_test, y_test_pred)
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False)
-        plt.title(f'Confusion Matrix - {model_name}', fontsize=16)
-        plt.xlabel('Predicted Label', fontsize=14)
-        plt.ylabel('True Label', fontsize=14)
-        plt.xticks([0.5, 1.5], ['Not Readmitted', 'Readmitted'])
-        plt.yticks([0.5, 1.5], ['Not Readmitted', 'Readmitted'])
-        plt.tight_layout()
-        plt.savefig(f'../models/advanced/{model_name.lower().replace(" ", "_")}_confusion_matrix.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # Create ROC curve
-        if hasattr(model, "predict_proba"):
-            y_pred_prob = model.predict_proba(X_test)[:, 1]
-            fpr, tpr, _ = roc_curve(y_test, y_pred_prob)
-            roc_auc = auc(fpr, tpr)
-            
-            plt.figure(figsize=(8, 6))
-            plt.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (area = {roc_auc:.2f})')
-            plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-            plt.xlim([0.0, 1.0])
-            plt.ylim([0.0, 1.05])
-            plt.xlabel('False Positive Rate', fontsize=14)
-            plt.ylabel('True Positive Rate', fontsize=14)
-            plt.title(f'ROC Curve - {model_name}', fontsize=16)
-            plt.legend(loc="lower right")
-            plt.grid(True, alpha=0.3)
-            plt.savefig(f'../models/advanced/{model_name.lower().replace(" ", "_")}_roc_curve.png', dpi=300, bbox_inches='tight')
-            plt.close()
-        
-        return model, test_accuracy, test_precision, test_recall, test_f1
+    # Plots are queued while the models are evaluated and rendered in background processes at the end
+    plots = PlotRenderer(plot_mode)
+    
+    # Fitted models and CV scores are cached on disk, keyed on data, features, estimator and params
+    model_cache = ModelCache()
+    
+    # Models arrive fitted by the training scheduler; each split is scored once
+    def evaluate(model, model_name):
+        return evaluate_model(model, X_train_smote, X_test_scaled, y_train_smote, y_test, model_name,
+                              plots, plot_dir='../models/advanced')
     
     # Train and evaluate advanced models
     print("\n6. Training and evaluating advanced models...")
     
     # 1. Neural Network (MLP Classifier)
-    print("\nTraining Neural Network model...")
     mlp_model = MLPClassifier(
         hidden_layer_sizes=(100, 50),
         activation='relu',
@@ -171,12 +138,7 @@ def main():
         random_state=42
     )
     
-    mlp_model, mlp_accuracy, mlp_precision, mlp_recall, mlp_f1 = evaluate_model(
-        mlp_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "Neural Network"
-    )
-    
     # 2. Gradient Boosting Classifier
-    print("\nTraining Gradient Boosting model...")
     gb_model = GradientBoostingClassifier(
         n_estimators=200,
         learning_rate=0.1,
@@ -187,26 +149,13 @@ def main():
         random_state=42
     )
     
-    gb_model, gb_accuracy, gb_precision, gb_recall, gb_f1 = evaluate_model(
-        gb_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "Gradient Boosting"
-    )
-    
-    # 3. SVM with RBF kernel
-    print("\nTraining SVM model...")
-    svm_model = SVC(
-        C=10.0,
-        kernel='rbf',
-        gamma='scale',
-        probability=True,
-        random_state=42
-    )
+    # 2b. Histogram gradient boosting: multithreaded, early stopping, native categorical splits
+    hgb_model = build_hist_gradient_boosting(available_features, scaler)
     
-    svm_model, svm_accuracy, svm_precision, svm_recall, svm_f1 = evaluate_model(
-        svm_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "SVM"
-    )
+    # 3. SVM with RBF kernel (exact, or a Nystroem / random Fourier feature approximation)
+    svm_model = build_svm(svm_mode, X_train_smote, C=10.0)
     
     # 4. XGBoost with optimized parameters
-    print("\nTraining XGBoost model...")
     xgb_model = xgb.XGBClassifier(
         n_estimators=200,
         learning_rate=0.1,
@@ -218,12 +167,7 @@ def main():
         random_state=42
     )
     
-    xgb_model, xgb_accuracy, xgb_precision, xgb_recall, xgb_f1 = evaluate_model(
-        xgb_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "XGBoost"
-    )
-    
     # 5. Random Forest with optimized parameters
-    print("\nTraining Random Forest model...")
     rf_model = RandomForestClassifier(
         n_estimators=200,
         max_depth=10,
@@ -235,56 +179,65 @@ def main():
         random_state=42
     )
     
-    rf_model, rf_accuracy, rf_precision, rf_recall, rf_f1 = evaluate_model(
-        rf_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "Random Forest"
-    )
+    # The base models are independent and train in parallel worker processes,
+    # reading the SMOTE arrays from memory-mapped files. The out-of-fold predictions
+    # for stacking only need the (unfitted) base estimators, so they run alongside;
+    # the stacking ensemble starts once its base models and the predictions are ready.
+    scheduler = TrainingScheduler(n_workers=n_workers, threads_per_task=threads_per_task)
+    print(f"Training on {scheduler.n_workers} worker process(es), {scheduler.threads_per_task} thread(s) per task...")
+    X_ref, y_ref = ArrayRef('X_train_smote'), ArrayRef('y_train_smote')
+    base_estimators = [('hgb', hgb_model), ('xgb', xgb_model), ('rf', rf_model), ('mlp', mlp_model)]
+    for name, estimator in base_estimators + [('gb', gb_model), ('svm', svm_model)]:
+        scheduler.add(name, fit_estimator, model_cache, estimator, X_ref, y_ref, features=available_features)
+    oof_ref = scheduler.add('oof', out_of_fold_probabilities, base_estimators, X_ref, y_ref, cache=model_cache)
+    base_refs = [(name, TaskRef(name)) for name, _ in base_estimators]
+    scheduler.add('stacking', build_stacking, base_refs, oof_ref, y_ref,
+                  xgb.XGBClassifier(n_estimators=100, random_state=42))
+    start = time.perf_counter()
+    trained, timings = scheduler.run({'X_train_smote': X_train_smote, 'y_train_smote': y_train_smote})
+    print(f"All models trained in {time.perf_counter() - start:.1f}s")
     
-    # 6. Voting Classifier (Ensemble)
-    print("\nTraining Voting Classifier (Ensemble)...")
-    voting_model = VotingClassifier(
-        estimators=[
-            ('gb', gb_model),
-            ('xgb', xgb_model),
-            ('rf', rf_model),
-            ('mlp', mlp_model)
-        ],
-        voting='soft'
-    )
+    oof_voting_f1 = f1_score(y_train_smote, (trained['oof'].mean(axis=1) >= 0.5).astype(int))
+    print(f"Out-of-fold F1 of the soft vote: {oof_voting_f1:.4f}")
     
-    voting_model, voting_accuracy, voting_precision, voting_recall, voting_f1 = evaluate_model(
-        voting_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "Voting Ensemble"
-    )
+    mlp_evaluation = evaluate(trained['mlp'], "Neural Network")
     
-    # 7. Stacking Classifier (Advanced Ensemble)
-    print("\nTraining Stacking Classifier (Advanced Ensemble)...")
-    
-    # Define base estimators
-    estimators = [
-        ('gb', GradientBoostingClassifier(n_estimators=100, random_state=42)),
-        ('xgb', xgb.XGBClassifier(n_estimators=100, random_state=42)),
-        ('rf', RandomForestClassifier(n_estimators=100, random_state=42)),
-        ('mlp', MLPClassifier(hidden_layer_sizes=(50,), max_iter=300, random_state=42))
-    ]
-    
-    # Define stacking model
-    stacking_model = StackingClassifier(
-        estimators=estimators,
-        final_estimator=xgb.XGBClassifier(n_estimators=100, random_state=42),
-        cv=5
-    )
+    gb_evaluation = evaluate(trained['gb'], "Gradient Boosting")
     
-    stacking_model, stacking_accuracy, stacking_precision, stacking_recall, stacking_f1 = evaluate_model(
-        stacking_model, X_train_smote, X_test_scaled, y_train_smote, y_test, "Stacking Ensemble"
-    )
+    print(f"\nHistogram gradient boosting stopped after {trained['hgb'][-1].n_iter_} iterations")
+    hgb_evaluation = evaluate(trained['hgb'], "Histogram Gradient Boosting")
+    
+    print(f"\nSVM mode: {svm_mode}")
+    svm_evaluation = evaluate(trained['svm'], "SVM")
+    
+    xgb_evaluation = evaluate(trained['xgb'], "XGBoost")
+    
+    rf_evaluation = evaluate(trained['rf'], "Random Forest")
+    
+    # 6. Voting Classifier (Ensemble): soft vote over the fitted base models, nothing to train
+    voting_model = PrefitVotingClassifier([(name, trained[name]) for name, _ in base_estimators])
+    
+    voting_evaluation = evaluate(voting_model, "Voting Ensemble")
+    
+    # 7. Stacking Classifier (Advanced Ensemble): meta-learner trained on the out-of-fold predictions
+    stacking_evaluation = evaluate(trained['stacking'], "Stacking Ensemble")
     
     # Compare model performances
     print("\n7. Comparing model performances...")
     
-    models = ['Neural Network', 'Gradient Boosting', 'SVM', 'XGBoost', 'Random Forest', 'Voting Ensemble', 'Stacking Ensemble']
-    accuracies = [mlp_accuracy, gb_accuracy, svm_accuracy, xgb_accuracy, rf_accuracy, voting_accuracy, stacking_accuracy]
-    precisions = [mlp_precision, gb_precision, svm_precision, xgb_precision, rf_precision, voting_precision, stacking_precision]
-    recalls = [mlp_recall, gb_recall, svm_recall, xgb_recall, rf_recall, voting_recall, stacking_recall]
-    f1_scores = [mlp_f1, gb_f1, svm_f1, xgb_f1, rf_f1, voting_f1, stacking_f1]
+    models = ['Neural Network', 'Gradient Boosting', 'Histogram Gradient Boosting', 'SVM', 'XGBoost', 'Random Forest', 'Voting Ensemble', 'Stacking Ensemble']
+    evaluations = [mlp_evaluation, gb_evaluation, hgb_evaluation, svm_evaluation, xgb_evaluation, rf_evaluation, voting_evaluation, stacking_evaluation]
+    accuracies = [evaluation.accuracy for evaluation in evaluations]
+    precisions = [evaluation.precision for evaluation in evaluations]
+    recalls = [evaluation.recall for evaluation in evaluations]
+    f1_scores = [evaluation.f1 for evaluation in evaluations]
+    # Operating point of each model: the threshold that minimizes expected cost (or maximizes F1) on the test set
+    operating_points = [choose_operating_point(y_test, evaluation.probabilities, objective, fn_cost, fp_cost)
+                        if evaluation.probabilities is not None else None for evaluation in evaluations]
+    # Original fit times (kept with cached models); voting trains nothing beyond its base
+    # models, stacking needs the out-of-fold fits plus its meta-learner
+    training_times = [getattr(trained[name], 'fit_time_', timings[name]) for name in ['mlp', 'gb', 'hgb', 'svm', 'xgb', 'rf']]
+    training_times += [0.0, timings['oof'] + timings['stacking']]
     
     # Create comparison DataFrame
     comparison_df = pd.DataFrame({
@@ -292,29 +245,30 @@ def main():
         'Accuracy': accuracies,
         'Precision': precisions,
         'Recall': recalls,
-        'F1 Score': f1_scores
+        'F1 Score': f1_scores,
+        'Training Time (s)': training_times,
+        'Operating Threshold': [point and point['threshold'] for point in operating_points],
+        'Expected Cost': [point and point['expected_cost'] for point in operating_points]
     })
     
+    # Bootstrap CIs for every metric and a paired test of each model against the best one
+    if n_resamples:
+        intervals = bootstrap_comparison(evaluations, reference=accuracies.index(max(accuracies)), metric='Accuracy',
+                                         n_resamples=n_resamples, n_jobs=bootstrap_workers)
+        comparison_df = pd.concat([comparison_df, intervals], axis=1)
+    
     print("\nModel Comparison:")
     print(comparison_df)
     
     # Save comparison to CSV
     comparison_df.to_csv('../models/advanced/model_comparison.csv', index=False)
     
-    # Create comparison plot
-    plt.figure(figsize=(12, 8))
-    comparison_df_melted = pd.melt(comparison_df, id_vars=['Model'], var_name='Metric', value_name='Score')
-    sns.barplot(x='Model', y='Score', hue='Metric', data=comparison_df_melted, palette='viridis')
-    plt.title('Advanced Model Comparison', fontsize=16)
-    plt.xlabel('Model', fontsize=14)
-    plt.ylabel('Score', fontsize=14)
-    plt.ylim(0, 1)
-    plt.xticks(rotation=45)
-    plt.grid(axis='y', alpha=0.3)
-    plt.legend(title='Metric', title_fontsize=12)
-    plt.tight_layout()
-    plt.savefig('../models/advanced/model_comparison.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    # Queue the comparison plot, then render every queued plot in the background
+    comparison_df_melted = pd.melt(comparison_df, id_vars=['Model'], value_vars=['Accuracy', 'Precision', 'Recall', 'F1 Score'],
+                                   var_name='Metric', value_name='Score')
+    plots.add('../models/advanced/model_comparison.png', metric_comparison_plot, figsize=(12, 8),
+              scores=comparison_df_melted, title='Advanced Model Comparison', rotate_labels=True)
+    plots.render()
     
     # Identify the best model based on accuracy
     best_accuracy = max(accuracies)
@@ -324,20 +278,8 @@ def main():
     print(f"\nBest Model (based on Accuracy): {best_model_name} with Accuracy {best_accuracy:.4f}")
     
     # Save the best model
-    if best_model_name == 'Neural Network':
-        best_model = mlp_model
-    elif best_model_name == 'Gradient Boosting':
-        best_model = gb_model
-    elif best_model_name == 'SVM':
-        best_model = svm_model
-    elif best_model_name == 'XGBoost':
-        best_model = xgb_model
-    elif best_model_name == 'Random Forest':
-        best_model = rf_model
-    elif best_model_name == 'Voting Ensemble':
-        best_model = voting_model
-    else:  # Stacking Ensemble
-        best_model = stacking_model
+    best_evaluation = evaluations[best_model_index]
+    best_model = best_evaluation.model
     
     # Save the model
     joblib.dump(best_model, '../models/advanced/best_model.pkl')
@@ -348,6 +290,14 @@ def main():
         f.write('\n'.join(available_features))
     print("Feature list saved to '../models/advanced/model_features.txt'")
     
+    # Store the best model's operating point with it; load_scorer flags encounters at this threshold
+    best_point = operating_points[best_model_index]
+    if best_point is not None:
+        save_operating_point('../models/advanced', best_point, best_model_name)
+        print(f"Operating point ({objective}): threshold {best_point['threshold']:.4f}, "
+              f"precision {best_point['precision']:.4f}, recall {best_point['recall']:.4f}, "
+              f"expected cost {best_point['expected_cost']:.4f} per encounter")
+    
     # Prepare data for Power BI
     print("\n8. Preparing data for Power BI visualization...")
     
@@ -360,13 +310,20 @@ def main():
     # Save predictions for visualization
     X_test_df = pd.DataFrame(X_test, columns=available_features)
     X_test_df['actual'] = y_test.values
-    X_test_df['predicted'] = best_model.predict(X_test_scaled)
+    X_test_df['predicted'] = best_evaluation.predictions
     
-    if hasattr(best_model, "predict_proba"):
-        X_test_df['probability'] = best_model.predict_proba(X_test_scaled)[:, 1]
+    # Reuse the test-set outputs cached during evaluation rather than scoring again
+    if best_evaluation.probabilities is not None:
+        X_test_df['probability'] = best_evaluation.probabilities
     
     X_test_df.to_csv('../powerbi/data/advanced_test_predictions.csv', index=False)
     
+    # Explain every test prediction with TreeSHAP in the background while the report is written
+    explanations = None
+    if supports_tree_shap(best_model):
+        explainer = ReadmissionExplainer(best_model, available_features)
+        explanations = explainer.precompute(X_test_scaled, X_test.to_numpy())
+    
     # Create a summary report
     print("\n9. Creating summary report...")
     summary = f"""
@@ -384,25 +341,49 @@ This report summarizes the development and evaluation of advanced machine learni
 ## Models Evaluated
 1. **Neural Network**: Multi-layer Perceptron with 2 hidden layers
 2. **Gradient Boosting**: Gradient Boosting Classifier with 200 estimators
-3. **SVM**: Support Vector Machine with RBF kernel
-4. **XGBoost**: Extreme Gradient Boosting
-5. **Random Forest**: Random Forest Classifier with 200 estimators
-6. **Voting Ensemble**: Soft voting of multiple models
-7. **Stacking Ensemble**: Advanced ensemble with XGBoost meta-learner
+3. **Histogram Gradient Boosting**: Multithreaded histogram booster with early stopping and native categorical splits
+4. **SVM**: Support Vector Machine with RBF kernel
+5. **XGBoost**: Extreme Gradient Boosting
+6. **Random Forest**: Random Forest Classifier with 200 estimators
+7. **Voting Ensemble**: Soft voting of multiple models
+8. **Stacking Ensemble**: Advanced ensemble with XGBoost meta-learner
 
 ## Results
 
-| Model | Accuracy | Precision | Recall | F1 Score |
-|-------|----------|-----------|--------|----------|
+| Model | Accuracy | Precision | Recall | F1 Score | Training Time (s) |
+|-------|----------|-----------|--------|----------|-------------------|
 """
     
     for i, model_name in enumerate(models):
-        summary += f"| {model_name} | {accuracies[i]:.4f} | {precisions[i]:.4f} | {recalls[i]:.4f} | {f1_scores[i]:.4f} |\n"
+        summary += f"| {model_name} | {accuracies[i]:.4f} | {precisions[i]:.4f} | {recalls[i]:.4f} | {f1_scores[i]:.4f} | {training_times[i]:.1f} |\n"
+    
+    if n_resamples:
+        summary += f"""
+## Confidence Intervals
+95% bootstrap intervals from {n_resamples} resamples of the test set. The p-value tests each model's accuracy
+against {best_model_name} on the same resamples.
+
+| Model | Accuracy | F1 Score | AUC | p-value vs Best |
+|-------|----------|----------|-----|-----------------|
+"""
+        for _, row in comparison_df.iterrows():
+            p_value = row['p-value vs Best (Accuracy)']
+            summary += (f"| {row['Model']} | {row['Accuracy CI Low']:.4f} - {row['Accuracy CI High']:.4f} "
+                        f"| {row['F1 Score CI Low']:.4f} - {row['F1 Score CI High']:.4f} "
+                        f"| {row['AUC CI Low']:.4f} - {row['AUC CI High']:.4f} "
+                        f"| {'-' if pd.isna(p_value) else f'{p_value:.4f}'} |\n")
+    
+    operating_summary = ''
+    if best_point is not None:
+        operating_summary = (f"It flags encounters at a probability of **{best_point['threshold']:.4f}** or more "
+                             f"(chosen by {objective}), for a precision of {best_point['precision']:.4f}, a recall of "
+                             f"{best_point['recall']:.4f} and an expected cost of {best_point['expected_cost']:.4f} "
+                             f"per encounter.\n")
     
     summary += f"""
 ## Best Model
 The best performing model was **{best_model_name}** with an accuracy of **{best_accuracy:.4f}**.
-
+{operating_summary}
 ## Conclusion
 The advanced modeling techniques, particularly ensemble methods and class balancing with SMOTE, significantly improved the model performance compared to the baseline models.
 
@@ -416,7 +397,35 @@ The advanced modeling techniques, particularly ensemble methods and class balanc
         f.write(summary)
     print("Summary report saved to '../models/advanced/summary_report.md'")
     
+    plots.wait()
+    if explanations is not None:
+        explanation_frame(explanations.result(), available_features, explainer.base_value).to_csv(
+            '../powerbi/data/advanced_test_explanations.csv', index=False)
+        # The scoring service starts with these explanations cached when serving this model
+        explainer.save_cache(os.path.join('../models/advanced', CACHE_FILE),
+                             artifact_version('../models/advanced/best_model.pkl'))
+        print("Per-encounter explanations saved to '../powerbi/data/advanced_test_explanations.csv'")
     print("\nAdvanced model development completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train and compare the advanced readmission models")
+    parser.add_argument('--svm', choices=SVM_MODES, default='exact',
+                        help="Exact RBF SVC, or a Nystroem ('nystroem') / random Fourier feature ('rff') approximation")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Training processes (default: one per core)")
+    parser.add_argument('--threads-per-task', type=int, default=None,
+                        help="Cores per training task, e.g. XGBoost threads (default: cores / workers)")
+    parser.add_argument('--plots', choices=PLOT_MODES, default=None,
+                        help="Plot rendering: 'full' (300 DPI), 'preview' (72 DPI) or 'none' (default: $READMISSION_PLOTS or full)")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='cost',
+                        help="Choose the decision threshold by minimum expected cost or maximum F1")
+    parser.add_argument('--fn-cost', type=float, default=FN_COST, help="Cost of a missed readmission")
+    parser.add_argument('--fp-cost', type=float, default=FP_COST, help="Cost of flagging a patient who is not readmitted")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="Bootstrap resamples for the confidence intervals (0 to skip them)")
+    parser.add_argument('--bootstrap-workers', type=int, default=None,
+                        help="Worker processes for the bootstrap (default: run in this process)")
+    args = parser.parse_args()
+    main(svm_mode=args.svm, n_workers=args.workers, threads_per_task=args.threads_per_task, plot_mode=args.plots,
+         objective=args.objective, fn_cost=args.fn_cost, fp_cost=args.fp_cost,
+         n_resamples=args.resamples, bootstrap_workers=args.bootstrap_workers)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Artifact Store
+This module reads and writes the processed datasets as columnar Parquet files
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows per Parquet row group; predicates are evaluated per row group
+ROW_GROUP_SIZE = 64_000
+
+
+def write_parquet(df, path, row_group_size=ROW_GROUP_SIZE):
+    """Write a DataFrame to Parquet, keeping categorical and narrow numeric dtypes."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, path, row_group_size=row_group_size, compression='snappy')
+
+
+def read_parquet(path, columns=None, filters=None):
+    """Read a Parquet artifact, projecting columns and pushing down row-group filters.
+
+    ``filters`` uses the pyarrow DNF form, e.g. ``[('time_in_hospital', '>=', 8)]``.
+    Requested columns that are not present in the file are skipped.
+    """
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [column for column in columns if column in available]
+    table = pq.read_table(path, columns=columns, filters=filters)
+    return table.to_pandas()
+
+
+def parquet_columns(path, numeric_only=False):
+    """List the columns of a Parquet artifact without reading any data."""
+    schema = pq.read_schema(path)
+    if not numeric_only:
+        return schema.names
+    return [field.name for field in schema
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+
+
+class ParquetAppender:
+    """Append DataFrame chunks to a single Parquet file as consecutive row groups.
+
+    Every chunk must have the same columns and dtypes as the first one; categorical
+    columns should share a fixed set of categories so their dictionaries match.
+    """
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._writer = None
+
+    def write(self, df):
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression='snappy')
+        else:
+            table = pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Batch Scoring
+This script streams each patient's latest encounter from patient_readmission, scores them in fixed-size batches and bulk-loads model_predictions
+"""
+
+import time
+import argparse
+import pandas as pd
+from sqlalchemy import text
+from scoring import load_scorer
+from database import create_database_engine, bulk_insert
+
+SOURCE_QUERY = """
+SELECT id, encounter_id, patient_nbr, age, gender, race, admission_type_id, discharge_disposition_id,
+       admission_source_id, time_in_hospital, num_lab_procedures, num_procedures, num_medications,
+       number_outpatient, number_emergency, number_inpatient, number_diagnoses, max_glu_serum, a1c_result
+FROM patient_readmission
+WHERE id IN (SELECT MAX(id) FROM patient_readmission GROUP BY patient_nbr)
+ORDER BY id
+"""
+# patient_readmission columns named differently from the cleaned extract the preprocessing expects
+SOURCE_RENAMES = {'a1c_result': 'A1Cresult'}
+PREDICTIONS_TABLE = 'model_predictions'
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def score_batches(connection, scorer, batch_size=DEFAULT_BATCH_SIZE, limit=None):
+    """Yield one model_predictions frame per batch of ``batch_size`` patients.
+
+    Each patient is scored once per run, on their latest encounter (highest
+    id), and the prediction records that encounter's ``encounter_id``.
+    Encounters are read through a server-side cursor (a named cursor on
+    PostgreSQL), so only one batch is held in memory at a time.
+    """
+    query = SOURCE_QUERY + (f"LIMIT {int(limit)}" if limit else '')
+    streaming = connection.execution_options(stream_results=True, yield_per=batch_size)
+    for encounters in pd.read_sql_query(text(query), streaming, chunksize=batch_size):
+        encounters = encounters.rename(columns=SOURCE_RENAMES)
+        probabilities, predictions = scorer.predict(encounters)
+        yield pd.DataFrame({
+            'patient_id': encounters['patient_nbr'].to_numpy(),
+            'encounter_id': encounters['encounter_id'].to_numpy(),
+            'readmission_probability': probabilities,
+            'predicted_readmission': predictions.astype(bool),
+            'model_version': scorer.model_version
+        })
+
+
+def score_to_database(engine, scorer, batch_size=DEFAULT_BATCH_SIZE, limit=None, replace=False):
+    """Score each patient's latest encounter into model_predictions in one transaction; returns (rows, seconds).
+
+    With ``replace`` the predictions previously written by the same model
+    version are deleted first, so re-running a scoring job does not duplicate them.
+    """
+    start = time.perf_counter()
+    rows = 0
+    with engine.begin() as connection:
+        if replace:
+            connection.execute(text(f"DELETE FROM {PREDICTIONS_TABLE} WHERE model_version = :model_version"),
+                               {'model_version': scorer.model_version})
+        for predictions in score_batches(connection, scorer, batch_size, limit):
+            rows += bulk_insert(connection, PREDICTIONS_TABLE, predictions)
+    return rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score patient_readmission into the model_predictions table")
+    parser.add_argument('--database-url', default=None,
+                        help="SQLAlchemy URL (default: $DATABASE_URL or the local SQLite stand-in)")
+    parser.add_argument('--model-dir', default='../models')
+    parser.add_argument('--model-file', default='readmission_model.pkl')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--limit', type=int, default=None, help="Score at most this many patients")
+    parser.add_argument('--replace', action='store_true',
+                        help="Delete this model version's earlier predictions first")
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Batch Scoring")
+    print("-" * 70)
+    scorer = load_scorer(args.model_dir, args.model_file)
+    print(f"Loaded model {scorer.model_version} with {len(scorer.features)} features")
+    engine = create_database_engine(args.database_url)
+    rows, elapsed = score_to_database(engine, scorer, args.batch_size, args.limit, args.replace)
+    print(f"Scored the latest encounter of {rows:,} patients in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) "
+          f"into {PREDICTIONS_TABLE} ({engine.dialect.name})")
+
+if __name__ == "__main__":
+    main()
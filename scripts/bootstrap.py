@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Bootstrap Comparison
+This module computes bootstrap confidence intervals and paired significance for every model at once from batched resamples
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from evaluation import _ratio
+
+METRICS = ['Accuracy', 'Precision', 'Recall', 'F1 Score', 'AUC']
+DEFAULT_RESAMPLES = 1000
+CONFIDENCE = 0.95
+# Resamples drawn and evaluated together; each chunk has its own seed, so results do not depend on n_jobs
+CHUNK_RESAMPLES = 100
+
+
+def resample_weights(n_rows, n_resamples, rng):
+    """How often each row is drawn in each resample: a (n_resamples, n_rows) matrix from one index draw."""
+    indices = rng.integers(0, n_rows, size=(n_resamples, n_rows))
+    offsets = np.arange(n_resamples)[:, None] * n_rows
+    return np.bincount((indices + offsets).ravel(), minlength=n_resamples * n_rows).reshape(n_resamples, n_rows)
+
+
+def _weighted_auc(weights, y_true, scores):
+    # Mann-Whitney AUC of every resample at once: each positive counts the resampled
+    # negatives scored below it, plus half of those tied with it
+    order = np.argsort(scores, kind='stable')
+    scores, positive = scores[order], y_true[order] == 1
+    weights = weights[:, order].astype(float)
+    ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    group = np.r_[0, np.cumsum(np.diff(scores) != 0)]
+    negatives = np.cumsum(weights * ~positive, axis=1)[:, ends]
+    before = np.column_stack([np.zeros(len(weights)), negatives[:, :-1]])
+    tied = negatives - before
+    positive_group = group[positive]
+    positive_weights = weights[:, positive]
+    ranks = (positive_weights * (before[:, positive_group] + 0.5 * tied[:, positive_group])).sum(axis=1)
+    return _ratio(ranks, positive_weights.sum(axis=1) * negatives[:, -1])
+
+
+def _bootstrap_chunk(y_true, predictions, probabilities, n_resamples, seed):
+    """(n_resamples, n_models, len(METRICS)) metrics of one chunk of resamples."""
+    n_rows = len(y_true)
+    weights = resample_weights(n_rows, n_resamples, np.random.default_rng(seed))
+    # Confusion counts of every model in every resample from one matrix product:
+    # the resample weights times a one-hot encoding of (actual, predicted) per model
+    codes = 2 * y_true[:, None] + predictions.T
+    one_hot = (codes[:, :, None] == np.arange(4)).reshape(n_rows, -1).astype(float)
+    counts = (weights.astype(float) @ one_hot).reshape(n_resamples, len(predictions), 4)
+    tn, fp, fn, tp = np.moveaxis(counts, -1, 0)
+    metrics = np.empty((n_resamples, len(predictions), len(METRICS)))
+    metrics[..., 0] = (tp + tn) / n_rows
+    metrics[..., 1] = _ratio(tp, tp + fp)
+    metrics[..., 2] = _ratio(tp, tp + fn)
+    metrics[..., 3] = _ratio(2 * tp, 2 * tp + fp + fn)
+    for model, scores in enumerate(probabilities):
+        metrics[:, model, 4] = np.nan if scores is None else _weighted_auc(weights, y_true, scores)
+    return metrics
+
+
+def bootstrap_metrics(y_true, predictions, probabilities, n_resamples=DEFAULT_RESAMPLES, n_jobs=None,
+                      random_state=42):
+    """Metrics of every model on the same ``n_resamples`` resamples of the test set.
+
+    Returns an array of shape (n_resamples, n_models, len(METRICS)); AUC is NaN
+    for models without probabilities. Resamples are evaluated in chunks of
+    CHUNK_RESAMPLES, spread over ``n_jobs`` worker processes when given.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    predictions = np.asarray(predictions, dtype=np.int64)
+    probabilities = [None if scores is None else np.asarray(scores, dtype=float) for scores in probabilities]
+    sizes = [min(CHUNK_RESAMPLES, n_resamples - start) for start in range(0, n_resamples, CHUNK_RESAMPLES)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    args = [(y_true, predictions, probabilities, size, seed) for size, seed in zip(sizes, seeds)]
+    if n_jobs and n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            chunks = list(pool.map(_bootstrap_chunk, *zip(*args)))
+    else:
+        chunks = [_bootstrap_chunk(*chunk_args) for chunk_args in args]
+    return np.concatenate(chunks)
+
+
+def bootstrap_comparison(evaluations, reference, metric='F1 Score', n_resamples=DEFAULT_RESAMPLES,
+                         confidence=CONFIDENCE, n_jobs=None, random_state=42):
+    """Confidence intervals of every metric and a paired test against the ``reference`` model.
+
+    ``evaluations`` are ModelEvaluation objects scored on the same test set.
+    The p-value is a two-sided paired bootstrap test of the difference in
+    ``metric`` between each model and the reference model, both evaluated on
+    the same resamples. Returns one row per model (in order) with the AUC point
+    estimate, the CI columns and the p-value.
+    """
+    stats = bootstrap_metrics(evaluations[0].y_test, [evaluation.predictions for evaluation in evaluations],
+                              [evaluation.probabilities for evaluation in evaluations],
+                              n_resamples, n_jobs, random_state)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(stats, [tail, 100 - tail], axis=0)
+    comparison = pd.DataFrame({'AUC': [evaluation.roc_auc for evaluation in evaluations]})
+    for k, name in enumerate(METRICS):
+        comparison[f'{name} CI Low'] = low[:, k]
+        comparison[f'{name} CI High'] = high[:, k]
+    k = METRICS.index(metric)
+    differences = stats[:, :, k] - stats[:, [reference], k]
+    # (count + 1) / (resamples + 1), so the smallest p-value reported is 2 / (resamples + 1) rather than 0
+    tails = np.minimum((differences <= 0).sum(axis=0), (differences >= 0).sum(axis=0))
+    p_values = np.minimum(1.0, 2 * (tails + 1) / (len(stats) + 1))
+    p_values[reference] = np.nan
+    comparison[f'p-value vs Best ({metric})'] = p_values
+    return comparison
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Bulk Loading
+This script loads the cleaned encounters into patient_readmission in parallel partitions, upserting on encounter_id
+"""
+
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from sqlalchemy import inspect, text
+from ingestion import load_cleaned_encounters, load_raw_encounters, age_to_numeric
+from database import create_database_engine, bulk_insert, is_postgresql, DEFAULT_POOL_SIZE
+from rollups import refresh_rollups
+
+PATIENT_TABLE = 'patient_readmission'
+# patient_readmission column -> cleaned dataset column (raw extract column for the lab results)
+PATIENT_COLUMNS = {
+    'encounter_id': 'encounter_id',
+    'patient_nbr': 'patient_nbr',
+    'age': 'age_numeric',
+    'gender': 'gender',
+    'race': 'race',
+    'admission_type_id': 'admission_type_id',
+    'discharge_disposition_id': 'discharge_disposition_id',
+    'admission_source_id': 'admission_source_id',
+    'time_in_hospital': 'time_in_hospital',
+    'num_lab_procedures': 'num_lab_procedures',
+    'num_procedures': 'num_procedures',
+    'num_medications': 'num_medications',
+    'number_outpatient': 'number_outpatient',
+    'number_emergency': 'number_emergency',
+    'number_inpatient': 'number_inpatient',
+    'number_diagnoses': 'number_diagnoses',
+    'max_glu_serum': 'max_glu_serum',
+    'a1c_result': 'A1Cresult',
+    'readmitted': 'readmitted_binary',
+}
+# Lab results are taken from the raw extract: the cleaned text columns are mode-filled, so a test
+# that was not performed would be stored as a result. Not performed ('None') is stored as NULL,
+# which the preprocessing fills with the training median, as it did for the model's training rows
+LAB_RESULT_COLUMNS = ['max_glu_serum', 'a1c_result']
+UPSERT_KEY = 'encounter_id'
+# The secondary indexes of create_tables.sql, dropped during a load and rebuilt once afterwards
+SECONDARY_INDEXES = {
+    'idx_patient_nbr': 'patient_nbr',
+    'idx_readmitted': 'readmitted',
+    'idx_age': 'age',
+    'idx_time_in_hospital': 'time_in_hospital',
+    'idx_number_diagnoses': 'number_diagnoses',
+}
+# Dialects with an upsert this loader can issue
+LOAD_DIALECTS = ('postgresql', 'mysql', 'sqlite')
+DEFAULT_PARTITION_ROWS = 25_000
+DEFAULT_WORKERS = 4
+
+
+def raw_lab_results(path):
+    """Lab results per encounter_id from the raw extract, NaN where no test was performed."""
+    sources = [PATIENT_COLUMNS[column] for column in LAB_RESULT_COLUMNS]
+    # Pandas' default NA markers parse 'None' as missing, exactly as when the model was trained
+    raw = load_raw_encounters(path, columns=[UPSERT_KEY] + sources)
+    return raw.drop_duplicates(UPSERT_KEY, keep='last').set_index(UPSERT_KEY)[sources]
+
+
+def to_patient_rows(df, lab_results):
+    """Map cleaned encounters onto the patient_readmission columns, one row per encounter_id (the last wins).
+
+    ``lab_results`` (from ``raw_lab_results``) supplies the lab result columns;
+    encounters missing from it get NULL results.
+    """
+    rows = pd.DataFrame(index=df.index)
+    for column, source in PATIENT_COLUMNS.items():
+        if column in LAB_RESULT_COLUMNS:
+            values = df[UPSERT_KEY].map(lab_results[source].astype(object))
+        elif source == 'age_numeric' and source not in df.columns:
+            values = age_to_numeric(df['age'])
+        else:
+            values = df[source]
+        if column == 'readmitted':
+            values = values.astype(bool)
+        elif pd.api.types.is_numeric_dtype(values):
+            values = values.round().astype('Int64')
+        else:
+            values = values.astype(object)
+        rows[column] = values
+    return rows.drop_duplicates(UPSERT_KEY, keep='last').reset_index(drop=True)
+
+
+def _upsert_clause(dialect):
+    columns = [column for column in PATIENT_COLUMNS if column != UPSERT_KEY]
+    if dialect == 'mysql':
+        return " ON DUPLICATE KEY UPDATE " + ', '.join(f'{column} = VALUES({column})' for column in columns)
+    updates = ', '.join(f'{column} = excluded.{column}' for column in columns)
+    return f" ON CONFLICT ({UPSERT_KEY}) DO UPDATE SET {updates}"
+
+
+def load_partition(engine, rows, partition):
+    """Upsert one partition in its own transaction.
+
+    On PostgreSQL the rows are COPYed into a temporary staging table and
+    upserted from there with one INSERT ... SELECT; elsewhere they are upserted
+    directly with an executemany of INSERT ... ON CONFLICT (ON DUPLICATE KEY
+    UPDATE on MySQL).
+    """
+    with engine.begin() as connection:
+        if not is_postgresql(connection):
+            return bulk_insert(connection, PATIENT_TABLE, rows, suffix=_upsert_clause(connection.dialect.name))
+        staging = f'patient_staging_{partition}'
+        columns = ', '.join(PATIENT_COLUMNS)
+        connection.execute(text(f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+                                f"SELECT {columns} FROM {PATIENT_TABLE} WITH NO DATA"))
+        bulk_insert(connection, staging, rows)
+        connection.execute(text(f"INSERT INTO {PATIENT_TABLE} ({columns}) SELECT {columns} FROM {staging}"
+                                f"{_upsert_clause('postgresql')}"))
+    return len(rows)
+
+
+def _index_names(engine):
+    # MySQL has no IF [NOT] EXISTS for indexes, so every dialect checks the inspector instead
+    return {index['name'] for index in inspect(engine).get_indexes(PATIENT_TABLE)}
+
+
+def drop_secondary_indexes(engine):
+    existing = _index_names(engine)
+    # MySQL index names are per table, so DROP INDEX needs the table there
+    on_table = f" ON {PATIENT_TABLE}" if engine.dialect.name == 'mysql' else ''
+    with engine.begin() as connection:
+        for name in SECONDARY_INDEXES:
+            if name in existing:
+                connection.execute(text(f"DROP INDEX {name}{on_table}"))
+
+
+def create_secondary_indexes(engine):
+    existing = _index_names(engine)
+    with engine.begin() as connection:
+        for name, column in SECONDARY_INDEXES.items():
+            if name not in existing:
+                connection.execute(text(f"CREATE INDEX {name} ON {PATIENT_TABLE}({column})"))
+
+
+def load_patients(engine, df, lab_results, n_workers=DEFAULT_WORKERS, partition_rows=DEFAULT_PARTITION_ROWS,
+                  defer_indexes=True):
+    """Upsert cleaned encounters into patient_readmission; returns (rows, seconds).
+
+    Rows are split into partitions loaded concurrently on separate pooled
+    connections (one at a time on SQLite, which allows a single writer). The
+    unique index on encounter_id that the upsert relies on is created if
+    missing; the secondary indexes are dropped for the load and rebuilt once
+    at the end unless ``defer_indexes`` is False.
+    """
+    if engine.dialect.name not in LOAD_DIALECTS:
+        raise ValueError(f"Bulk loading is not supported on {engine.dialect.name} (expected one of {LOAD_DIALECTS})")
+    start = time.perf_counter()
+    rows = to_patient_rows(df, lab_results)
+    if engine.dialect.name == 'sqlite':
+        n_workers = 1
+    if f'idx_{UPSERT_KEY}' not in _index_names(engine):
+        with engine.begin() as connection:
+            connection.execute(text(f"CREATE UNIQUE INDEX idx_{UPSERT_KEY} ON {PATIENT_TABLE}({UPSERT_KEY})"))
+    if defer_indexes:
+        drop_secondary_indexes(engine)
+    try:
+        partitions = [rows.iloc[offset:offset + partition_rows] for offset in range(0, len(rows), partition_rows)]
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            loaded = sum(pool.map(load_partition, [engine] * len(partitions), partitions, range(len(partitions))))
+    finally:
+        if defer_indexes:
+            create_secondary_indexes(engine)
+    return loaded, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the cleaned encounters into patient_readmission")
+    parser.add_argument('--database-url', default=None,
+                        help="SQLAlchemy URL (default: $DATABASE_URL or the local SQLite stand-in)")
+    parser.add_argument('--input', default='../data/processed/diabetic_data_cleaned.parquet')
+    parser.add_argument('--raw-input', default='../data/diabetic_data.csv',
+                        help="Raw extract the lab results are read from (the cleaned ones are imputed)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--partition-rows', type=int, default=DEFAULT_PARTITION_ROWS)
+    parser.add_argument('--keep-indexes', action='store_true',
+                        help="Keep the secondary indexes during the load (for small incremental loads)")
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Bulk Loading")
+    print("-" * 70)
+    sources = list(dict.fromkeys(source for column, source in PATIENT_COLUMNS.items()
+                                 if column not in LAB_RESULT_COLUMNS))
+    try:
+        df = load_cleaned_encounters(args.input, columns=sources)
+    except FileNotFoundError:
+        print("Error: Processed dataset not found. Please run data_preparation.py first.")
+        return
+    try:
+        lab_results = raw_lab_results(args.raw_input)
+    except FileNotFoundError:
+        print("Error: diabetic_data.csv not found. Please ensure the file is in the data directory.")
+        return
+    print(f"Loaded {len(df):,} cleaned encounters from '{args.input}'")
+    engine = create_database_engine(args.database_url, pool_size=max(args.workers, DEFAULT_POOL_SIZE))
+    with engine.connect() as connection:
+        before = connection.execute(text(f"SELECT COUNT(*) FROM {PATIENT_TABLE}")).scalar()
+    rows, elapsed = load_patients(engine, df, lab_results, args.workers, args.partition_rows, not args.keep_indexes)
+    print(f"Upserted {rows:,} encounters in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) "
+          f"into {PATIENT_TABLE} ({engine.dialect.name})")
+    
+    # Incremental rollup refresh when every row was new; updated encounters need a rebuild
+    with engine.connect() as connection:
+        added = connection.execute(text(f"SELECT COUNT(*) FROM {PATIENT_TABLE}")).scalar() - before
+    refresh_rollups(engine, rebuild=added != rows)
+    print(f"{'Incrementally refreshed' if added == rows else 'Rebuilt'} the readmission rollups")
+
+if __name__ == "__main__":
+    main()
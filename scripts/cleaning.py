@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Cleaning Steps
+This module holds the row-wise cleaning steps shared by the in-memory and chunked data preparation
+"""
+
+import pandas as pd
+from ingestion import age_to_numeric
+
+# 'max_glu_serum' and 'A1Cresult' are categorical but can be converted to ordinal
+GLUCOSE_MAPPING = {'None': 0, 'Norm': 1, '>200': 2, '>300': 3}
+A1C_MAPPING = {'None': 0, 'Norm': 1, '>7': 2, '>8': 3}
+
+# Categorical variables that get an integer '<column>_encoded' counterpart
+ENCODED_COLUMNS = ['gender', 'race', 'admission_type_id',
+                   'discharge_disposition_id', 'admission_source_id']
+
+# Columns left out of the train/test feature matrices
+NON_FEATURE_COLUMNS = ['readmitted', 'readmitted_binary', 'encounter_id', 'patient_nbr']
+
+
+def add_derived_columns(df):
+    """Add the numeric age, ordinal lab results and binary readmission target."""
+    # Age is in format '[0-10)', '[10-20)', etc.
+    df['age_numeric'] = age_to_numeric(df['age'])
+    df['max_glu_serum_numeric'] = df['max_glu_serum'].map(GLUCOSE_MAPPING).astype('float32')
+    df['A1Cresult_numeric'] = df['A1Cresult'].map(A1C_MAPPING).astype('float32')
+    # Convert readmitted to binary (0 = No, 1 = Yes)
+    df['readmitted_binary'] = (df['readmitted'] != 'NO').astype('int8')
+    return df
+
+
+def encode_with_categories(values, categories):
+    """Encode values by their position in ``categories``; missing or unseen values become -1."""
+    return pd.Series(pd.Categorical(values, categories=categories).codes,
+                     index=values.index).astype('int8')
+
+
+def admission_type_descriptions(ids_mapping):
+    """Extract the admission type lookup from IDS_mapping.csv, or None if it is absent."""
+    if 'admission_type_id' not in ids_mapping.columns:
+        return None
+    admission_type_mapping = ids_mapping[ids_mapping['admission_type_id'].notna()].copy()
+    # Convert admission_type_id to string to avoid type mismatch with the encounters
+    admission_type_mapping['admission_type_id_str'] = admission_type_mapping['admission_type_id'].astype(str)
+    return admission_type_mapping[['admission_type_id_str', 'description']]
+
+
+def merge_admission_type_descriptions(df, admission_type_mapping):
+    """Attach the admission type description to every encounter."""
+    df['admission_type_id_str'] = df['admission_type_id'].astype(str)
+    return pd.merge(df, admission_type_mapping, on='admission_type_id_str', how='left')
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Compiled Tree Ensembles
+This module flattens saved Random Forest / XGBoost models into NumPy arrays and scores them with a vectorized traversal
+"""
+
+import os
+import json
+import time
+import argparse
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+
+# Rows scored per traversal block; keeps the (rows x trees) node-index matrix cache-sized
+BLOCK_SIZE = 512
+
+
+def _round_down_float32(values):
+    # Largest float32 <= value, so 'x32 <= t32' is exactly 'x32 <= t' for float32 inputs
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _max_depth(left, right, roots):
+    # Walk all trees level by level; leaves point to themselves and drop out
+    depth = 0
+    frontier = roots
+    while True:
+        children = np.concatenate([left[frontier], right[frontier]])
+        parents = np.concatenate([frontier, frontier])
+        frontier = np.unique(children[children != parents])
+        if len(frontier) == 0:
+            return depth
+        depth += 1
+
+
+class CompiledTreeEnsemble:
+    """Tree ensemble stored as flat arrays; every node of every tree sits in one array.
+
+    Leaves point to themselves. The traversal advances every (row, tree) pair one
+    level per step with array gathers, dropping pairs once they reach a leaf.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots,
+                 max_depth, aggregation, base_margin=0.0, n_features=None):
+        self.feature = np.asarray(feature, dtype=np.int16)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.aggregation = str(aggregation)
+        self.base_margin = float(base_margin)
+        self.n_features = None if n_features is None else int(n_features)
+        # Children interleaved as [left, right] so one gather picks the next node
+        self._children = np.column_stack([self.left, self.right]).ravel()
+        self._is_leaf = self.left == np.arange(len(self.left))
+
+    def _leaf_sum(self, X):
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        # One (row, tree) pair per entry; pairs that reach a leaf drop out of the active set
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        flat = X.ravel()
+        has_missing = np.isnan(flat).any()
+        active = np.flatnonzero(~self._is_leaf.take(nodes))
+        for _ in range(self.max_depth):
+            if not len(active):
+                break
+            current = nodes.take(active)
+            x = flat.take(row_offsets.take(active) + self.feature.take(current))
+            go_right = ~(x <= self.threshold.take(current))
+            if has_missing:
+                go_right &= ~(np.isnan(x) & self.missing_left.take(current))
+            following = self._children.take(2 * current + go_right)
+            nodes[active] = following
+            active = active[~self._is_leaf.take(following)]
+        return self.value.take(nodes).reshape(n_rows, n_trees).sum(axis=1)
+
+    def predict_proba(self, X):
+        """Class probabilities, shaped like sklearn's predict_proba output."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        leaf_sum = np.concatenate([self._leaf_sum(X[start:start + BLOCK_SIZE])
+                                   for start in range(0, len(X), BLOCK_SIZE)]) if len(X) else np.empty(0)
+        if self.aggregation == 'mean':
+            positive = leaf_sum / len(self.roots)
+        else:
+            positive = 1.0 / (1.0 + np.exp(-(self.base_margin + leaf_sum)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(np.int8)
+
+    def save(self, path):
+        np.savez_compressed(
+            path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            missing_left=self.missing_left, value=self.value, roots=self.roots,
+            meta=np.array(json.dumps({
+                'max_depth': self.max_depth, 'aggregation': self.aggregation,
+                'base_margin': self.base_margin, 'n_features': self.n_features
+            }))
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {key: data[key] for key in data.files if key != 'meta'}
+        return cls(**arrays, **meta)
+
+
+def _concatenate(trees, aggregation, base_margin, n_features):
+    # trees: list of (feature, threshold, left, right, missing_left, value) per tree
+    offsets = np.cumsum([0] + [len(tree[0]) for tree in trees[:-1]])
+    parts = list(zip(*trees))
+    left = np.concatenate([tree_left + offset for tree_left, offset in zip(parts[2], offsets)])
+    right = np.concatenate([tree_right + offset for tree_right, offset in zip(parts[3], offsets)])
+    max_depth = _max_depth(left, right, offsets)
+    return CompiledTreeEnsemble(
+        np.concatenate(parts[0]), np.concatenate(parts[1]), left, right,
+        np.concatenate(parts[4]), np.concatenate(parts[5]), offsets, max_depth,
+        aggregation, base_margin, n_features
+    )
+
+
+def _flatten_sklearn_tree(estimator):
+    tree = estimator.tree_
+    node_ids = np.arange(tree.node_count, dtype=np.int32)
+    is_leaf = tree.children_left < 0
+    left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32)
+    right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32)
+    feature = np.where(is_leaf, 0, tree.feature)
+    threshold = _round_down_float32(tree.threshold)
+    # Trees fitted without NaN support send missing values right ('NaN <= t' is False)
+    missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool)).astype(bool)
+    counts = tree.value[:, 0, :]
+    value = counts[:, 1] / counts.sum(axis=1)
+    return feature, threshold, left, right, missing_left, value
+
+
+def _compile_random_forest(model):
+    if list(model.classes_) != [0, 1]:
+        raise ValueError("Only binary classifiers with classes [0, 1] can be compiled")
+    trees = [_flatten_sklearn_tree(estimator) for estimator in model.estimators_]
+    return _concatenate(trees, 'mean', 0.0, model.n_features_in_)
+
+
+def _xgboost_base_margin(booster):
+    config = json.loads(booster.save_config())
+    learner = config['learner']
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+    base_score = float(str(learner['learner_model_param']['base_score']).strip('[]'))
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def _compile_xgboost(model):
+    booster = model.get_booster()
+    trees_df = booster.trees_to_dataframe()
+    feature_names = booster.feature_names
+    n_features = getattr(model, 'n_features_in_', None)
+
+    # Respect early stopping the same way XGBClassifier.predict_proba does
+    try:
+        best_iteration = model.best_iteration
+    except AttributeError:
+        best_iteration = None
+    if best_iteration is not None:
+        trees_df = trees_df[trees_df['Tree'] < best_iteration + 1]
+
+    trees = []
+    for _, tree_df in trees_df.groupby('Tree', sort=True):
+        position = {node_id: index for index, node_id in enumerate(tree_df['ID'])}
+        is_leaf = (tree_df['Feature'] == 'Leaf').to_numpy()
+        node_ids = np.arange(len(tree_df), dtype=np.int32)
+        yes = np.array([position.get(child, -1) for child in tree_df['Yes']], dtype=np.int32)
+        no = np.array([position.get(child, -1) for child in tree_df['No']], dtype=np.int32)
+        left = np.where(is_leaf, node_ids, yes)
+        right = np.where(is_leaf, node_ids, no)
+        missing_left = (tree_df['Missing'] == tree_df['Yes']).to_numpy() & ~is_leaf
+        if feature_names:
+            lookup = {name: index for index, name in enumerate(feature_names)}
+            feature = np.array([0 if leaf else lookup[name]
+                                for name, leaf in zip(tree_df['Feature'], is_leaf)])
+        else:
+            feature = np.array([0 if leaf else int(name[1:])
+                                for name, leaf in zip(tree_df['Feature'], is_leaf)])
+        # XGBoost splits on 'x < split' in float32, i.e. 'x <= previous float32'
+        split = tree_df['Split'].fillna(0).to_numpy(dtype=np.float32)
+        threshold = np.nextafter(split, np.float32(-np.inf))
+        value = np.where(is_leaf, tree_df['Gain'].to_numpy(dtype=np.float64), 0.0)
+        trees.append((feature, threshold, left, right, missing_left, value))
+    return _concatenate(trees, 'logistic', _xgboost_base_margin(booster), n_features)
+
+
+def compile_model(model):
+    """Flatten a fitted Random Forest / Extra Trees or XGBoost classifier."""
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return _compile_random_forest(model)
+    if type(model).__name__ == 'XGBClassifier':
+        return _compile_xgboost(model)
+    raise TypeError(f"Cannot compile model of type {type(model).__name__}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a saved tree ensemble to compiled NumPy arrays")
+    parser.add_argument('--model-dir', default='../models')
+    parser.add_argument('--model-file', default='readmission_model.pkl')
+    parser.add_argument('--output-file', default='compiled_model.npz')
+    parser.add_argument('--data', default='../data/processed/diabetic_data_cleaned.parquet')
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Compiled Tree Export")
+    print("-" * 70)
+
+    model_path = os.path.join(args.model_dir, args.model_file)
+    output_path = os.path.join(args.model_dir, args.output_file)
+    model = joblib.load(model_path)
+    compiled = compile_model(model)
+    compiled.save(output_path)
+    print(f"Compiled {len(compiled.roots)} trees ({len(compiled.feature)} nodes, depth {compiled.max_depth})")
+    print(f"Artifact size: {os.path.getsize(model_path) / 1e6:.2f} MB pickle -> "
+          f"{os.path.getsize(output_path) / 1e6:.2f} MB compiled ('{output_path}')")
+
+    # Check the compiled model against the original on the scaled cleaned dataset
+    from scoring import load_preprocessor
+    from ingestion import load_cleaned_encounters
+    preprocessor = load_preprocessor(args.model_dir)
+    df = load_cleaned_encounters(args.data, columns=preprocessor.features)
+    X = preprocessor.transform(df)
+    difference = np.abs(model.predict_proba(X)[:, 1] - compiled.predict_proba(X)[:, 1]).max()
+    print(f"Max absolute probability difference over {len(X)} encounters: {difference:.2e}")
+
+    print("\nScoring time per call (original vs compiled):")
+    for batch_size in [1, 100, 10000]:
+        batch = X[:batch_size]
+        repeats = max(1, 2000 // batch_size)
+        timings = []
+        for scorer in (model, compiled):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                scorer.predict_proba(batch)
+            timings.append((time.perf_counter() - start) / repeats * 1000)
+        print(f"  batch {len(batch):>5}: {timings[0]:8.2f} ms vs {timings[1]:8.2f} ms "
+              f"({timings[0] / timings[1]:.1f}x)")
+
+if __name__ == "__main__":
+    main()
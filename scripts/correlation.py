@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Correlation
+This module accumulates correlation matrices over row blocks within a memory budget: the full matrix,
+only the correlations with the target, or an approximation from a row sample
+"""
+
+import numpy as np
+import pandas as pd
+from ingestion import TARGET_COLUMN
+
+CORRELATION_MODES = ['full', 'target', 'sampled']
+# Bytes of per-block working arrays
+DEFAULT_MEMORY_BUDGET = 256 * 2**20
+DEFAULT_SAMPLE_FRACTION = 0.1
+
+
+def block_rows(n_columns, memory_budget=DEFAULT_MEMORY_BUDGET, itemsize=4):
+    """Rows per block so a block's working arrays fit in ``memory_budget`` bytes.
+
+    Per value: the float64 copy out of the frame and its float64 array, the
+    missing-value mask, and the shifted, mask and squared blocks in ``itemsize``.
+    """
+    bytes_per_row = n_columns * (2 * 8 + 1 + 3 * itemsize)
+    return max(1, int(memory_budget // max(bytes_per_row, 1)))
+
+
+class CorrelationAccumulator:
+    """Streaming, mergeable Pearson correlations with pairwise-complete observations.
+
+    For every column pair it keeps the number of rows where both are present and
+    the sums, squared sums and cross products of the values over those rows, so
+    the result matches ``DataFrame.corr()`` including its handling of missing
+    values. Values are shifted by a fixed per-column offset (the first block's
+    means) before summing, which keeps the sums well conditioned.
+
+    Rows are processed in blocks sized to ``memory_budget``, with the block
+    products computed in ``dtype`` (float32 by default) and summed in float64.
+    With ``target`` set only the correlations of every column with that column
+    are accumulated, in time linear in the number of columns. With
+    ``sample_fraction`` set each batch contributes a random sample of its rows,
+    an approximation for very wide extracts.
+    """
+
+    def __init__(self, columns, target=None, sample_fraction=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 dtype=np.float32, random_state=42):
+        self.columns = list(columns)
+        self.target = target
+        self.sample_fraction = sample_fraction
+        self.memory_budget = memory_budget
+        self.dtype = dtype
+        self.random_state = random_state
+        self.shift = None
+        self.n_updates = 0
+        k = len(self.columns)
+        r = 1 if target is not None else k
+        self.count = np.zeros((k, r))
+        # sums[i, j] and squares[i, j]: sums of x_i and x_i ** 2 over the rows where x_i and y_j are present
+        self.sums = np.zeros((k, r))
+        self.squares = np.zeros((k, r))
+        self.cross = np.zeros((k, r))
+        # The same sums of y_j, only needed when the right-hand columns are not all the columns
+        self.right_sums = np.zeros((k, r)) if target is not None else None
+        self.right_squares = np.zeros((k, r)) if target is not None else None
+
+    @property
+    def right_columns(self):
+        return [self.target] if self.target is not None else self.columns
+
+    def _right(self, values):
+        # Right-hand columns of a block (or of the shift vector)
+        if self.target is None:
+            return values
+        return values[..., [self.columns.index(self.target)]]
+
+    def update(self, df):
+        """Fold a batch of rows into the sums; columns missing from the batch count as missing values."""
+        rng = np.random.default_rng([self.random_state, self.n_updates])
+        self.n_updates += 1
+        step = block_rows(len(self.columns), self.memory_budget, np.dtype(self.dtype).itemsize)
+        for start in range(0, len(df), step):
+            block = df.iloc[start:start + step]
+            if self.sample_fraction is not None:
+                block = block[rng.random(len(block)) < self.sample_fraction]
+                if len(block) == 0:
+                    continue
+            X = block.reindex(columns=self.columns).to_numpy(dtype=np.float64, copy=True)
+            present = ~np.isnan(X)
+            X[~present] = 0
+            if self.shift is None:
+                # Column means of the first block (0 for columns it has no values for)
+                self.shift = X.sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+            X -= self.shift
+            X[~present] = 0
+            shifted = X.astype(self.dtype, copy=False)
+            mask = present.astype(self.dtype)
+            right_shifted, right_mask = self._right(shifted), self._right(mask)
+            self.count += mask.T @ right_mask
+            self.sums += shifted.T @ right_mask
+            self.squares += (shifted * shifted).T @ right_mask
+            self.cross += shifted.T @ right_shifted
+            if self.target is not None:
+                self.right_sums += mask.T @ right_shifted
+                self.right_squares += mask.T @ (right_shifted * right_shifted)
+        return self
+
+    def _pair_sums(self):
+        if self.target is None:
+            return self.sums.T, self.squares.T
+        return self.right_sums, self.right_squares
+
+    def _shifted_to(self, shift):
+        # The same sums about another offset
+        delta = self.shift - shift
+        left, right = delta[:, np.newaxis], self._right(delta)[np.newaxis, :]
+        right_sums, right_squares = self._pair_sums()
+        shifted = {
+            'sums': self.sums + left * self.count,
+            'squares': self.squares + 2 * left * self.sums + left ** 2 * self.count,
+            'cross': self.cross + self.sums * right + left * right_sums + left * right * self.count,
+        }
+        if self.target is not None:
+            shifted['right_sums'] = right_sums + right * self.count
+            shifted['right_squares'] = right_squares + 2 * right * right_sums + right ** 2 * self.count
+        return shifted
+
+    def merge(self, other):
+        """Add another accumulator over the same columns and mode."""
+        if (other.columns, other.target, other.sample_fraction) != (self.columns, self.target, self.sample_fraction):
+            raise ValueError("Cannot merge correlation accumulators over different columns or modes")
+        self.n_updates += other.n_updates
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        self.count += other.count
+        for name, value in other._shifted_to(self.shift).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+
+    def correlation(self):
+        """Correlations of every column (rows) with the right-hand columns, as a DataFrame.
+
+        The full square matrix, or a single column in target mode. NaN where a
+        pair has fewer than two rows or no variance.
+        """
+        n = self.count
+        right_sums, right_squares = self._pair_sums()
+        covariance = n * self.cross - self.sums * right_sums
+        variance = n * self.squares - self.sums ** 2
+        right_variance = n * right_squares - right_sums ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = covariance / np.sqrt(variance * right_variance)
+        corr[(n < 2) | (variance <= 0) | (right_variance <= 0)] = np.nan
+        corr = np.clip(corr, -1, 1)
+        corr = pd.DataFrame(corr, index=self.columns, columns=self.right_columns)
+        # A column's correlation with itself is exactly 1
+        for column in self.right_columns:
+            if not np.isnan(corr.at[column, column]):
+                corr.at[column, column] = 1.0
+        return corr
+
+
+def correlation_accumulator(columns, mode='full', target=TARGET_COLUMN, sample_fraction=DEFAULT_SAMPLE_FRACTION,
+                            memory_budget=DEFAULT_MEMORY_BUDGET):
+    """CorrelationAccumulator for one of CORRELATION_MODES."""
+    if mode not in CORRELATION_MODES:
+        raise ValueError(f"Unknown correlation mode: {mode}")
+    return CorrelationAccumulator(columns,
+                                  target=target if mode == 'target' else None,
+                                  sample_fraction=sample_fraction if mode == 'sampled' else None,
+                                  memory_budget=memory_budget)
+
+
+def correlation_matrix(df, columns=None, mode='full', target=TARGET_COLUMN, sample_fraction=DEFAULT_SAMPLE_FRACTION,
+                       memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Correlations of the numeric columns of ``df`` in one blocked pass (see CorrelationAccumulator)."""
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    accumulator = correlation_accumulator(columns, mode, target, sample_fraction, memory_budget)
+    return accumulator.update(df).correlation()
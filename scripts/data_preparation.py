@@ -11,24 +11,34 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-from sklearn.preprocessing import LabelEncoder
+import argparse
 from sklearn.model_selection import train_test_split
+from ingestion import load_raw_encounters
+from cleaning import (add_derived_columns, admission_type_descriptions, encode_with_categories,
+                      merge_admission_type_descriptions, ENCODED_COLUMNS, NON_FEATURE_COLUMNS)
+from preprocessing import ReadmissionPreprocessor, fit_encoding_categories
+from artifact_store import write_parquet
+from streaming_preparation import prepare_in_chunks
 
 # Set visualization style
 sns.set(style='whitegrid')
 plt.style.use('seaborn-v0_8-whitegrid')
 
-def main():
+def main(chunksize=None):
     print("Healthcare Readmission Predictive Analytics - Data Preparation")
     print("-" * 60)
     
     # Create directories if they don't exist
     os.makedirs('../data/processed', exist_ok=True)
     
+    if chunksize:
+        main_streaming(chunksize)
+        return
+    
     # Load the dataset
     print("\n1. Loading the dataset...")
     try:
-        diabetic_data = pd.read_csv('../data/diabetic_data.csv')
+        diabetic_data = load_raw_encounters('../data/diabetic_data.csv')
         print(f"Diabetic Data Shape: {diabetic_data.shape}")
         
         # Load IDS mapping if available
@@ -54,13 +64,10 @@ def main():
     missing_values = diabetic_data.isnull().sum()
     print(f"Columns with missing values: {missing_values[missing_values > 0].shape[0]}")
     
-    # Check for '?' values which represent missing data in this dataset
+    # '?' values represent missing data in this dataset and are parsed as NaN at load time
     print("\n4. Checking for '?' values (missing data)...")
-    for column in diabetic_data.columns:
-        if diabetic_data[column].dtype == object:
-            question_marks = (diabetic_data[column] == '?').sum()
-            if question_marks > 0:
-                print(f"{column}: {question_marks} ('?' values)")
+    for column, count in missing_values[missing_values > 0].items():
+        print(f"{column}: {count} ('?' values)")
     
     # Data preprocessing
     print("\n5. Preprocessing and cleaning the data...")
@@ -68,76 +75,42 @@ def main():
     # Make a copy of the dataframe to avoid modifying the original
     df = diabetic_data.copy()
     
-    # Handle missing values (represented as '?')
-    for column in df.columns:
-        if df[column].dtype == object:
-            # Replace '?' with NaN
-            df[column] = df[column].replace('?', np.nan)
-    
-    # Convert age ranges to numeric values
-    # Age is in format '[0-10)', '[10-20)', etc.
-    def age_to_numeric(age_range):
-        if pd.isna(age_range):
-            return np.nan
-        # Extract the lower and upper bounds
-        lower = int(age_range.strip('[]()').split('-')[0])
-        upper = int(age_range.strip('[]()').split('-')[1])
-        # Return the midpoint
-        return (lower + upper) / 2
-    
-    df['age_numeric'] = df['age'].apply(age_to_numeric)
-    
-    # Convert 'max_glu_serum' and 'A1Cresult' to numeric
-    # These are categorical but can be converted to ordinal
-    glucose_mapping = {'None': 0, 'Norm': 1, '>200': 2, '>300': 3}
-    a1c_mapping = {'None': 0, 'Norm': 1, '>7': 2, '>8': 3}
-    
-    df['max_glu_serum_numeric'] = df['max_glu_serum'].map(glucose_mapping)
-    df['A1Cresult_numeric'] = df['A1Cresult'].map(a1c_mapping)
+    # Convert age ranges, 'max_glu_serum' and 'A1Cresult' to numeric and readmitted to binary
+    df = add_derived_columns(df)
     
-    # Convert readmitted to binary (0 = No, 1 = Yes)
-    df['readmitted_binary'] = df['readmitted'].apply(lambda x: 0 if x == 'NO' else 1)
-    
-    # Encode categorical variables
-    categorical_columns = ['gender', 'race', 'admission_type_id', 
-                          'discharge_disposition_id', 'admission_source_id']
-    
-    for column in categorical_columns:
-        le = LabelEncoder()
-        # Handle NaN values
-        non_null_mask = df[column].notna()
-        df.loc[non_null_mask, f'{column}_encoded'] = le.fit_transform(df.loc[non_null_mask, column])
-        # Fill NaN values with -1
-        df[f'{column}_encoded'] = df[f'{column}_encoded'].fillna(-1).astype(int)
+    # Encode categorical variables (NaN values are encoded as -1)
+    categories = fit_encoding_categories(df)
+    for column in ENCODED_COLUMNS:
+        df[f'{column}_encoded'] = encode_with_categories(df[column], categories[column])
     
     # If we have the mapping file, merge it to get descriptions
     if has_mapping:
         # Merge with admission_type_id
-        if 'admission_type_id' in ids_mapping.columns:
-            admission_type_mapping = ids_mapping[ids_mapping['admission_type_id'].notna()]
-            # Convert admission_type_id to string in both dataframes to avoid type mismatch
-            df['admission_type_id_str'] = df['admission_type_id'].astype(str)
-            admission_type_mapping['admission_type_id_str'] = admission_type_mapping['admission_type_id'].astype(str)
-            df = pd.merge(df, 
-                         admission_type_mapping[['admission_type_id_str', 'description']], 
-                         on='admission_type_id_str', 
-                         how='left')
+        admission_type_mapping = admission_type_descriptions(ids_mapping)
+        if admission_type_mapping is not None:
+            df = merge_admission_type_descriptions(df, admission_type_mapping)
     
     # Handle remaining missing values
     # For numeric columns, fill with median
-    numeric_columns = df.select_dtypes(include=['float64', 'int64']).columns
-    for column in numeric_columns:
-        df[column] = df[column].fillna(df[column].median())
+    numeric_columns = df.select_dtypes(include='number').columns
+    medians = df[numeric_columns].median()
+    df[numeric_columns] = df[numeric_columns].fillna(medians)
     
     # For categorical columns, fill with mode
-    categorical_columns = df.select_dtypes(include=['object']).columns
+    categorical_columns = df.select_dtypes(include=['object', 'category']).columns
+    modes = {}
     for column in categorical_columns:
-        df[column] = df[column].fillna(df[column].mode()[0])
+        modes[column] = df[column].mode()[0]
+        df[column] = df[column].fillna(modes[column])
+    
+    # Save the fitted encodings and imputation values for scoring new encounters
+    preprocessor = ReadmissionPreprocessor(categories, medians.to_dict(), modes)
+    preprocessor.save('../data/processed/preprocessor.json')
+    print("Fitted preprocessing saved to '../data/processed/preprocessor.json'")
     
     # Split the data into training and testing sets
     print("\n6. Splitting data into training and testing sets...")
-    features = [col for col in df.columns if col not in ['readmitted', 'readmitted_binary', 
-                                                        'encounter_id', 'patient_nbr']]
+    features = [col for col in df.columns if col not in NON_FEATURE_COLUMNS]
     X = df[features]
     y = df['readmitted_binary']
     
@@ -147,15 +120,15 @@ def main():
     
     # Save the processed data
     print("\n7. Saving processed data...")
-    df.to_csv('../data/processed/diabetic_data_cleaned.csv', index=False)
-    print("Cleaned dataset saved to '../data/processed/diabetic_data_cleaned.csv'")
+    write_parquet(df, '../data/processed/diabetic_data_cleaned.parquet')
+    print("Cleaned dataset saved to '../data/processed/diabetic_data_cleaned.parquet'")
     
     # Save train and test sets
     train_df = pd.concat([X_train, y_train], axis=1)
     test_df = pd.concat([X_test, y_test], axis=1)
     
-    train_df.to_csv('../data/processed/train_data.csv', index=False)
-    test_df.to_csv('../data/processed/test_data.csv', index=False)
+    write_parquet(train_df, '../data/processed/train_data.parquet')
+    write_parquet(test_df, '../data/processed/test_data.parquet')
     print("Train and test datasets saved to '../data/processed/'")
     
     # Generate basic statistics
@@ -177,5 +150,38 @@ def main():
     
     print("\nData preparation completed successfully!")
 
+def main_streaming(chunksize):
+    # Streaming mode: peak memory is bounded by the chunk size, not by the number of encounters
+    print(f"\nStreaming mode: processing the raw extract in chunks of {chunksize} rows")
+    if not os.path.exists('../data/diabetic_data.csv'):
+        print("Error: diabetic_data.csv not found. Please ensure the file is in the data directory.")
+        return
+    
+    admission_type_mapping = None
+    try:
+        ids_mapping = pd.read_csv('../data/IDS_mapping.csv')
+        admission_type_mapping = admission_type_descriptions(ids_mapping)
+    except FileNotFoundError:
+        print("IDS_mapping.csv not found. Proceeding without mapping.")
+    
+    print("\n1. Computing imputation statistics and cleaning the data chunk by chunk...")
+    stats, data_dict, preprocessor = prepare_in_chunks('../data/diabetic_data.csv', '../data/processed',
+                                                       chunksize=chunksize,
+                                                       admission_type_mapping=admission_type_mapping)
+    print("Cleaned, train and test datasets saved to '../data/processed/'")
+    preprocessor.save('../data/processed/preprocessor.json')
+    print("Fitted preprocessing saved to '../data/processed/preprocessor.json'")
+    
+    print("\n2. Saving basic statistics and data dictionary...")
+    stats.to_csv('../data/processed/data_statistics.csv')
+    data_dict.to_csv('../data/processed/data_dictionary.csv', index=False)
+    print("Statistics and data dictionary saved to '../data/processed/'")
+    
+    print("\nData preparation completed successfully!")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Prepare the diabetes dataset for readmission prediction")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream the raw extract in chunks of this many rows instead of loading it whole")
+    args = parser.parse_args()
+    main(chunksize=args.chunksize)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Ensembles
+This module builds voting and stacking ensembles from already fitted base models
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.model_selection import StratifiedKFold
+
+# StackingClassifier's default: 5 stratified folds without shuffling
+DEFAULT_CV = StratifiedKFold(n_splits=5)
+
+
+def _fold_probabilities(estimator, X, y, train_index, test_index):
+    fold_model = clone(estimator).fit(X[train_index], y[train_index])
+    return test_index, fold_model.predict_proba(X[test_index])[:, 1]
+
+
+def out_of_fold_probabilities(estimators, X, y, cv=DEFAULT_CV, n_jobs=-1, cache=None):
+    """Out-of-fold positive-class probabilities, one column per (name, estimator) pair.
+
+    Every (estimator, fold) fit runs as its own job. With a ModelCache, the
+    column of an estimator whose inputs did not change is reused.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    folds = list(cv.split(X, y))
+    oof = np.empty((len(X), len(estimators)))
+    keys = {}
+    pending = []
+    for column, (name, estimator) in enumerate(estimators):
+        if cache is not None:
+            keys[column] = cache.key('oof', estimator, X, y, cv=repr(cv))
+            cached = cache.get(keys[column])
+            if cached is not None:
+                oof[:, column] = cached
+                continue
+        pending.append(column)
+
+    jobs = [(column, train_index, test_index) for column in pending for train_index, test_index in folds]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fold_probabilities)(estimators[column][1], X, y, train_index, test_index)
+        for column, train_index, test_index in jobs
+    )
+    for (column, _, _), (test_index, probabilities) in zip(jobs, results):
+        oof[test_index, column] = probabilities
+
+    if cache is not None:
+        for column in pending:
+            cache.put(keys[column], oof[:, column].copy())
+    return oof
+
+
+def _base_probabilities(estimators, X):
+    return np.column_stack([estimator.predict_proba(X)[:, 1] for _, estimator in estimators])
+
+
+class PrefitVotingClassifier(BaseEstimator, ClassifierMixin):
+    """Soft-voting ensemble over fitted binary classifiers; nothing is refitted."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, estimators):
+        self.estimators = estimators
+
+    def predict_proba(self, X):
+        positive = _base_probabilities(self.estimators, X).mean(axis=1)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+class PrefitStackingClassifier(BaseEstimator, ClassifierMixin):
+    """Stacking ensemble over fitted binary classifiers.
+
+    Like StackingClassifier, the final estimator is trained on out-of-fold
+    probabilities and applied to the full-data base models at predict time,
+    but the base models and their out-of-fold predictions are supplied rather
+    than refitted.
+    """
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, estimators, final_estimator):
+        self.estimators = estimators
+        self.final_estimator = final_estimator
+
+    def fit_final_estimator(self, oof, y):
+        self.final_estimator_ = clone(self.final_estimator).fit(oof, np.asarray(y))
+        return self
+
+    def predict_proba(self, X):
+        return self.final_estimator_.predict_proba(_base_probabilities(self.estimators, X))
+
+    def predict(self, X):
+        return self.final_estimator_.predict(_base_probabilities(self.estimators, X))
+
+
+def build_stacking(estimators, oof, y, final_estimator, n_jobs=None):
+    """Stacking ensemble over ``estimators`` whose final estimator is trained on ``oof``."""
+    if n_jobs is not None and 'n_jobs' in final_estimator.get_params():
+        final_estimator = clone(final_estimator).set_params(n_jobs=n_jobs)
+    return PrefitStackingClassifier(estimators, final_estimator).fit_final_estimator(oof, y)
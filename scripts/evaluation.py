@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Model Evaluation
+This module scores each model once per split and derives every evaluation metric and curve from the cached outputs
+"""
+
+import numpy as np
+from sklearn.metrics import classification_report
+from sklearn.svm import SVC
+from report_rendering import confusion_matrix_plot, roc_curve_plot
+
+
+def score_split(model, X):
+    """One inference pass over ``X``: (positive-class probabilities, predicted labels).
+
+    Labels are the most probable class, which is what ``predict`` returns for
+    the models trained here. The exact SVC is the exception: with
+    probability=True it labels from its decision function, which can disagree
+    with its Platt-scaled probabilities near the boundary, so its labels come
+    from ``predict`` in a second pass. Models without ``predict_proba``
+    return None for the probabilities.
+    """
+    if not hasattr(model, 'predict_proba'):
+        return None, np.asarray(model.predict(X))
+    probabilities = model.predict_proba(X)
+    if isinstance(model, SVC):
+        return probabilities[:, 1], np.asarray(model.predict(X))
+    classes = getattr(model, 'classes_', np.arange(probabilities.shape[1]))
+    return probabilities[:, 1], np.asarray(classes)[probabilities.argmax(axis=1)]
+
+
+def confusion_counts(y_true, y_pred):
+    """2x2 confusion matrix of binary 0/1 labels, counted with one bincount."""
+    codes = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(codes, minlength=4).reshape(2, 2)
+
+
+def _ratio(numerator, denominator):
+    # 0 where the denominator is 0, like scikit-learn's zero_division default
+    numerator, denominator = np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def binary_metrics(y_true, y_pred):
+    """Accuracy, precision, recall, F1 and the confusion matrix of binary 0/1 labels."""
+    cm = confusion_counts(y_true, y_pred)
+    (tn, fp), (fn, tp) = cm
+    precision = float(_ratio(tp, tp + fp))
+    recall = float(_ratio(tp, tp + fn))
+    return {
+        'accuracy': (tp + tn) / cm.sum(),
+        'precision': precision,
+        'recall': recall,
+        'f1': float(_ratio(2 * tp, 2 * tp + fp + fn)),
+        'confusion_matrix': cm,
+    }
+
+
+def threshold_counts(y_true, probabilities):
+    """True and false positives at every distinct probability threshold, from one sort.
+
+    Returns (thresholds, tp, fp) with thresholds descending; predicting
+    positive for ``probabilities >= thresholds[i]`` gives ``tp[i]`` true and
+    ``fp[i]`` false positives.
+    """
+    # Tied scores end up adjacent either way, so an unstable sort is enough
+    order = np.argsort(probabilities)[::-1]
+    scores = np.asarray(probabilities)[order]
+    positives = (np.asarray(y_true) == 1)[order]
+    # Last position of each run of tied scores
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.cumsum(positives)[last]
+    fp = last + 1 - tp
+    return scores[last], tp, fp
+
+
+def roc_points(y_true, probabilities):
+    """ROC curve (fpr, tpr, thresholds) and its AUC from a single threshold sweep."""
+    thresholds, tp, fp = threshold_counts(y_true, probabilities)
+    fpr = np.r_[0.0, _ratio(fp, fp[-1])]
+    tpr = np.r_[0.0, _ratio(tp, tp[-1])]
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+    return fpr, tpr, np.r_[np.inf, thresholds], roc_auc
+
+
+class ModelEvaluation:
+    """Cached test-set outputs of one fitted model and the metrics derived from them."""
+
+    def __init__(self, name, model, y_test, probabilities, predictions, train_accuracy):
+        self.name = name
+        self.model = model
+        self.y_test = np.asarray(y_test)
+        self.probabilities = probabilities
+        self.predictions = predictions
+        self.train_accuracy = train_accuracy
+        metrics = binary_metrics(self.y_test, predictions)
+        self.accuracy = metrics['accuracy']
+        self.precision = metrics['precision']
+        self.recall = metrics['recall']
+        self.f1 = metrics['f1']
+        self.confusion_matrix = metrics['confusion_matrix']
+        self.fpr = self.tpr = self.roc_auc = None
+        if probabilities is not None:
+            self.fpr, self.tpr, _, self.roc_auc = roc_points(self.y_test, probabilities)
+
+
+def evaluate_model(model, X_train, X_test, y_train, y_test, model_name, plots=None, plot_dir='../models'):
+    """Score a fitted model once on each split, print its metrics and queue its plots on ``plots``."""
+    print(f"\n{model_name} Training:")
+
+    # One inference pass per split; every metric below comes from these outputs
+    _, y_train_pred = score_split(model, X_train)
+    probabilities, y_test_pred = score_split(model, X_test)
+    evaluation = ModelEvaluation(model_name, model, y_test, probabilities, y_test_pred,
+                                 train_accuracy=binary_metrics(y_train, y_train_pred)['accuracy'])
+
+    print(f"Training Accuracy: {evaluation.train_accuracy:.4f}")
+    print(f"Testing Accuracy: {evaluation.accuracy:.4f}")
+    print(f"Testing Precision: {evaluation.precision:.4f}")
+    print(f"Testing Recall: {evaluation.recall:.4f}")
+    print(f"Testing F1 Score: {evaluation.f1:.4f}")
+    print(f"Classification Report (Test Set):")
+    print(classification_report(y_test, y_test_pred))
+
+    if plots is not None:
+        plot_name = model_name.lower().replace(" ", "_")
+        plots.add(f'{plot_dir}/{plot_name}_confusion_matrix.png', confusion_matrix_plot,
+                  cm=evaluation.confusion_matrix, title=f'Confusion Matrix - {model_name}')
+        if probabilities is not None:
+            plots.add(f'{plot_dir}/{plot_name}_roc_curve.png', roc_curve_plot, fpr=evaluation.fpr,
+                      tpr=evaluation.tpr, roc_auc=evaluation.roc_auc, title=f'ROC Curve - {model_name}')
+    return evaluation
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Risk Explanations
+This module explains per-encounter readmission risk with TreeSHAP, batching model calls and caching explanations
+"""
+
+import os
+import argparse
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_SIZE = 10_000
+DEFAULT_BATCH_SIZE = 1_000
+TOP_FACTORS = 5
+CACHE_FILE = 'explanation_cache.joblib'
+# Display names of the model features for the predictor page and the Power BI export
+FEATURE_LABELS = {
+    'age_numeric': 'Age',
+    'time_in_hospital': 'Length of Stay',
+    'num_lab_procedures': 'Lab Procedures',
+    'num_procedures': 'Procedures',
+    'num_medications': 'Medications',
+    'number_outpatient': 'Outpatient Visits',
+    'number_emergency': 'Emergency Visits',
+    'number_inpatient': 'Previous Inpatient Visits',
+    'number_diagnoses': 'Diagnoses',
+    'max_glu_serum_numeric': 'Max Glucose Serum',
+    'A1Cresult_numeric': 'A1C Result',
+    'gender_encoded': 'Gender',
+    'race_encoded': 'Race',
+    'admission_type_id_encoded': 'Admission Type',
+    'discharge_disposition_id_encoded': 'Discharge Disposition',
+    'admission_source_id_encoded': 'Admission Source',
+}
+
+
+def supports_tree_shap(model):
+    """Whether TreeSHAP can explain ``model`` (the random forest and XGBoost models)."""
+    return hasattr(model, 'estimators_') or hasattr(model, 'get_booster')
+
+
+def _row_keys(features):
+    # Content hash of each feature vector; identical encounters share an explanation. The
+    # cleaned extract stores compact float32 columns, so hashing at float32 precision gives
+    # the same key whether the values come from the extract, a CSV export or a request
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in features]
+
+
+class ReadmissionExplainer:
+    """TreeSHAP contributions of each feature to an encounter's readmission risk.
+
+    Contributions are in the model's output units (probability for the random
+    forest, log-odds for XGBoost) and sum with ``base_value`` to that output.
+    Explanations are cached per feature vector with least-recently-used
+    eviction; each batch explains all of its cache misses in one TreeSHAP call.
+    """
+
+    def __init__(self, model, features, cache_size=DEFAULT_CACHE_SIZE):
+        if not supports_tree_shap(model):
+            raise ValueError(f"TreeSHAP explanations need a tree ensemble, not {type(model).__name__}")
+        import shap
+        self.features = list(features)
+        self.cache_size = cache_size
+        self._explainer = shap.TreeExplainer(model)
+        self.base_value = float(np.ravel(self._explainer.expected_value)[-1])
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._background = None
+        self.hits = self.misses = 0
+
+    def _shap_values(self, X):
+        values = self._explainer.shap_values(X, check_additivity=False)
+        # One array per class (older shap) or a trailing class axis: keep the readmitted class
+        if isinstance(values, list):
+            values = values[-1]
+        elif values.ndim == 3:
+            values = values[..., -1]
+        return np.asarray(values, dtype=np.float64)
+
+    def explain(self, X, unscaled=None):
+        """Contribution matrix (rows x features) for a model feature matrix ``X``.
+
+        Cache keys are taken from ``unscaled``, the same rows before scaling,
+        when given: scaling the same encounter in float32 (training) or
+        float64 (serving) gives slightly different model inputs.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        keys = _row_keys(X if unscaled is None else unscaled)
+        contributions = np.empty(X.shape)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    contributions[i] = cached
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += len(missing)
+        if missing:
+            # Each distinct uncached vector is explained once, all in a single call
+            first_rows = [rows[0] for rows in missing.values()]
+            computed = self._shap_values(X[first_rows])
+            with self._lock:
+                for (key, rows), values in zip(missing.items(), computed):
+                    contributions[rows] = values
+                    # A copy, so a cached row does not keep the whole batch's array alive
+                    self._cache[key] = values.copy()
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return contributions
+
+    def precompute(self, X, unscaled=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Explain ``X`` in a background thread, filling the cache; returns a Future of its contributions."""
+        if self._background is None:
+            self._background = ThreadPoolExecutor(max_workers=1)
+        unscaled = X if unscaled is None else np.asarray(unscaled)
+
+        def run():
+            return np.vstack([self.explain(X[start:start + batch_size], unscaled[start:start + batch_size])
+                              for start in range(0, len(X), batch_size)] or [np.empty((0, len(self.features)))])
+        return self._background.submit(run)
+
+    def factors(self, contributions, values, top=TOP_FACTORS):
+        """The ``top`` features with the largest absolute contribution for each row, largest first."""
+        explained = []
+        for row_contributions, row_values in zip(np.atleast_2d(contributions), np.atleast_2d(values)):
+            order = np.argsort(-np.abs(row_contributions))[:top]
+            explained.append([{
+                'feature': self.features[j],
+                'label': FEATURE_LABELS.get(self.features[j], self.features[j]),
+                'value': float(row_values[j]),
+                'contribution': float(row_contributions[j]),
+            } for j in order])
+        return explained
+
+    def save_cache(self, path, model_version):
+        with self._lock:
+            joblib.dump({'model_version': model_version, 'entries': list(self._cache.items())}, path)
+
+    def load_cache(self, path, model_version):
+        """Warm the cache from ``save_cache``; returns the number of entries, 0 if it belongs to another model."""
+        if not os.path.exists(path):
+            return 0
+        saved = joblib.load(path)
+        if saved['model_version'] != model_version:
+            return 0
+        with self._lock:
+            for key, values in saved['entries'][-self.cache_size:]:
+                self._cache[key] = values
+        return len(saved['entries'][-self.cache_size:])
+
+
+def explanation_frame(contributions, features, base_value):
+    """Contributions as 'shap_<feature>' columns plus the base value, for the Power BI export."""
+    frame = pd.DataFrame(contributions, columns=[f'shap_{feature}' for feature in features])
+    frame['shap_base_value'] = base_value
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-encounter TreeSHAP explanations for the test export")
+    parser.add_argument('--model-dir', default='../models')
+    parser.add_argument('--model-file', default='readmission_model.pkl')
+    parser.add_argument('--input', default='../powerbi/data/test_predictions.csv')
+    parser.add_argument('--output', default='../powerbi/data/test_explanations.csv')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Risk Explanations")
+    print("-" * 70)
+    from scoring import load_scorer
+    scorer = load_scorer(args.model_dir, args.model_file)
+    explainer = ReadmissionExplainer(scorer.model, scorer.features, args.cache_size)
+    # The export holds the unscaled model features; scale them as the model expects
+    test = pd.read_csv(args.input)
+    X = scorer.preprocessor.transform(test)
+    unscaled = scorer.preprocessor.transform(test, scale=False)
+    contributions = explainer.precompute(X, unscaled, args.batch_size).result()
+    explanation_frame(contributions, scorer.features, explainer.base_value).to_csv(args.output, index=False)
+    print(f"Explained {len(X):,} encounters ({explainer.misses:,} distinct) into '{args.output}'")
+    cache_path = os.path.join(args.model_dir, CACHE_FILE)
+    explainer.save_cache(cache_path, scorer.model_version)
+    print(f"Explanation cache saved to '{cache_path}'")
+
+if __name__ == "__main__":
+    main()
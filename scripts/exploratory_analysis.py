@@ -11,12 +11,32 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import argparse
+from ingestion import load_cleaned_encounters
+from artifact_store import parquet_columns
+from group_aggregation import EDAState
+from correlation import CORRELATION_MODES
+from report_rendering import (PlotRenderer, PLOT_MODES, count_bar_plot, rate_bar_plot, rate_line_plot,
+                              correlation_heatmap_plot, ranked_bar_plot)
 
 # Set visualization style
 sns.set(style='whitegrid')
 plt.style.use('seaborn-v0_8-whitegrid')
 
-def main():
+GROUP_COLUMNS = ['age_group', 'time_in_hospital', 'number_diagnoses', 'gender', 'race', 'num_medications']
+# Running aggregates that later batches of encounters are folded into
+EDA_STATE_PATH = '../data/processed/eda_state.joblib'
+
+
+def add_age_groups(df):
+    # Age groups for better visualization
+    df['age_group'] = pd.cut(df['age_numeric'], 
+                            bins=[0, 30, 50, 70, 100], 
+                            labels=['<30', '30-50', '51-70', '>70'])
+    return df
+
+
+def main(plot_mode=None, batches=None, correlation_mode='full'):
     print("Healthcare Readmission Predictive Analytics - Exploratory Data Analysis")
     print("-" * 70)
     
@@ -24,182 +44,153 @@ def main():
     os.makedirs('../data/processed', exist_ok=True)
     os.makedirs('../notebooks', exist_ok=True)
     
-    # Load the processed dataset
-    print("\n1. Loading the processed dataset...")
-    try:
-        df = pd.read_csv('../data/processed/diabetic_data_cleaned.csv')
-        print(f"Dataset shape: {df.shape}")
-    except FileNotFoundError:
-        print("Error: Processed dataset not found. Please run data_preparation.py first.")
-        return
+    if batches:
+        # Fold the new batches into the saved aggregates instead of re-reading the full dataset
+        print("\n1. Updating the saved statistics with new encounter batches...")
+        try:
+            state = EDAState.load(EDA_STATE_PATH)
+        except FileNotFoundError:
+            print("Error: No saved EDA statistics. Please run exploratory_analysis.py without --update first.")
+            return
+        df = None
+        for path in batches:
+            batch = load_cleaned_encounters(path, columns=state.correlation.columns + ['gender', 'race'])
+            if state.update(add_age_groups(batch)):
+                print(f"Added {len(batch):,} encounters from '{path}'")
+            else:
+                print(f"Skipped '{path}': already included")
+    else:
+        # Load the processed dataset
+        print("\n1. Loading the processed dataset...")
+        try:
+            # Only the numeric columns and the demographic labels are used below
+            cleaned_path = '../data/processed/diabetic_data_cleaned.parquet'
+            columns = parquet_columns(cleaned_path, numeric_only=True) + ['gender', 'race']
+            df = load_cleaned_encounters(cleaned_path, columns=columns)
+            print(f"Dataset shape: {df.shape}")
+        except FileNotFoundError:
+            print("Error: Processed dataset not found. Please run data_preparation.py first.")
+            return
+        
+        # Group counts and sums plus the correlation sums, computed in one pass and saved for later updates
+        numeric_cols = df.select_dtypes(include='number').columns
+        state = EDAState(GROUP_COLUMNS, numeric_cols, correlation_mode=correlation_mode)
+        state.update(add_age_groups(df))
+    state.save(EDA_STATE_PATH)
+    print(f"Statistics cover {state.n_rows:,} encounters, saved to '{EDA_STATE_PATH}'")
     
     # Create output directory for visualizations
     os.makedirs('../data/visualizations', exist_ok=True)
     
-    # Basic statistics
+    # Plots are queued as the analysis runs and rendered in background processes
+    plots = PlotRenderer(plot_mode)
+    
+    # Basic statistics (quantiles need the full dataset, so they are skipped when updating)
     print("\n2. Generating basic statistics...")
-    numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-    stats = df[numeric_cols].describe()
-    print(stats)
+    if df is not None:
+        stats = df[numeric_cols].describe()
+        print(stats)
+    else:
+        print("Skipped for incremental updates")
     
     # Readmission distribution
     print("\n3. Analyzing readmission distribution...")
-    readmission_counts = df['readmitted_binary'].value_counts()
-    readmission_percentage = df['readmitted_binary'].value_counts(normalize=True) * 100
+    readmission_counts = state.target_counts()
+    readmission_percentage = readmission_counts / state.n_rows * 100
     
     print("Readmission Counts:")
     print(f"Not Readmitted (0): {readmission_counts[0]} ({readmission_percentage[0]:.2f}%)")
     print(f"Readmitted (1): {readmission_counts[1]} ({readmission_percentage[1]:.2f}%)")
     
-    plt.figure(figsize=(10, 6))
-    sns.countplot(x='readmitted_binary', data=df, palette=['#4CAF50', '#F44336'])
-    plt.title('Distribution of Readmission', fontsize=16)
-    plt.xlabel('Readmitted (0=No, 1=Yes)', fontsize=14)
-    plt.ylabel('Count', fontsize=14)
-    plt.xticks([0, 1], ['Not Readmitted', 'Readmitted'])
-    plt.grid(axis='y', alpha=0.3)
-    plt.savefig('../data/visualizations/readmission_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/readmission_distribution.png', count_bar_plot, figsize=(10, 6),
+              counts=readmission_counts.sort_index().to_numpy(), title='Distribution of Readmission',
+              xlabel='Readmitted (0=No, 1=Yes)', labels=['Not Readmitted', 'Readmitted'],
+              palette=['#4CAF50', '#F44336'])
     
     # Age vs. Readmission
     print("\n4. Examining age vs. readmission patterns...")
     
-    # Create age groups for better visualization
-    df['age_group'] = pd.cut(df['age_numeric'], 
-                            bins=[0, 30, 50, 70, 100], 
-                            labels=['<30', '30-50', '51-70', '>70'])
+    # Readmission count, sum and rate for every grouping column
+    groups = {column: state.group_rates(column) for column in GROUP_COLUMNS}
     
-    # Calculate readmission rate by age group
-    age_readmission = df.groupby('age_group')['readmitted_binary'].mean() * 100
+    # Readmission rate by age group
+    age_readmission = groups['age_group']['rate']
     print("Readmission Rate by Age Group:")
     print(age_readmission)
     
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x='age_group', y='readmitted_binary', data=df, estimator=lambda x: len(x[x == 1]) / len(x) * 100, 
-               palette='viridis')
-    plt.title('Readmission Rate by Age Group', fontsize=16)
-    plt.xlabel('Age Group', fontsize=14)
-    plt.ylabel('Readmission Rate (%)', fontsize=14)
-    plt.grid(axis='y', alpha=0.3)
-    plt.savefig('../data/visualizations/age_vs_readmission.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/age_vs_readmission.png', rate_bar_plot, figsize=(10, 6),
+              rates=age_readmission, title='Readmission Rate by Age Group', xlabel='Age Group', palette='viridis')
     
     # Time in hospital vs. Readmission
     print("\n5. Analyzing time in hospital vs. readmission...")
-    time_readmission = df.groupby('time_in_hospital')['readmitted_binary'].mean() * 100
+    time_readmission = groups['time_in_hospital']['rate']
     print("Readmission Rate by Time in Hospital:")
     print(time_readmission)
     
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(x='time_in_hospital', y='readmitted_binary', data=df, estimator=lambda x: len(x[x == 1]) / len(x) * 100, 
-                marker='o', color='#FF9800')
-    plt.title('Readmission Rate by Time in Hospital', fontsize=16)
-    plt.xlabel('Time in Hospital (days)', fontsize=14)
-    plt.ylabel('Readmission Rate (%)', fontsize=14)
-    plt.grid(True, alpha=0.3)
-    plt.savefig('../data/visualizations/time_vs_readmission.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/time_vs_readmission.png', rate_line_plot, figsize=(12, 6),
+              rates=time_readmission, title='Readmission Rate by Time in Hospital', xlabel='Time in Hospital (days)', color='#FF9800')
     
     # Number of diagnoses vs. Readmission
     print("\n6. Analyzing number of diagnoses vs. readmission...")
-    diagnoses_readmission = df.groupby('number_diagnoses')['readmitted_binary'].mean() * 100
+    diagnoses_readmission = groups['number_diagnoses']['rate']
     print("Readmission Rate by Number of Diagnoses:")
     print(diagnoses_readmission)
     
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(x='number_diagnoses', y='readmitted_binary', data=df, estimator=lambda x: len(x[x == 1]) / len(x) * 100, 
-                marker='o', color='#4CAF50')
-    plt.title('Readmission Rate by Number of Diagnoses', fontsize=16)
-    plt.xlabel('Number of Diagnoses', fontsize=14)
-    plt.ylabel('Readmission Rate (%)', fontsize=14)
-    plt.grid(True, alpha=0.3)
-    plt.savefig('../data/visualizations/diagnoses_vs_readmission.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/diagnoses_vs_readmission.png', rate_line_plot, figsize=(12, 6),
+              rates=diagnoses_readmission, title='Readmission Rate by Number of Diagnoses', xlabel='Number of Diagnoses', color='#4CAF50')
     
     # Gender vs. Readmission
     print("\n7. Analyzing gender vs. readmission...")
-    gender_readmission = df.groupby('gender')['readmitted_binary'].mean() * 100
+    gender_readmission = groups['gender']['rate']
     print("Readmission Rate by Gender:")
     print(gender_readmission)
     
-    plt.figure(figsize=(8, 6))
-    sns.barplot(x='gender', y='readmitted_binary', data=df, estimator=lambda x: len(x[x == 1]) / len(x) * 100, 
-               palette='Set2')
-    plt.title('Readmission Rate by Gender', fontsize=16)
-    plt.xlabel('Gender', fontsize=14)
-    plt.ylabel('Readmission Rate (%)', fontsize=14)
-    plt.grid(axis='y', alpha=0.3)
-    plt.savefig('../data/visualizations/gender_vs_readmission.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/gender_vs_readmission.png', rate_bar_plot,
+              rates=gender_readmission, title='Readmission Rate by Gender', xlabel='Gender', palette='Set2')
     
     # Race vs. Readmission
     print("\n8. Analyzing race vs. readmission...")
-    race_readmission = df.groupby('race')['readmitted_binary'].mean() * 100
+    race_readmission = groups['race']['rate']
     print("Readmission Rate by Race:")
     print(race_readmission)
     
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x='race', y='readmitted_binary', data=df, estimator=lambda x: len(x[x == 1]) / len(x) * 100, 
-               palette='Set3')
-    plt.title('Readmission Rate by Race', fontsize=16)
-    plt.xlabel('Race', fontsize=14)
-    plt.ylabel('Readmission Rate (%)', fontsize=14)
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('../data/visualizations/race_vs_readmission.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/race_vs_readmission.png', rate_bar_plot, figsize=(12, 6),
+              rates=race_readmission, title='Readmission Rate by Race', xlabel='Race', palette='Set3',
+              rotate_labels=True)
     
     # Correlation analysis
     print("\n9. Performing correlation analysis...")
-    # Select numeric columns for correlation
-    numeric_df = df.select_dtypes(include=['int64', 'float64'])
-    
-    # Calculate correlation matrix
-    corr_matrix = numeric_df.corr()
+    # Correlation matrix of the numeric columns, from the accumulated sums
+    corr_matrix = state.correlation_matrix()
     
     # Find top correlations with readmission
     readmission_corr = corr_matrix['readmitted_binary'].sort_values(ascending=False)
     print("Top Correlations with Readmission:")
     print(readmission_corr.head(10))
     
-    # Plot correlation heatmap
-    plt.figure(figsize=(16, 14))
-    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-    sns.heatmap(corr_matrix, mask=mask, annot=False, cmap='coolwarm', center=0,
-               square=True, linewidths=.5, cbar_kws={"shrink": .5})
-    plt.title('Correlation Matrix of Numeric Features', fontsize=16)
-    plt.tight_layout()
-    plt.savefig('../data/visualizations/correlation_heatmap.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # Plot correlation with readmission
-    plt.figure(figsize=(12, 10))
+    # Queue the correlation heatmap (target mode only has the readmission column)
+    if state.correlation.target is None:
+        plots.add('../data/visualizations/correlation_heatmap.png', correlation_heatmap_plot, figsize=(16, 14),
+                  corr=corr_matrix, title='Correlation Matrix of Numeric Features')
+    
+    # Queue the correlation with readmission
     top_corr = readmission_corr.drop('readmitted_binary').abs().sort_values(ascending=False).head(15)
-    sns.barplot(x=top_corr.values, y=top_corr.index, palette='viridis')
-    plt.title('Top 15 Features Correlated with Readmission', fontsize=16)
-    plt.xlabel('Absolute Correlation Coefficient', fontsize=14)
-    plt.ylabel('Feature', fontsize=14)
-    plt.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('../data/visualizations/readmission_correlation.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/readmission_correlation.png', ranked_bar_plot, figsize=(12, 10),
+              values=top_corr.to_numpy(), labels=top_corr.index.tolist(),
+              title='Top 15 Features Correlated with Readmission', xlabel='Absolute Correlation Coefficient',
+              ylabel='Feature')
     
     # Number of medications vs. Readmission
     print("\n10. Analyzing number of medications vs. readmission...")
-    meds_readmission = df.groupby('num_medications')['readmitted_binary'].mean() * 100
+    meds_readmission = groups['num_medications']['rate']
     print("Readmission Rate by Number of Medications:")
     print(meds_readmission.head())
     
-    plt.figure(figsize=(14, 6))
-    sns.lineplot(x='num_medications', y='readmitted_binary', data=df, estimator=lambda x: len(x[x == 1]) / len(x) * 100, 
-                marker='o', color='#9C27B0')
-    plt.title('Readmission Rate by Number of Medications', fontsize=16)
-    plt.xlabel('Number of Medications', fontsize=14)
-    plt.ylabel('Readmission Rate (%)', fontsize=14)
-    plt.grid(True, alpha=0.3)
-    plt.savefig('../data/visualizations/medications_vs_readmission.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plots.add('../data/visualizations/medications_vs_readmission.png', rate_line_plot, figsize=(14, 6),
+              rates=meds_readmission, title='Readmission Rate by Number of Medications', xlabel='Number of Medications', color='#9C27B0')
+    
+    # Render the queued plots in the background while the summary and Power BI files are written
+    plots.render()
     
     # Create a summary of findings
     print("\n11. Creating summary of findings...")
@@ -254,7 +245,7 @@ def main():
 - Explore non-linear relationships, especially with number of medications
 """.format(
     readmission_percentage[1],
-    df.shape[0],
+    state.n_rows,
     readmission_counts[1],
     readmission_counts[0],
     age_readmission.max(),
@@ -292,38 +283,32 @@ def main():
     # Save key analysis results for Power BI
     
     # Age group analysis
-    age_analysis = df.groupby('age_group')['readmitted_binary'].agg(['count', 'mean']).reset_index()
-    age_analysis['mean'] = age_analysis['mean'] * 100
+    age_analysis = groups['age_group'][['count', 'rate']].reset_index()
     age_analysis.columns = ['Age_Group', 'Patient_Count', 'Readmission_Rate']
     age_analysis.to_csv('../powerbi/data/age_analysis.csv', index=False)
     
     # Time in hospital analysis
-    time_analysis = df.groupby('time_in_hospital')['readmitted_binary'].agg(['count', 'mean']).reset_index()
-    time_analysis['mean'] = time_analysis['mean'] * 100
+    time_analysis = groups['time_in_hospital'][['count', 'rate']].reset_index()
     time_analysis.columns = ['Days_in_Hospital', 'Patient_Count', 'Readmission_Rate']
     time_analysis.to_csv('../powerbi/data/time_analysis.csv', index=False)
     
     # Diagnoses analysis
-    diagnoses_analysis = df.groupby('number_diagnoses')['readmitted_binary'].agg(['count', 'mean']).reset_index()
-    diagnoses_analysis['mean'] = diagnoses_analysis['mean'] * 100
+    diagnoses_analysis = groups['number_diagnoses'][['count', 'rate']].reset_index()
     diagnoses_analysis.columns = ['Number_of_Diagnoses', 'Patient_Count', 'Readmission_Rate']
     diagnoses_analysis.to_csv('../powerbi/data/diagnoses_analysis.csv', index=False)
     
     # Gender analysis
-    gender_analysis = df.groupby('gender')['readmitted_binary'].agg(['count', 'mean']).reset_index()
-    gender_analysis['mean'] = gender_analysis['mean'] * 100
+    gender_analysis = groups['gender'][['count', 'rate']].reset_index()
     gender_analysis.columns = ['Gender', 'Patient_Count', 'Readmission_Rate']
     gender_analysis.to_csv('../powerbi/data/gender_analysis.csv', index=False)
     
     # Race analysis
-    race_analysis = df.groupby('race')['readmitted_binary'].agg(['count', 'mean']).reset_index()
-    race_analysis['mean'] = race_analysis['mean'] * 100
+    race_analysis = groups['race'][['count', 'rate']].reset_index()
     race_analysis.columns = ['Race', 'Patient_Count', 'Readmission_Rate']
     race_analysis.to_csv('../powerbi/data/race_analysis.csv', index=False)
     
     # Medications analysis
-    meds_analysis = df.groupby('num_medications')['readmitted_binary'].agg(['count', 'mean']).reset_index()
-    meds_analysis['mean'] = meds_analysis['mean'] * 100
+    meds_analysis = groups['num_medications'][['count', 'rate']].reset_index()
     meds_analysis.columns = ['Number_of_Medications', 'Patient_Count', 'Readmission_Rate']
     meds_analysis.to_csv('../powerbi/data/medications_analysis.csv', index=False)
     
@@ -335,7 +320,17 @@ def main():
     corr_df.to_csv('../powerbi/data/feature_correlation.csv', index=False)
     
     print("Data prepared for Power BI visualization and saved to '../powerbi/data/'")
+    plots.wait()
     print("\nExploratory Data Analysis completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Exploratory analysis of the cleaned readmission dataset")
+    parser.add_argument('--plots', choices=PLOT_MODES, default=None,
+                        help="Plot rendering: 'full' (300 DPI), 'preview' (72 DPI) or 'none' (default: $READMISSION_PLOTS or full)")
+    parser.add_argument('--update', nargs='+', metavar='BATCH', default=None,
+                        help="Cleaned encounter batches to fold into the saved statistics instead of re-reading the full dataset")
+    parser.add_argument('--correlation', choices=CORRELATION_MODES, default='full',
+                        help="'full' matrix, correlations with the 'target' only, or 'sampled' approximate matrix "
+                             "(fixed when the statistics are first built; ignored with --update)")
+    args = parser.parse_args()
+    main(plot_mode=args.plots, batches=args.update, correlation_mode=args.correlation)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Grouped Aggregation
+This module computes readmission counts, sums and rates for several grouping columns in one vectorized pass,
+and keeps them (with streaming correlations) as running state that new batches are folded into
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+from ingestion import TARGET_COLUMN
+from correlation import correlation_accumulator, DEFAULT_SAMPLE_FRACTION
+
+
+def encode_groups(values):
+    """Integer group codes (-1 for missing) and the group labels they index.
+
+    Categorical columns keep their category order; other columns are factorized
+    in sorted order, as groupby would order them.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values, sort=True)
+
+
+def aggregate_groups(df, columns, target=TARGET_COLUMN):
+    """Readmission count, sum and rate (%) per group of each column, from one bincount.
+
+    Every column's codes are shifted into their own range of one key space (with
+    a trailing slot for missing values), so a single weighted bincount yields the
+    counts and target sums of all groups at once. Returns {column: DataFrame}
+    indexed by group label, with the empty and missing groups left out, like
+    ``df.groupby(column)[target].agg(['count', 'sum', 'mean'])``.
+    """
+    encoded = [encode_groups(df[column]) for column in columns]
+    sizes = [len(labels) + 1 for _, labels in encoded]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    keys = np.empty((len(columns), len(df)), dtype=np.int64)
+    for row, ((codes, labels), offset) in enumerate(zip(encoded, offsets)):
+        keys[row] = np.where(codes < 0, len(labels), codes) + offset
+
+    y = df[target].to_numpy(dtype=np.float64)
+    counts = np.bincount(keys.ravel(), minlength=offsets[-1])
+    sums = np.bincount(keys.ravel(), weights=np.tile(y, len(columns)), minlength=offsets[-1])
+
+    groups = {}
+    for column, (_, labels), start, size in zip(columns, encoded, offsets, sizes):
+        # Drop the missing-value slot
+        group_counts = counts[start:start + size - 1]
+        group_sums = sums[start:start + size - 1]
+        present = group_counts > 0
+        index = pd.Index(np.asarray(labels)[present], name=column)
+        groups[column] = pd.DataFrame({
+            'count': group_counts[present],
+            'sum': group_sums[present],
+            'rate': group_sums[present] / group_counts[present] * 100
+        }, index=index)
+    return groups
+
+
+class EDAState:
+    """Running EDA aggregates that new encounter batches are folded into.
+
+    Holds the row count and target sum, the count and target sum of every group
+    of ``group_columns`` and a CorrelationAccumulator over ``numeric_columns`` in
+    ``correlation_mode`` (see correlation.CORRELATION_MODES).
+    Updating costs time proportional to the batch, states built from separate
+    batches can be merged, and batches already folded in (by content hash) are
+    skipped so re-running an update does not double count.
+    """
+
+    def __init__(self, group_columns, numeric_columns, target=TARGET_COLUMN, correlation_mode='full',
+                 sample_fraction=DEFAULT_SAMPLE_FRACTION):
+        self.group_columns = list(group_columns)
+        self.target = target
+        self.n_rows = 0
+        self.target_sum = 0.0
+        self.groups = {}
+        # Category order of the categorical group columns, for reporting in that order
+        self.categories = {}
+        self.correlation = correlation_accumulator(numeric_columns, correlation_mode, target, sample_fraction)
+        self.batches = set()
+
+    def update(self, df):
+        """Fold in a batch of cleaned encounters; returns False if it was already included."""
+        digest = joblib.hash(df)
+        if digest in self.batches:
+            return False
+        self.n_rows += len(df)
+        self.target_sum += float(df[self.target].sum())
+        categories = {column: list(df[column].cat.categories) for column in self.group_columns
+                      if isinstance(df[column].dtype, pd.CategoricalDtype)}
+        groups = aggregate_groups(df, self.group_columns, self.target)
+        self._merge_groups({column: counts[['count', 'sum']] for column, counts in groups.items()}, categories)
+        self.correlation.update(df)
+        self.batches.add(digest)
+        return True
+
+    def _merge_groups(self, groups, categories):
+        for column, counts in groups.items():
+            if column in self.groups:
+                counts = self.groups[column].add(counts, fill_value=0)
+            self.groups[column] = counts
+        for column, labels in categories.items():
+            known = self.categories.setdefault(column, [])
+            known.extend(label for label in labels if label not in known)
+
+    def merge(self, other):
+        """Add the aggregates of another state over the same columns."""
+        if other.group_columns != self.group_columns or other.target != self.target:
+            raise ValueError("Cannot merge EDA states over different columns")
+        self.n_rows += other.n_rows
+        self.target_sum += other.target_sum
+        self._merge_groups(other.groups, other.categories)
+        self.correlation.merge(other.correlation)
+        self.batches |= other.batches
+        return self
+
+    def target_counts(self):
+        """Number of encounters per target value (0 and 1)."""
+        return pd.Series([self.n_rows - self.target_sum, self.target_sum], index=[0, 1]).astype(np.int64)
+
+    def group_rates(self, column):
+        """Count, target sum and rate (%) per group, in category or sorted order."""
+        counts = self.groups[column]
+        if column in self.categories:
+            counts = counts.reindex([label for label in self.categories[column] if label in counts.index])
+        else:
+            counts = counts.sort_index()
+        counts = counts.astype({'count': np.int64})
+        counts.index.name = column
+        return counts.assign(rate=counts['sum'] / counts['count'] * 100)
+
+    def correlation_matrix(self):
+        return self.correlation.correlation()
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
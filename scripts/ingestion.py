@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Data Ingestion
+This module loads the raw and cleaned encounter extracts with an explicit column schema
+"""
+
+import numpy as np
+import pandas as pd
+from artifact_store import read_parquet
+
+# Medication columns in the raw extract ('No', 'Steady', 'Up', 'Down')
+MEDICATION_COLUMNS = [
+    'metformin', 'repaglinide', 'nateglinide', 'chlorpropamide', 'glimepiride',
+    'acetohexamide', 'glipizide', 'glyburide', 'tolbutamide', 'pioglitazone',
+    'rosiglitazone', 'acarbose', 'miglitol', 'troglitazone', 'tolazamide',
+    'examide', 'citoglipton', 'insulin', 'glyburide-metformin', 'glipizide-metformin',
+    'glimepiride-pioglitazone', 'metformin-rosiglitazone', 'metformin-pioglitazone'
+]
+
+# Column types of diabetic_data.csv. Low-cardinality strings are parsed straight
+# into categoricals and the small counts into narrow integers.
+RAW_SCHEMA = {
+    'encounter_id': 'int64',
+    'patient_nbr': 'int64',
+    'race': 'category',
+    'gender': 'category',
+    'age': 'category',
+    'weight': 'category',
+    'admission_type_id': 'int8',
+    'discharge_disposition_id': 'int8',
+    'admission_source_id': 'int8',
+    'time_in_hospital': 'int8',
+    'payer_code': 'category',
+    'medical_specialty': 'category',
+    'num_lab_procedures': 'int16',
+    'num_procedures': 'int8',
+    'num_medications': 'int16',
+    'number_outpatient': 'int16',
+    'number_emergency': 'int16',
+    'number_inpatient': 'int16',
+    'diag_1': 'category',
+    'diag_2': 'category',
+    'diag_3': 'category',
+    'number_diagnoses': 'int8',
+    'max_glu_serum': 'category',
+    'A1Cresult': 'category',
+    **{column: 'category' for column in MEDICATION_COLUMNS},
+    'change': 'category',
+    'diabetesMed': 'category',
+    'readmitted': 'category',
+}
+
+# Additional columns written by data_preparation.py
+CLEANED_SCHEMA = {
+    **RAW_SCHEMA,
+    'age_numeric': 'float32',
+    'max_glu_serum_numeric': 'float32',
+    'A1Cresult_numeric': 'float32',
+    'readmitted_binary': 'int8',
+    'gender_encoded': 'int8',
+    'race_encoded': 'int8',
+    'admission_type_id_encoded': 'int8',
+    'discharge_disposition_id_encoded': 'int8',
+    'admission_source_id_encoded': 'int8',
+    'admission_type_id_str': 'category',
+    'description': 'category',
+}
+
+# Features used by the modelling scripts, selected during EDA
+MODEL_FEATURES = [
+    'age_numeric', 'time_in_hospital', 'num_lab_procedures', 'num_procedures',
+    'num_medications', 'number_outpatient', 'number_emergency', 'number_inpatient',
+    'number_diagnoses', 'max_glu_serum_numeric', 'A1Cresult_numeric',
+    'gender_encoded', 'race_encoded', 'admission_type_id_encoded',
+    'discharge_disposition_id_encoded', 'admission_source_id_encoded'
+]
+
+TARGET_COLUMN = 'readmitted_binary'
+
+# Missing data is encoded as '?' in the raw extract
+MISSING_MARKERS = ['?']
+
+
+def _read_with_schema(path, schema, columns=None, chunksize=None):
+    # A callable usecols skips requested columns that are absent from the file
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda column: column in wanted
+    return pd.read_csv(path, dtype=schema, na_values=MISSING_MARKERS,
+                       usecols=usecols, chunksize=chunksize)
+
+
+def load_raw_encounters(path, columns=None, chunksize=None):
+    """Load diabetic_data.csv with typed columns and '?' parsed as missing."""
+    return _read_with_schema(path, RAW_SCHEMA, columns=columns, chunksize=chunksize)
+
+
+def load_cleaned_encounters(path, columns=None, filters=None):
+    """Load the cleaned dataset written by data_preparation.py.
+
+    Parquet artifacts are read with column projection and row-group filters;
+    legacy CSV extracts are parsed with the cleaned schema.
+    """
+    if path.endswith('.parquet'):
+        return read_parquet(path, columns=columns, filters=filters)
+    return _read_with_schema(path, CLEANED_SCHEMA, columns=columns)
+
+
+def age_to_numeric(age):
+    """Map age brackets such as '[70-80)' to their midpoints."""
+    age = age.astype('category')
+    categories = pd.Series(age.cat.categories.astype(str))
+    # Parse each distinct bracket once, then gather by category code
+    bounds = categories.str.strip('[]()').str.split('-', expand=True)
+    if bounds.empty:
+        return pd.Series(np.nan, index=age.index, dtype='float32')
+    midpoints = ((bounds[0].astype(float) + bounds[1].astype(float)) / 2).to_numpy(dtype='float32')
+    codes = age.cat.codes.to_numpy()
+    values = np.where(codes >= 0, midpoints[codes], np.nan).astype('float32')
+    return pd.Series(values, index=age.index)
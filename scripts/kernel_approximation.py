@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Kernel Approximation
+This module replaces the exact RBF SVM with a Nystroem / random Fourier feature map, a linear SVM and a separate calibration step
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import make_pipeline
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.svm import SVC
+from sklearn.linear_model import RidgeClassifier
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.metrics import accuracy_score, f1_score
+
+SVM_MODES = ['exact', 'nystroem', 'rff']
+DEFAULT_COMPONENTS = 1000
+CALIBRATION_CV = 3
+
+
+def scale_gamma(X):
+    """The RBF width SVC uses for gamma='scale': 1 / (n_features * X.var())."""
+    X = np.asarray(X)
+    variance = X.var()
+    return 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+
+
+def build_svm(mode, X_train, C=10.0, n_components=DEFAULT_COMPONENTS, random_state=42):
+    """RBF SVM with probability outputs, exact or through an approximate feature map.
+
+    The approximate models fit a linear SVM on the mapped features once on all
+    rows and Platt-calibrate its decision values from ``CALIBRATION_CV``
+    out-of-fold fits, like SVC(probability=True) does internally. The linear
+    model is a least-squares SVM (ridge classifier, alpha = 1 / C) solved in
+    closed form, so its cost grows linearly with rows.
+    """
+    if mode == 'exact':
+        return SVC(C=C, kernel='rbf', gamma='scale', probability=True, random_state=random_state)
+    gamma = scale_gamma(X_train)
+    if mode == 'nystroem':
+        feature_map = Nystroem(kernel='rbf', gamma=gamma, n_components=n_components, random_state=random_state)
+    elif mode == 'rff':
+        feature_map = RBFSampler(gamma=gamma, n_components=n_components, random_state=random_state)
+    else:
+        raise ValueError(f"Unknown SVM mode: {mode}")
+    linear_svm = make_pipeline(feature_map, RidgeClassifier(alpha=1.0 / C))
+    return CalibratedClassifierCV(linear_svm, method='sigmoid', cv=CALIBRATION_CV, ensemble=False)
+
+
+def compare_svm_modes(X_train, y_train, X_test, y_test, modes=SVM_MODES, n_components=DEFAULT_COMPONENTS):
+    """Fit every mode and report accuracy/F1 deltas and speedup against the exact SVC."""
+    rows = []
+    for mode in modes:
+        model = build_svm(mode, X_train, n_components=n_components)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_seconds = time.perf_counter() - start
+        rows.append({
+            'Mode': mode,
+            'Accuracy': accuracy_score(y_test, y_pred),
+            'F1 Score': f1_score(y_test, y_pred),
+            'Fit Time (s)': fit_seconds,
+            'Predict Time (s)': predict_seconds
+        })
+    comparison = pd.DataFrame(rows)
+    if 'exact' in modes:
+        exact = comparison.set_index('Mode').loc['exact']
+        comparison['Accuracy Delta'] = comparison['Accuracy'] - exact['Accuracy']
+        comparison['F1 Delta'] = comparison['F1 Score'] - exact['F1 Score']
+        comparison['Fit Speedup'] = exact['Fit Time (s)'] / comparison['Fit Time (s)']
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the exact RBF SVM with kernel approximations")
+    parser.add_argument('--modes', nargs='+', choices=SVM_MODES, default=SVM_MODES)
+    parser.add_argument('--n-components', type=int, default=DEFAULT_COMPONENTS)
+    parser.add_argument('--output', default='../models/advanced/svm_approximation_comparison.csv')
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - SVM Kernel Approximation")
+    print("-" * 70)
+
+    # Same training data as advanced_model_development.py: scaled, then SMOTE-balanced
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from resampling import FastSMOTE, DEFAULT_PARTITION_SIZE
+    from ingestion import load_cleaned_encounters, MODEL_FEATURES, TARGET_COLUMN
+    df = load_cleaned_encounters('../data/processed/diabetic_data_cleaned.parquet',
+                                 columns=MODEL_FEATURES + [TARGET_COLUMN])
+    features = [feature for feature in MODEL_FEATURES if feature in df.columns]
+    X_train, X_test, y_train, y_test = train_test_split(df[features], df[TARGET_COLUMN], test_size=0.2, random_state=42)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    X_train_smote, y_train_smote = FastSMOTE(random_state=42, partition_size=DEFAULT_PARTITION_SIZE).fit_resample(
+        X_train_scaled, y_train)
+    print(f"Training rows after SMOTE: {len(X_train_smote)}, test rows: {len(X_test_scaled)}")
+
+    comparison = compare_svm_modes(X_train_smote, y_train_smote, X_test_scaled, y_test,
+                                   modes=args.modes, n_components=args.n_components)
+    print("\nSVM Comparison:")
+    print(comparison.to_string(index=False))
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    comparison.to_csv(args.output, index=False)
+    print(f"\nComparison saved to '{args.output}'")
+
+if __name__ == "__main__":
+    main()
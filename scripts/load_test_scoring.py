@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Scoring Service Load Test
+This script fires concurrent single-encounter requests at the scoring service and reports latency percentiles
+"""
+
+import asyncio
+import argparse
+import time
+import numpy as np
+import aiohttp
+
+# Default encounter matching the predictor page's initial form values
+SAMPLE_ENCOUNTER = {
+    'age': 65,
+    'gender': 'Male',
+    'race': 'Caucasian',
+    'time_in_hospital': 5,
+    'number_inpatient': 1,
+    'number_diagnoses': 7,
+    'num_medications': 15,
+    'admission_type_id': 1
+}
+
+
+async def _worker(session, url, payload, n_requests, latencies):
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        async with session.post(url, json=payload) as response:
+            await response.read()
+            response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_load_test(url, total_requests, concurrency, batch_size=1):
+    payload = SAMPLE_ENCOUNTER if batch_size == 1 else {'encounters': [SAMPLE_ENCOUNTER] * batch_size}
+    latencies = []
+    per_worker = max(total_requests // concurrency, 1)
+    async with aiohttp.ClientSession() as session:
+        # Warm up the connection pool and the model
+        await _worker(session, url, payload, 10, [])
+        start = time.perf_counter()
+        await asyncio.gather(*[_worker(session, url, payload, per_worker, latencies)
+                               for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return np.array(latencies) * 1000, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the readmission scoring service")
+    parser.add_argument('--url', default='http://localhost:8000/predict')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=1)
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Scoring Service Load Test")
+    print("-" * 70)
+    latencies, elapsed = asyncio.run(
+        run_load_test(args.url, args.requests, args.concurrency, args.batch_size)
+    )
+    print(f"Requests: {len(latencies)} at concurrency {args.concurrency} "
+          f"({args.batch_size} encounter(s) per request)")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/s")
+    for percentile in [50, 90, 95, 99]:
+        print(f"p{percentile} latency: {np.percentile(latencies, percentile):.2f} ms")
+    print(f"max latency: {latencies.max():.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Model Cache
+This module caches fitted estimators and cross-validation scores on disk, keyed by their inputs
+"""
+
+import os
+import time
+import json
+import hashlib
+import tempfile
+import joblib
+import numpy as np
+import sklearn
+from sklearn.model_selection import cross_val_score
+
+CACHE_DIR = '../models/cache'
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+
+def fingerprint_array(values):
+    """Content hash of a feature matrix or target vector (shape, dtype and bytes)."""
+    array = np.ascontiguousarray(np.asarray(values))
+    digest = hashlib.sha256()
+    digest.update(f"{array.shape}|{array.dtype.str}".encode())
+    digest.update(array.view(np.uint8).ravel() if array.dtype != object else repr(array.tolist()).encode())
+    return digest.hexdigest()
+
+
+def fingerprint_estimator(estimator):
+    """Hash of the estimator class and its (deep) parameters, including random_state."""
+    cls = type(estimator)
+    # Thread counts do not change the fitted model, so they are left out of the key
+    params = {key: value for key, value in estimator.get_params(deep=True).items()
+              if key != 'n_jobs' and not key.endswith('__n_jobs')}
+    # Nested estimators (ensembles) are represented by their parameter repr
+    payload = json.dumps({'class': f"{cls.__module__}.{cls.__qualname__}",
+                          'params': params, 'sklearn': sklearn.__version__},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ModelCache:
+    """Content-addressed store of fitted estimators and fold scores with size-based LRU eviction.
+
+    Entries are keyed on (training data, feature list, estimator class, params, seed),
+    so rerunning a script only refits estimators whose inputs changed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, kind, estimator, X, y, **extra):
+        parts = [kind, fingerprint_estimator(estimator), fingerprint_array(X), fingerprint_array(y),
+                 json.dumps(extra, sort_keys=True, default=repr)]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.joblib')
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            value = joblib.load(path)
+        except Exception:
+            # Truncated or incompatible entry: drop it and recompute
+            os.remove(path)
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.joblib'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def fit(self, estimator, X, y, features=None):
+        """Return ``estimator`` fitted on (X, y), loading it from the cache when possible.
+
+        The original training time is kept on the fitted estimator as ``fit_time_``.
+        """
+        key = self.key('fit', estimator, X, y, features=list(features) if features is not None else None)
+        fitted = self.get(key)
+        if fitted is None:
+            start = time.perf_counter()
+            fitted = estimator.fit(X, y)
+            fitted.fit_time_ = time.perf_counter() - start
+            self.put(key, fitted)
+        return fitted
+
+    def cross_val_score(self, estimator, X, y, cv, scoring, features=None, n_jobs=None):
+        """Cached ``sklearn.model_selection.cross_val_score`` fold scores."""
+        key = self.key('cv', estimator, X, y, cv=repr(cv), scoring=scoring,
+                       features=list(features) if features is not None else None)
+        scores = self.get(key)
+        if scores is None:
+            scores = cross_val_score(estimator, X, y, cv=cv, scoring=scoring, n_jobs=n_jobs)
+            self.put(key, scores)
+        return scores
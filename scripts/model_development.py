@@ -11,14 +11,20 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import argparse
 import joblib
-from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from sklearn.metrics import classification_report, confusion_matrix, roc_curve, auc
-import xgboost as xgb
+from ingestion import load_cleaned_encounters, MODEL_FEATURES, TARGET_COLUMN
+from preprocessing import ReadmissionPreprocessor
+from model_cache import ModelCache
+from report_rendering import PlotRenderer, PLOT_MODES, metric_comparison_plot, ranked_bar_plot
+from evaluation import evaluate_model
+from tuning import tune_model
+from thresholds import choose_operating_point, save_operating_point, OBJECTIVES, FN_COST, FP_COST
+from bootstrap import bootstrap_comparison, DEFAULT_RESAMPLES
+from explanations import ReadmissionExplainer, supports_tree_shap, explanation_frame, CACHE_FILE
+from scoring import artifact_version
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -26,7 +32,8 @@ warnings.filterwarnings('ignore')
 sns.set(style='whitegrid')
 plt.style.use('seaborn-v0_8-whitegrid')
 
-def main():
+def main(plot_mode=None, objective='cost', fn_cost=FN_COST, fp_cost=FP_COST, n_resamples=DEFAULT_RESAMPLES,
+         bootstrap_workers=None):
     print("Healthcare Readmission Predictive Analytics - Model Development")
     print("-" * 60)
     
@@ -36,7 +43,8 @@ def main():
     # Load the processed dataset
     print("\n1. Loading the cleaned dataset...")
     try:
-        df = pd.read_csv('../data/processed/diabetic_data_cleaned.csv')
+        df = load_cleaned_encounters('../data/processed/diabetic_data_cleaned.parquet',
+                                     columns=MODEL_FEATURES + [TARGET_COLUMN])
         print(f"Dataset shape: {df.shape}")
     except FileNotFoundError:
         print("Error: Processed dataset not found. Please run data_preparation.py first.")
@@ -46,13 +54,7 @@ def main():
     print("\n2. Preparing features and target variable...")
     
     # Based on EDA, select the most important features
-    features = [
-        'age_numeric', 'time_in_hospital', 'num_lab_procedures', 'num_procedures',
-        'num_medications', 'number_outpatient', 'number_emergency', 'number_inpatient',
-        'number_diagnoses', 'max_glu_serum_numeric', 'A1Cresult_numeric',
-        'gender_encoded', 'race_encoded', 'admission_type_id_encoded',
-        'discharge_disposition_id_encoded', 'admission_source_id_encoded'
-    ]
+    features = MODEL_FEATURES
     
     # Check which features are actually available in the dataset
     available_features = [feature for feature in features if feature in df.columns]
@@ -79,155 +81,75 @@ def main():
     joblib.dump(scaler, '../models/scaler.pkl')
     print("Scaler saved to '../models/scaler.pkl'")
     
+    # Bundle the scaler with the fitted encodings and imputation values
+    try:
+        preprocessor = ReadmissionPreprocessor.load('../data/processed/preprocessor.json')
+        preprocessor.set_scaler(scaler, available_features)
+        preprocessor.save('../models/preprocessor.json')
+        print("Preprocessing pipeline saved to '../models/preprocessor.json'")
+    except FileNotFoundError:
+        print("preprocessor.json not found. Please re-run data_preparation.py to export the preprocessing pipeline.")
+    
     # Train and evaluate models
     print("\n4. Training and evaluating models...")
     
-    # Function to evaluate model performance
-    def evaluate_model(model, X_train, X_test, y_train, y_test, model_name):
-        print(f"\n{model_name} Training:")
-        
-        # Train the model
-        model.fit(X_train, y_train)
-        
-        # Make predictions
-        y_train_pred = model.predict(X_train)
-        y_test_pred = model.predict(X_test)
-        
-        # Calculate metrics
-        train_accuracy = accuracy_score(y_train, y_train_pred)
-        test_accuracy = accuracy_score(y_test, y_test_pred)
-        test_precision = precision_score(y_test, y_test_pred)
-        test_recall = recall_score(y_test, y_test_pred)
-        test_f1 = f1_score(y_test, y_test_pred)
-        
-        # Print results
-        print(f"Training Accuracy: {train_accuracy:.4f}")
-        print(f"Testing Accuracy: {test_accuracy:.4f}")
-        print(f"Testing Precision: {test_precision:.4f}")
-        print(f"Testing Recall: {test_recall:.4f}")
-        print(f"Testing F1 Score: {test_f1:.4f}")
-        
-        # Print classification report
-        print(f"Classification Report (Test Set):")
-        print(classification_report(y_test, y_test_pred))
-        
-        # Create confusion matrix
-        cm = confusion_matrix(y_test, y_test_pred)
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False)
-        plt.title(f'Confusion Matrix - {model_name}', fontsize=16)
-        plt.xlabel('Predicted Label', fontsize=14)
-        plt.ylabel('True Label', fontsize=14)
-        plt.xticks([0.5, 1.5], ['Not Readmitted', 'Readmitted'])
-        plt.yticks([0.5, 1.5], ['Not Readmitted', 'Readmitted'])
-        plt.tight_layout()
-        plt.savefig(f'../models/{model_name.lower().replace(" ", "_")}_confusion_matrix.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # Create ROC curve
-        if hasattr(model, "predict_proba"):
-            y_pred_prob = model.predict_proba(X_test)[:, 1]
-            fpr, tpr, _ = roc_curve(y_test, y_pred_prob)
-            roc_auc = auc(fpr, tpr)
-            
-            plt.figure(figsize=(8, 6))
-            plt.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (area = {roc_auc:.2f})')
-            plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-            plt.xlim([0.0, 1.0])
-            plt.ylim([0.0, 1.05])
-            plt.xlabel('False Positive Rate', fontsize=14)
-            plt.ylabel('True Positive Rate', fontsize=14)
-            plt.title(f'ROC Curve - {model_name}', fontsize=16)
-            plt.legend(loc="lower right")
-            plt.grid(True, alpha=0.3)
-            plt.savefig(f'../models/{model_name.lower().replace(" ", "_")}_roc_curve.png', dpi=300, bbox_inches='tight')
-            plt.close()
-        
-        return model, test_accuracy, test_precision, test_recall, test_f1
+    # Plots are queued while the models train and rendered in background processes at the end
+    plots = PlotRenderer(plot_mode)
     
-    # 1. Logistic Regression with hyperparameter tuning
-    print("\nTraining Logistic Regression model...")
+    # Fitted models and CV scores are cached on disk, keyed on data, features, estimator and params
+    model_cache = ModelCache()
     
-    # Define hyperparameter grid
-    param_grid_lr = {
-        'C': [0.01, 0.1, 1, 10],
-        'solver': ['liblinear', 'saga'],
-        'max_iter': [100, 1000]
-    }
+    # Fit (or reuse the fit from a previous run with identical inputs), then score each split once
+    def fit_and_evaluate(model, model_name):
+        model = model_cache.fit(model, X_train_scaled, y_train, features=available_features)
+        return evaluate_model(model, X_train_scaled, X_test_scaled, y_train, y_test, model_name, plots)
     
-    # Create grid search
-    lr_model = LogisticRegression(random_state=42)
-    grid_search_lr = GridSearchCV(lr_model, param_grid_lr, cv=5, scoring='f1', n_jobs=-1)
-    grid_search_lr.fit(X_train_scaled, y_train)
+    # 1. Logistic Regression with hyperparameter tuning
+    print("\nTraining Logistic Regression model...")
     
-    # Get best parameters
-    best_lr = grid_search_lr.best_estimator_
-    print(f"Best Logistic Regression parameters: {grid_search_lr.best_params_}")
+    # Tune with Optuna; the study is persisted so reruns resume it
+    best_lr, lr_tuning = tune_model('logistic_regression', X_train_scaled, y_train, cache=model_cache)
+    print(f"Best Logistic Regression parameters: {lr_tuning['Best Params']}")
     
     # Evaluate the model
-    lr_model, lr_accuracy, lr_precision, lr_recall, lr_f1 = evaluate_model(
-        best_lr, X_train_scaled, X_test_scaled, y_train, y_test, "Logistic Regression"
-    )
+    lr_evaluation = fit_and_evaluate(best_lr, "Logistic Regression")
     
     # 2. Random Forest Classifier with hyperparameter tuning
     print("\nTraining Random Forest Classifier model...")
     
-    # Define hyperparameter grid
-    param_grid_rf = {
-        'n_estimators': [100, 200],
-        'max_depth': [None, 10, 20],
-        'min_samples_split': [2, 5, 10],
-        'min_samples_leaf': [1, 2, 4]
-    }
-    
-    # Create grid search
-    rf_model = RandomForestClassifier(random_state=42)
-    grid_search_rf = GridSearchCV(rf_model, param_grid_rf, cv=5, scoring='f1', n_jobs=-1)
-    grid_search_rf.fit(X_train_scaled, y_train)
-    
-    # Get best parameters
-    best_rf = grid_search_rf.best_estimator_
-    print(f"Best Random Forest parameters: {grid_search_rf.best_params_}")
+    best_rf, rf_tuning = tune_model('random_forest', X_train_scaled, y_train, cache=model_cache)
+    print(f"Best Random Forest parameters: {rf_tuning['Best Params']}")
     
     # Evaluate the model
-    rf_model, rf_accuracy, rf_precision, rf_recall, rf_f1 = evaluate_model(
-        best_rf, X_train_scaled, X_test_scaled, y_train, y_test, "Random Forest"
-    )
+    rf_evaluation = fit_and_evaluate(best_rf, "Random Forest")
     
     # 3. XGBoost Classifier with hyperparameter tuning
     print("\nTraining XGBoost Classifier model...")
     
-    # Define hyperparameter grid
-    param_grid_xgb = {
-        'n_estimators': [100, 200],
-        'learning_rate': [0.01, 0.1],
-        'max_depth': [3, 5, 7],
-        'subsample': [0.8, 1.0],
-        'colsample_bytree': [0.8, 1.0]
-    }
-    
-    # Create grid search
-    xgb_model = xgb.XGBClassifier(random_state=42)
-    grid_search_xgb = GridSearchCV(xgb_model, param_grid_xgb, cv=5, scoring='f1', n_jobs=-1)
-    grid_search_xgb.fit(X_train_scaled, y_train)
-    
-    # Get best parameters
-    best_xgb = grid_search_xgb.best_estimator_
-    print(f"Best XGBoost parameters: {grid_search_xgb.best_params_}")
+    best_xgb, xgb_tuning = tune_model('xgboost', X_train_scaled, y_train, cache=model_cache)
+    print(f"Best XGBoost parameters: {xgb_tuning['Best Params']}")
     
     # Evaluate the model
-    xgb_model, xgb_accuracy, xgb_precision, xgb_recall, xgb_f1 = evaluate_model(
-        best_xgb, X_train_scaled, X_test_scaled, y_train, y_test, "XGBoost"
-    )
+    xgb_evaluation = fit_and_evaluate(best_xgb, "XGBoost")
+    
+    # Save the tuning summary (trials, pruned trials and time to the best F1)
+    tuning_df = pd.DataFrame([lr_tuning, rf_tuning, xgb_tuning])
+    tuning_df.to_csv('../models/tuning/tuning_summary.csv', index=False)
+    print("\nTuning summary saved to '../models/tuning/tuning_summary.csv'")
+    print(f"Model cache: {model_cache.hits} hits, {model_cache.misses} misses ('{model_cache.cache_dir}')")
     
     # Compare model performances
     print("\n5. Comparing model performances...")
     
-    models = ['Logistic Regression', 'Random Forest', 'XGBoost']
-    accuracies = [lr_accuracy, rf_accuracy, xgb_accuracy]
-    precisions = [lr_precision, rf_precision, xgb_precision]
-    recalls = [lr_recall, rf_recall, xgb_recall]
-    f1_scores = [lr_f1, rf_f1, xgb_f1]
+    evaluations = [lr_evaluation, rf_evaluation, xgb_evaluation]
+    models = [evaluation.name for evaluation in evaluations]
+    accuracies = [evaluation.accuracy for evaluation in evaluations]
+    precisions = [evaluation.precision for evaluation in evaluations]
+    recalls = [evaluation.recall for evaluation in evaluations]
+    f1_scores = [evaluation.f1 for evaluation in evaluations]
+    # Operating point of each model: the threshold that minimizes expected cost (or maximizes F1) on the test set
+    operating_points = [choose_operating_point(y_test, evaluation.probabilities, objective, fn_cost, fp_cost)
+                        if evaluation.probabilities is not None else None for evaluation in evaluations]
     
     # Create comparison DataFrame
     comparison_df = pd.DataFrame({
@@ -235,28 +157,28 @@ def main():
         'Accuracy': accuracies,
         'Precision': precisions,
         'Recall': recalls,
-        'F1 Score': f1_scores
+        'F1 Score': f1_scores,
+        'Operating Threshold': [point and point['threshold'] for point in operating_points],
+        'Expected Cost': [point and point['expected_cost'] for point in operating_points]
     })
     
+    # Bootstrap CIs for every metric and a paired test of each model against the best one
+    if n_resamples:
+        intervals = bootstrap_comparison(evaluations, reference=f1_scores.index(max(f1_scores)), metric='F1 Score',
+                                         n_resamples=n_resamples, n_jobs=bootstrap_workers)
+        comparison_df = pd.concat([comparison_df, intervals], axis=1)
+    
     print("\nModel Comparison:")
     print(comparison_df)
     
     # Save comparison to CSV
     comparison_df.to_csv('../models/model_comparison.csv', index=False)
     
-    # Create comparison plot
-    plt.figure(figsize=(12, 8))
-    comparison_df_melted = pd.melt(comparison_df, id_vars=['Model'], var_name='Metric', value_name='Score')
-    sns.barplot(x='Model', y='Score', hue='Metric', data=comparison_df_melted, palette='viridis')
-    plt.title('Model Comparison', fontsize=16)
-    plt.xlabel('Model', fontsize=14)
-    plt.ylabel('Score', fontsize=14)
-    plt.ylim(0, 1)
-    plt.grid(axis='y', alpha=0.3)
-    plt.legend(title='Metric', title_fontsize=12)
-    plt.tight_layout()
-    plt.savefig('../models/model_comparison.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    # Queue the comparison plot
+    comparison_df_melted = pd.melt(comparison_df, id_vars=['Model'], value_vars=['Accuracy', 'Precision', 'Recall', 'F1 Score'],
+                                   var_name='Metric', value_name='Score')
+    plots.add('../models/model_comparison.png', metric_comparison_plot, figsize=(12, 8),
+              scores=comparison_df_melted, title='Model Comparison')
     
     # Identify the best model based on F1 score
     best_f1 = max(f1_scores)
@@ -266,12 +188,8 @@ def main():
     print(f"\nBest Model (based on F1 Score): {best_model_name} with F1 Score {best_f1:.4f}")
     
     # Save the best model
-    if best_model_name == 'Logistic Regression':
-        best_model = lr_model
-    elif best_model_name == 'Random Forest':
-        best_model = rf_model
-    else:  # XGBoost
-        best_model = xgb_model
+    best_evaluation = evaluations[best_model_index]
+    best_model = best_evaluation.model
     
     # Save the model
     joblib.dump(best_model, '../models/readmission_model.pkl')
@@ -282,6 +200,14 @@ def main():
         f.write('\n'.join(available_features))
     print("Feature list saved to '../models/model_features.txt'")
     
+    # Store the best model's operating point with it; load_scorer flags encounters at this threshold
+    best_point = operating_points[best_model_index]
+    if best_point is not None:
+        save_operating_point('../models', best_point, best_model_name)
+        print(f"Operating point ({objective}): threshold {best_point['threshold']:.4f}, "
+              f"precision {best_point['precision']:.4f}, recall {best_point['recall']:.4f}, "
+              f"expected cost {best_point['expected_cost']:.4f} per encounter")
+    
     # Feature importance analysis
     print("\n6. Analyzing feature importance...")
     
@@ -309,16 +235,12 @@ def main():
     # Save feature importance to CSV
     feature_importance.to_csv('../models/feature_importance.csv', index=False)
     
-    # Plot feature importance
-    plt.figure(figsize=(12, 8))
-    sns.barplot(x='Importance', y='Feature', data=feature_importance.head(10), palette='viridis')
-    plt.title(f'Top 10 Feature Importance - {best_model_name}', fontsize=16)
-    plt.xlabel('Importance', fontsize=14)
-    plt.ylabel('Feature', fontsize=14)
-    plt.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('../models/feature_importance.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    # Queue the feature importance plot, then render every queued plot in the background
+    top_features = feature_importance.head(10)
+    plots.add('../models/feature_importance.png', ranked_bar_plot, figsize=(12, 8),
+              values=top_features['Importance'].to_numpy(), labels=top_features['Feature'].tolist(),
+              title=f'Top 10 Feature Importance - {best_model_name}', xlabel='Importance', ylabel='Feature')
+    plots.render()
     
     # Prepare data for Power BI
     print("\n7. Preparing data for Power BI visualization...")
@@ -335,14 +257,41 @@ def main():
     # Save predictions for visualization
     X_test_df = pd.DataFrame(X_test, columns=available_features)
     X_test_df['actual'] = y_test.values
-    X_test_df['predicted'] = best_model.predict(X_test_scaled)
+    X_test_df['predicted'] = best_evaluation.predictions
     
-    if hasattr(best_model, "predict_proba"):
-        X_test_df['probability'] = best_model.predict_proba(X_test_scaled)[:, 1]
+    # Reuse the test-set outputs cached during evaluation rather than scoring again
+    if best_evaluation.probabilities is not None:
+        X_test_df['probability'] = best_evaluation.probabilities
     
     X_test_df.to_csv('../powerbi/data/test_predictions.csv', index=False)
     
+    # Explain every test prediction with TreeSHAP in the background while the plots finish rendering
+    explanations = None
+    if supports_tree_shap(best_model):
+        explainer = ReadmissionExplainer(best_model, available_features)
+        explanations = explainer.precompute(X_test_scaled, X_test.to_numpy())
+    
+    plots.wait()
+    if explanations is not None:
+        explanation_frame(explanations.result(), available_features, explainer.base_value).to_csv(
+            '../powerbi/data/test_explanations.csv', index=False)
+        # The scoring service starts with these explanations cached
+        explainer.save_cache(os.path.join('../models', CACHE_FILE), artifact_version('../models/readmission_model.pkl'))
+        print("Per-encounter explanations saved to '../powerbi/data/test_explanations.csv'")
     print("Model development completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train and compare the baseline readmission models")
+    parser.add_argument('--plots', choices=PLOT_MODES, default=None,
+                        help="Plot rendering: 'full' (300 DPI), 'preview' (72 DPI) or 'none' (default: $READMISSION_PLOTS or full)")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='cost',
+                        help="Choose the decision threshold by minimum expected cost or maximum F1")
+    parser.add_argument('--fn-cost', type=float, default=FN_COST, help="Cost of a missed readmission")
+    parser.add_argument('--fp-cost', type=float, default=FP_COST, help="Cost of flagging a patient who is not readmitted")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="Bootstrap resamples for the confidence intervals (0 to skip them)")
+    parser.add_argument('--bootstrap-workers', type=int, default=None,
+                        help="Worker processes for the bootstrap (default: run in this process)")
+    args = parser.parse_args()
+    main(plot_mode=args.plots, objective=args.objective, fn_cost=args.fn_cost, fp_cost=args.fp_cost,
+         n_resamples=args.resamples, bootstrap_workers=args.bootstrap_workers)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Fitted Preprocessing
+This module persists the encoding maps, imputation values, ordinal maps and scaler as one transform
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from ingestion import age_to_numeric, MODEL_FEATURES
+from cleaning import encode_with_categories, ENCODED_COLUMNS, GLUCOSE_MAPPING, A1C_MAPPING
+
+
+class ReadmissionPreprocessor:
+    """Fitted transform from encounter records to the (scaled) model feature matrix.
+
+    Everything is stored as plain lists and dicts so the transform round-trips
+    through a small JSON file and loads without unpickling any estimator.
+    """
+
+    def __init__(self, categories, medians, modes=None, features=None,
+                 glucose_mapping=None, a1c_mapping=None, scaler_mean=None, scaler_scale=None):
+        self.categories = {column: list(values) for column, values in categories.items()}
+        self.medians = {column: float(value) for column, value in medians.items() if pd.notna(value)}
+        self.modes = dict(modes or {})
+        self.features = list(features or MODEL_FEATURES)
+        self.glucose_mapping = dict(glucose_mapping or GLUCOSE_MAPPING)
+        self.a1c_mapping = dict(a1c_mapping or A1C_MAPPING)
+        self.scaler_mean = None if scaler_mean is None else np.asarray(scaler_mean, dtype='float64')
+        self.scaler_scale = None if scaler_scale is None else np.asarray(scaler_scale, dtype='float64')
+
+    def set_scaler(self, scaler, features):
+        """Attach a fitted StandardScaler and the feature order it was fitted on."""
+        self.features = list(features)
+        self.scaler_mean = np.asarray(scaler.mean_, dtype='float64')
+        self.scaler_scale = np.asarray(scaler.scale_, dtype='float64')
+
+    def _feature_values(self, df, feature):
+        # Cleaned frames already carry the derived columns; raw records are derived here
+        if feature in df.columns:
+            values = df[feature]
+        elif feature == 'age_numeric' and 'age' in df.columns:
+            age = df['age']
+            values = age if pd.api.types.is_numeric_dtype(age) else age_to_numeric(age)
+        elif feature == 'max_glu_serum_numeric' and 'max_glu_serum' in df.columns:
+            values = _lab_result_values(df['max_glu_serum'], self.glucose_mapping)
+        elif feature == 'A1Cresult_numeric' and 'A1Cresult' in df.columns:
+            values = _lab_result_values(df['A1Cresult'], self.a1c_mapping)
+        elif feature.endswith('_encoded') and feature[:-len('_encoded')] in self.categories:
+            source = feature[:-len('_encoded')]
+            categories = self.categories[source]
+            values = df[source] if source in df.columns else pd.Series(np.nan, index=df.index)
+            if all(isinstance(category, (int, float)) for category in categories):
+                values = pd.to_numeric(values, errors='coerce')
+            # Missing and unseen categories encode to -1, as in data_preparation.py
+            return encode_with_categories(values, categories).to_numpy(dtype='float64')
+        else:
+            values = pd.Series(np.nan, index=df.index)
+        values = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
+        if feature in self.medians:
+            values = np.where(np.isnan(values), self.medians[feature], values)
+        return values
+
+    def transform(self, df, scale=True):
+        """Turn a batch of encounters into the model feature matrix in feature order."""
+        X = np.column_stack([self._feature_values(df, feature) for feature in self.features])
+        if scale and self.scaler_mean is not None:
+            X = (X - self.scaler_mean) / self.scaler_scale
+        return X
+
+    def to_dict(self):
+        return {
+            'categories': self.categories,
+            'medians': self.medians,
+            'modes': self.modes,
+            'features': self.features,
+            'glucose_mapping': self.glucose_mapping,
+            'a1c_mapping': self.a1c_mapping,
+            'scaler_mean': None if self.scaler_mean is None else self.scaler_mean.tolist(),
+            'scaler_scale': None if self.scaler_scale is None else self.scaler_scale.tolist(),
+        }
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=_to_builtin)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def _lab_result_values(values, mapping):
+    # Training reads the raw extract with pandas' default NA markers, so a test that was not
+    # performed ('None') arrives as missing and is filled with the median; treat it the same here
+    return values.astype(object).map({result: code for result, code in mapping.items() if result != 'None'})
+
+
+def _to_builtin(value):
+    # NumPy scalars in the category lists and modes
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def fit_encoding_categories(df, columns=ENCODED_COLUMNS):
+    """Sorted non-missing values per column, matching LabelEncoder's class order."""
+    return {column: sorted(df[column].dropna().unique().tolist()) for column in columns}
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Report Rendering
+This module collects plot specifications during a run and renders them in background processes, skipping unchanged plots
+"""
+
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+PLOT_MODES = ['full', 'preview', 'none']
+FULL_DPI = 300
+PREVIEW_DPI = 72
+# Default mode when a script is not given --plots, e.g. 'none' in CI
+PLOT_MODE_ENV = 'READMISSION_PLOTS'
+MANIFEST_NAME = '.plot_manifest.json'
+
+
+# Renderers: each draws one figure from already computed data
+
+def confusion_matrix_plot(cm, title):
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False)
+    plt.title(title, fontsize=16)
+    plt.xlabel('Predicted Label', fontsize=14)
+    plt.ylabel('True Label', fontsize=14)
+    plt.xticks([0.5, 1.5], ['Not Readmitted', 'Readmitted'])
+    plt.yticks([0.5, 1.5], ['Not Readmitted', 'Readmitted'])
+    plt.tight_layout()
+
+
+def roc_curve_plot(fpr, tpr, roc_auc, title):
+    plt.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (area = {roc_auc:.2f})')
+    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate', fontsize=14)
+    plt.ylabel('True Positive Rate', fontsize=14)
+    plt.title(title, fontsize=16)
+    plt.legend(loc="lower right")
+    plt.grid(True, alpha=0.3)
+
+
+def metric_comparison_plot(scores, title, rotate_labels=False):
+    # scores: long format with Model, Metric and Score columns
+    sns.barplot(x='Model', y='Score', hue='Metric', data=scores, palette='viridis')
+    plt.title(title, fontsize=16)
+    plt.xlabel('Model', fontsize=14)
+    plt.ylabel('Score', fontsize=14)
+    plt.ylim(0, 1)
+    if rotate_labels:
+        plt.xticks(rotation=45)
+    plt.grid(axis='y', alpha=0.3)
+    plt.legend(title='Metric', title_fontsize=12)
+    plt.tight_layout()
+
+
+def ranked_bar_plot(values, labels, title, xlabel, ylabel):
+    sns.barplot(x=values, y=labels, palette='viridis')
+    plt.title(title, fontsize=16)
+    plt.xlabel(xlabel, fontsize=14)
+    plt.ylabel(ylabel, fontsize=14)
+    plt.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+
+
+def count_bar_plot(counts, title, xlabel, labels, palette):
+    sns.barplot(x=list(range(len(counts))), y=counts, palette=palette)
+    plt.title(title, fontsize=16)
+    plt.xlabel(xlabel, fontsize=14)
+    plt.ylabel('Count', fontsize=14)
+    plt.xticks(list(range(len(counts))), labels)
+    plt.grid(axis='y', alpha=0.3)
+
+
+def rate_bar_plot(rates, title, xlabel, palette, rotate_labels=False):
+    # rates: readmission rate (%) per group, indexed by the group labels
+    sns.barplot(x=[str(label) for label in rates.index], y=rates.values, palette=palette)
+    plt.title(title, fontsize=16)
+    plt.xlabel(xlabel, fontsize=14)
+    plt.ylabel('Readmission Rate (%)', fontsize=14)
+    if rotate_labels:
+        plt.xticks(rotation=45, ha='right')
+    plt.grid(axis='y', alpha=0.3)
+    if rotate_labels:
+        plt.tight_layout()
+
+
+def rate_line_plot(rates, title, xlabel, color):
+    sns.lineplot(x=rates.index, y=rates.values, marker='o', color=color)
+    plt.title(title, fontsize=16)
+    plt.xlabel(xlabel, fontsize=14)
+    plt.ylabel('Readmission Rate (%)', fontsize=14)
+    plt.grid(True, alpha=0.3)
+
+
+def correlation_heatmap_plot(corr, title):
+    mask = np.triu(np.ones_like(corr, dtype=bool))
+    sns.heatmap(corr, mask=mask, annot=False, cmap='coolwarm', center=0,
+                square=True, linewidths=.5, cbar_kws={"shrink": .5})
+    plt.title(title, fontsize=16)
+    plt.tight_layout()
+
+
+def _render(path, renderer, figsize, data, dpi):
+    # Runs in a worker process
+    matplotlib.use('Agg')
+    sns.set(style='whitegrid')
+    plt.style.use('seaborn-v0_8-whitegrid')
+    plt.figure(figsize=figsize)
+    try:
+        renderer(**data)
+        plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close('all')
+    return path
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+class PlotRenderer:
+    """Collects plots during a run and renders them in a process pool.
+
+    Modes: 'full' (300 DPI), 'preview' (72 DPI) or 'none' (plots are skipped).
+    A plot whose renderer, data, size and DPI hash the same as at its last render
+    (recorded in a manifest next to the image) and whose file still exists is not
+    re-rendered.
+    """
+
+    def __init__(self, mode=None, n_workers=None):
+        self.mode = mode or os.environ.get(PLOT_MODE_ENV, 'full')
+        if self.mode not in PLOT_MODES:
+            raise ValueError(f"Unknown plot mode: {self.mode}")
+        self.dpi = FULL_DPI if self.mode == 'full' else PREVIEW_DPI
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.specs = []
+        self._pool = None
+        self._pending = []
+        self.skipped = 0
+
+    def add(self, path, renderer, figsize=(8, 6), **data):
+        """Queue ``renderer(**data)`` to be drawn on a ``figsize`` figure and saved to ``path``."""
+        if self.mode != 'none':
+            self.specs.append((path, renderer, figsize, data))
+
+    def render(self):
+        """Start rendering the queued plots in the background; call ``wait`` to finish."""
+        specs, self.specs = self.specs, []
+        if not specs:
+            return
+        manifests = {}
+        for path, renderer, figsize, data in specs:
+            directory, name = os.path.split(path)
+            manifest = manifests.setdefault(directory, _load_manifest(directory))
+            digest = joblib.hash((renderer.__name__, figsize, data, self.dpi))
+            if manifest.get(name) == digest and os.path.exists(path):
+                self.skipped += 1
+                continue
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+            future = self._pool.submit(_render, path, renderer, figsize, data, self.dpi)
+            self._pending.append((future, directory, name, digest))
+
+    def wait(self):
+        """Block until every started plot is saved and record them in the manifests."""
+        manifests = {}
+        rendered = 0
+        for future, directory, name, digest in self._pending:
+            future.result()
+            manifests.setdefault(directory, _load_manifest(directory))[name] = digest
+            rendered += 1
+        for directory, manifest in manifests.items():
+            with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._pending = []
+        if self.mode == 'none':
+            print("Plots skipped (--plots none)")
+        else:
+            print(f"Rendered {rendered} plot(s) at {self.dpi} DPI, {self.skipped} unchanged plot(s) skipped")
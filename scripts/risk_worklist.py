@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Risk Worklist
+This script ranks patients by the predicted readmission probability of their latest scored encounter, one keyset-paginated page at a time
+"""
+
+import time
+import base64
+import argparse
+import pandas as pd
+from sqlalchemy import inspect, text
+from database import create_database_engine
+
+PREDICTIONS_TABLE = 'model_predictions'
+PATIENT_TABLE = 'patient_readmission'
+# Serves the worklist order for one model version straight from the index, without a sort.
+# Where partial indexes exist it only holds the encounters the model flags as likely
+# readmissions; elsewhere (MySQL) the flag is a key column matched by equality
+WORKLIST_INDEX = 'idx_predictions_worklist'
+PARTIAL_INDEX_DIALECTS = ('postgresql', 'sqlite')
+WORKLIST_INDEX_SQL = (f"CREATE INDEX IF NOT EXISTS {WORKLIST_INDEX} ON {PREDICTIONS_TABLE} "
+                      f"(model_version, readmission_probability DESC, id DESC) WHERE predicted_readmission")
+COMPOSITE_WORKLIST_INDEX_SQL = (f"CREATE INDEX {WORKLIST_INDEX} ON {PREDICTIONS_TABLE} "
+                                f"(model_version, predicted_readmission, readmission_probability DESC, id DESC)")
+# Finds a patient's latest prediction per model version, so each patient appears once
+PATIENT_INDEX = 'idx_predictions_patient'
+PATIENT_INDEX_COLUMNS = '(model_version, patient_id, id)'
+# Columns of the scored encounter shown next to each prediction
+PATIENT_COLUMNS = ['age', 'gender', 'race', 'time_in_hospital', 'number_diagnoses',
+                   'number_inpatient', 'number_emergency']
+DEFAULT_PAGE_SIZE = 50
+
+
+def create_worklist_index(engine):
+    """Create the worklist and per-patient indexes on model_predictions if they do not exist."""
+    if engine.dialect.name in PARTIAL_INDEX_DIALECTS:
+        with engine.begin() as connection:
+            connection.execute(text(WORKLIST_INDEX_SQL))
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {PATIENT_INDEX} "
+                                    f"ON {PREDICTIONS_TABLE} {PATIENT_INDEX_COLUMNS}"))
+        return
+    # No CREATE INDEX IF NOT EXISTS here either, so check for them first
+    existing = {index['name'] for index in inspect(engine).get_indexes(PREDICTIONS_TABLE)}
+    with engine.begin() as connection:
+        if WORKLIST_INDEX not in existing:
+            connection.execute(text(COMPOSITE_WORKLIST_INDEX_SQL))
+        if PATIENT_INDEX not in existing:
+            connection.execute(text(f"CREATE INDEX {PATIENT_INDEX} ON {PREDICTIONS_TABLE} {PATIENT_INDEX_COLUMNS}"))
+
+
+def encode_cursor(probability, prediction_id):
+    """Opaque cursor for the page after the row with this probability and id."""
+    return base64.urlsafe_b64encode(f"{float(probability)!r}:{int(prediction_id)}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        probability, prediction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(probability), int(prediction_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid worklist cursor: {cursor!r}")
+
+
+def latest_model_version(connection):
+    return connection.execute(text(f"SELECT model_version FROM {PREDICTIONS_TABLE} "
+                                   f"ORDER BY id DESC LIMIT 1")).scalar()
+
+
+def _page_query(after, min_probability, dialect):
+    # The bare flag matches the partial index predicate; the composite index needs an equality
+    flagged = "predicted_readmission" if dialect in PARTIAL_INDEX_DIALECTS else "predicted_readmission = TRUE"
+    conditions = ["model_version = :model_version", flagged,
+                  # Only the patient's latest prediction, so a patient scored more than once ranks once
+                  f"id = (SELECT MAX(id) FROM {PREDICTIONS_TABLE} latest "
+                  f"WHERE latest.model_version = :model_version AND latest.patient_id = m.patient_id)"]
+    if min_probability is not None:
+        conditions.append("readmission_probability >= :min_probability")
+    if after:
+        # Row-value comparison, so the index range scan starts right after the cursor
+        conditions.append("(readmission_probability, id) < (:after_probability, :after_id)")
+    patient_columns = ', '.join(f'r.{column}' for column in PATIENT_COLUMNS)
+    return text(
+        f"SELECT p.id AS prediction_id, p.patient_id, p.encounter_id, p.readmission_probability, "
+        f"p.prediction_date, {patient_columns} "
+        f"FROM (SELECT id, patient_id, encounter_id, readmission_probability, prediction_date "
+        f"FROM {PREDICTIONS_TABLE} m WHERE {' AND '.join(conditions)} "
+        f"ORDER BY readmission_probability DESC, id DESC LIMIT :limit) p "
+        # The encounter that was scored, through the unique index on encounter_id
+        f"LEFT JOIN {PATIENT_TABLE} r ON r.encounter_id = p.encounter_id "
+        f"ORDER BY p.readmission_probability DESC, p.id DESC"
+    )
+
+
+class RiskWorklist:
+    """High-risk worklist over model_predictions for one model version (the latest by default).
+
+    Each page is a top-K query that walks ``idx_predictions_worklist`` from
+    the previous page's last (probability, id), so fetching page N costs the
+    same as fetching page 1 however deep a care manager pages. Each patient
+    appears once, with their latest prediction for the version (found through
+    ``idx_predictions_patient``) and the encounter that prediction scored.
+    """
+
+    def __init__(self, engine, model_version=None, page_size=DEFAULT_PAGE_SIZE, min_probability=None):
+        self.engine = engine
+        self.page_size = page_size
+        self.min_probability = min_probability
+        if model_version is None:
+            with engine.connect() as connection:
+                model_version = latest_model_version(connection)
+        self.model_version = model_version
+
+    def page(self, cursor=None, page_size=None):
+        """One page of the worklist and the cursor of the next page (None after the last page)."""
+        page_size = page_size or self.page_size
+        after = decode_cursor(cursor) if cursor else None
+        params = {'model_version': self.model_version, 'limit': page_size,
+                  'min_probability': self.min_probability}
+        if after:
+            params['after_probability'], params['after_id'] = after
+        with self.engine.connect() as connection:
+            rows = pd.read_sql_query(_page_query(after, self.min_probability, self.engine.dialect.name),
+                                     connection, params=params)
+        next_cursor = None
+        if len(rows) == page_size:
+            last = rows.iloc[-1]
+            next_cursor = encode_cursor(last['readmission_probability'], last['prediction_id'])
+        return rows, next_cursor
+
+    def top(self, k):
+        """The ``k`` highest-risk flagged predictions."""
+        return self.page(page_size=k)[0]
+
+    def pages(self, cursor=None):
+        """Iterate over the remaining pages, starting after ``cursor``."""
+        while True:
+            rows, cursor = self.page(cursor)
+            if not rows.empty:
+                yield rows
+            if cursor is None:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page through the high-risk patient worklist")
+    parser.add_argument('--database-url', default=None,
+                        help="SQLAlchemy URL (default: $DATABASE_URL or the local SQLite stand-in)")
+    parser.add_argument('--model-version', default=None, help="Model version to rank (default: the latest scored)")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--cursor', default=None, help="Cursor printed with the previous page")
+    parser.add_argument('--min-probability', type=float, default=None)
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Risk Worklist")
+    print("-" * 70)
+    engine = create_database_engine(args.database_url)
+    create_worklist_index(engine)
+    worklist = RiskWorklist(engine, args.model_version, args.page_size, args.min_probability)
+    if worklist.model_version is None:
+        print(f"Error: {PREDICTIONS_TABLE} is empty. Please run batch_scoring.py first.")
+        return
+    start = time.perf_counter()
+    rows, next_cursor = worklist.page(args.cursor)
+    elapsed = time.perf_counter() - start
+    print(f"Model {worklist.model_version}: {len(rows)} high-risk predictions in {elapsed * 1000:.1f} ms\n")
+    print(rows.to_string(index=False))
+    if next_cursor:
+        print(f"\nNext page: --cursor {next_cursor}")
+
+if __name__ == "__main__":
+    main()
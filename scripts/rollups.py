@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Readmission Rollups
+This script maintains materialized readmission summary tables, refreshed incrementally from the rows added since the last refresh
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database import create_database_engine, bulk_insert
+
+SOURCE_TABLE = 'patient_readmission'
+WATERMARK_TABLE = 'readmission_rollup_watermark'
+AGE_GROUP = ("CASE WHEN age < 30 THEN '<30' WHEN age BETWEEN 30 AND 50 THEN '30-50' "
+             "WHEN age BETWEEN 51 AND 70 THEN '51-70' ELSE '>70' END")
+# Year and month of created_at, per SQL dialect
+YEAR = {'postgresql': 'CAST(EXTRACT(YEAR FROM created_at) AS INTEGER)',
+        'mysql': 'YEAR(created_at)',
+        'sqlite': "CAST(strftime('%Y', created_at) AS INTEGER)"}
+MONTH = {'postgresql': 'CAST(EXTRACT(MONTH FROM created_at) AS INTEGER)',
+         'mysql': 'MONTH(created_at)',
+         'sqlite': "CAST(strftime('%m', created_at) AS INTEGER)"}
+# Rollup name -> (summary table, {key column: (SQL type, expression over patient_readmission)})
+ROLLUPS = {
+    'age': ('readmission_rollup_age', {'age_group': ('VARCHAR(10)', AGE_GROUP)}),
+    'time': ('readmission_rollup_time', {'time_in_hospital': ('INT', 'time_in_hospital')}),
+    'diagnoses': ('readmission_rollup_diagnoses', {'number_diagnoses': ('INT', 'number_diagnoses')}),
+    'trend': ('readmission_rollup_trend', {'year': ('INT', YEAR), 'month': ('INT', MONTH)}),
+}
+# Taken first in every refresh transaction so the id watermark is safe to advance. On PostgreSQL,
+# ids come from a sequence when rows are inserted but transactions commit in any order; this lock
+# waits for open writes to patient_readmission to finish and blocks new ones and other refreshes
+# until the refresh commits. On MySQL, LOCK TABLES does the same but must name every table the
+# refresh touches and is released by UNLOCK TABLES after the commit. SQLite has a single writer,
+# so taking the write lock is enough.
+REFRESH_LOCK = {'postgresql': f'LOCK TABLE {SOURCE_TABLE} IN SHARE ROW EXCLUSIVE MODE',
+                'mysql': (f'LOCK TABLES {SOURCE_TABLE} READ, {WATERMARK_TABLE} WRITE, '
+                          + ', '.join(f'{table} WRITE' for table, _ in ROLLUPS.values())),
+                'sqlite': f'UPDATE {WATERMARK_TABLE} SET last_id = last_id'}
+BENCHMARK_ROWS = [100_000, 1_000_000, 10_000_000]
+BENCHMARK_REPEATS = 5
+
+
+def _expression(expression, dialect):
+    return expression[dialect] if isinstance(expression, dict) else expression
+
+
+def _refresh_lock(dialect):
+    if dialect not in REFRESH_LOCK:
+        raise ValueError(f"Rollups are not supported on {dialect} (expected one of {list(REFRESH_LOCK)})")
+    return REFRESH_LOCK[dialect]
+
+
+def create_rollup_tables(engine):
+    """Create the summary tables and the refresh watermark if they do not exist."""
+    with engine.begin() as connection:
+        for table, keys in ROLLUPS.values():
+            columns = ', '.join(f'{column} {sql_type}' for column, (sql_type, _) in keys.items())
+            connection.execute(text(f"CREATE TABLE IF NOT EXISTS {table} ({columns}, "
+                                    f"total_patients BIGINT NOT NULL, readmitted_count BIGINT NOT NULL, "
+                                    f"PRIMARY KEY ({', '.join(keys)}))"))
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} "
+                                f"(id INT PRIMARY KEY, last_id BIGINT NOT NULL)"))
+
+
+def _merge_statement(table, keys, dialect):
+    keys_sql = ', '.join(keys)
+    expressions = ', '.join(_expression(expression, dialect) for _, expression in keys.values())
+    if dialect == 'mysql':
+        merge = ("ON DUPLICATE KEY UPDATE "
+                 "total_patients = total_patients + VALUES(total_patients), "
+                 "readmitted_count = readmitted_count + VALUES(readmitted_count)")
+    else:
+        merge = (f"ON CONFLICT ({keys_sql}) DO UPDATE SET "
+                 f"total_patients = {table}.total_patients + excluded.total_patients, "
+                 f"readmitted_count = {table}.readmitted_count + excluded.readmitted_count")
+    return text(
+        f"INSERT INTO {table} ({keys_sql}, total_patients, readmitted_count) "
+        f"SELECT {expressions}, COUNT(*), SUM(CASE WHEN readmitted THEN 1 ELSE 0 END) "
+        f"FROM {SOURCE_TABLE} WHERE id > :low AND id <= :high "
+        f"GROUP BY {expressions} {merge}"
+    )
+
+
+def refresh_rollups(engine, rebuild=False):
+    """Fold the encounters added since the last refresh into every summary table; returns that row count.
+
+    New rows are found by id above the stored watermark, and all tables and
+    the watermark move together in one transaction. Ids are not committed in
+    order under concurrent loads, so the refresh first takes REFRESH_LOCK:
+    once no write to the source table is in flight, every id up to MAX(id)
+    is committed (or rolled back) and none can appear below it later.
+    Updates to rows that were already rolled up (such as upserts of existing
+    encounters) are not seen by an incremental refresh; ``rebuild``
+    recomputes the tables from the whole source table.
+    """
+    create_rollup_tables(engine)
+    with engine.connect() as connection:
+        dialect = connection.dialect.name
+        lock = _refresh_lock(dialect)
+        try:
+            with connection.begin():
+                connection.execute(text(lock))
+                rows = _fold_new_rows(connection, dialect, rebuild)
+        finally:
+            if dialect == 'mysql':
+                connection.execute(text("UNLOCK TABLES"))
+    return rows
+
+
+def _fold_new_rows(connection, dialect, rebuild):
+    if rebuild:
+        for table, _ in ROLLUPS.values():
+            connection.execute(text(f"DELETE FROM {table}"))
+        connection.execute(text(f"DELETE FROM {WATERMARK_TABLE}"))
+    low = connection.execute(text(f"SELECT last_id FROM {WATERMARK_TABLE} WHERE id = 1")).scalar()
+    low = low or 0
+    high = connection.execute(text(f"SELECT MAX(id) FROM {SOURCE_TABLE}")).scalar() or 0
+    if high <= low:
+        return 0
+    rows = connection.execute(text(f"SELECT COUNT(*) FROM {SOURCE_TABLE} WHERE id > :low AND id <= :high"),
+                              {'low': low, 'high': high}).scalar()
+    for table, keys in ROLLUPS.values():
+        connection.execute(_merge_statement(table, keys, dialect), {'low': low, 'high': high})
+    connection.execute(text(f"DELETE FROM {WATERMARK_TABLE}"))
+    connection.execute(text(f"INSERT INTO {WATERMARK_TABLE} (id, last_id) VALUES (1, :high)"), {'high': high})
+    return rows
+
+
+def query_rollup(connection, name):
+    """One rollup with its readmission rate, ordered by its keys; reads only the small summary table."""
+    table, keys = ROLLUPS[name]
+    keys_sql = ', '.join(keys)
+    return pd.read_sql_query(text(
+        f"SELECT {keys_sql}, total_patients, readmitted_count, "
+        f"readmitted_count * 100.0 / total_patients AS readmission_rate "
+        f"FROM {table} ORDER BY {keys_sql}"
+    ), connection)
+
+
+def scan_rollup(connection, name):
+    """The same result computed with a full GROUP BY over patient_readmission, as the original views did."""
+    _, keys = ROLLUPS[name]
+    dialect = connection.dialect.name
+    columns = ', '.join(f'{_expression(expression, dialect)} AS {column}' for column, (_, expression) in keys.items())
+    return pd.read_sql_query(text(
+        f"SELECT {columns}, COUNT(*) AS total_patients, "
+        f"SUM(CASE WHEN readmitted THEN 1 ELSE 0 END) AS readmitted_count, "
+        f"SUM(CASE WHEN readmitted THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS readmission_rate "
+        f"FROM {SOURCE_TABLE} GROUP BY {', '.join(_expression(e, dialect) for _, e in keys.values())} "
+        f"ORDER BY {', '.join(keys)}"
+    ), connection)
+
+
+def _synthetic_encounters(n_rows, first_encounter_id, random_state=42):
+    rng = np.random.default_rng(random_state)
+    created_at = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 730 * 86400, n_rows), unit='s')
+    return pd.DataFrame({
+        'encounter_id': np.arange(first_encounter_id, first_encounter_id + n_rows),
+        'patient_nbr': rng.integers(1, n_rows // 3 + 2, n_rows),
+        'age': rng.choice([5, 15, 25, 35, 45, 55, 65, 75, 85, 95], n_rows),
+        'time_in_hospital': rng.integers(1, 15, n_rows),
+        'number_diagnoses': rng.integers(1, 17, n_rows),
+        'number_inpatient': rng.poisson(0.6, n_rows),
+        'readmitted': rng.random(n_rows) < 0.46,
+        'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def _best_latency(function, repeats=BENCHMARK_REPEATS):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    return min(latencies) * 1000
+
+
+def benchmark(engine, row_counts, insert_block=500_000):
+    """Query latency of the full-scan GROUP BY versus the rollup table as patient_readmission grows."""
+    results = []
+    loaded = 0
+    for n_rows in sorted(row_counts):
+        while loaded < n_rows:
+            block = min(insert_block, n_rows - loaded)
+            with engine.begin() as connection:
+                bulk_insert(connection, SOURCE_TABLE, _synthetic_encounters(block, loaded, random_state=loaded))
+            loaded += block
+        start = time.perf_counter()
+        refreshed = refresh_rollups(engine)
+        refresh_time = time.perf_counter() - start
+        with engine.connect() as connection:
+            for name in ROLLUPS:
+                scan_ms = _best_latency(lambda: scan_rollup(connection, name))
+                rollup_ms = _best_latency(lambda: query_rollup(connection, name))
+                print(f"  {n_rows:>10,} rows  {name:<10} scan {scan_ms:10.2f} ms   rollup {rollup_ms:7.2f} ms")
+                results.append({'Rows': n_rows, 'Rollup': name, 'Scan (ms)': scan_ms, 'Rollup (ms)': rollup_ms,
+                                'Refreshed Rows': refreshed, 'Refresh (s)': refresh_time})
+        print(f"  {n_rows:>10,} rows  refresh of {refreshed:,} new rows took {refresh_time:.2f}s")
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh, query or benchmark the readmission rollup tables")
+    parser.add_argument('--database-url', default=None,
+                        help="SQLAlchemy URL (default: $DATABASE_URL or the local SQLite stand-in)")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute the rollups from the whole table")
+    parser.add_argument('--show', choices=list(ROLLUPS), nargs='*', default=None,
+                        help="Print these rollups after refreshing (all when given without names)")
+    parser.add_argument('--benchmark', type=int, nargs='*', default=None, metavar='ROWS',
+                        help=f"Benchmark on a scratch SQLite database (default sizes: {BENCHMARK_ROWS})")
+    parser.add_argument('--output', default='../data/processed/rollup_benchmark.csv')
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Readmission Rollups")
+    print("-" * 70)
+    if args.benchmark is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rollup_benchmark.db')
+            with open('../sql/create_tables_sqlite.sql') as f, sqlite3.connect(path) as connection:
+                connection.executescript(f.read())
+            engine = create_database_engine(f"sqlite:///{path}")
+            results = benchmark(engine, args.benchmark or BENCHMARK_ROWS)
+            engine.dispose()
+        results.to_csv(args.output, index=False)
+        print(f"\nBenchmark saved to '{args.output}'")
+        return
+
+    engine = create_database_engine(args.database_url)
+    start = time.perf_counter()
+    rows = refresh_rollups(engine, rebuild=args.rebuild)
+    print(f"{'Rebuilt' if args.rebuild else 'Refreshed'} rollups from {rows:,} encounters "
+          f"in {time.perf_counter() - start:.2f}s")
+    if args.show is not None:
+        with engine.connect() as connection:
+            for name in args.show or ROLLUPS:
+                print(f"\nReadmission by {name}:")
+                print(query_rollup(connection, name).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Model Scoring
+This module loads the saved model artifacts once and scores batches of encounters
+"""
+
+import os
+import json
+import hashlib
+import joblib
+import numpy as np
+from preprocessing import ReadmissionPreprocessor
+from compiled_trees import CompiledTreeEnsemble
+
+DEFAULT_THRESHOLD = 0.5
+# Operating point chosen by thresholds.py, saved next to the model and preprocessor.json
+OPERATING_POINT_FILE = 'operating_point.json'
+
+
+class ReadmissionScorer:
+    """Saved model plus its fitted preprocessing, scoring a DataFrame of encounters per call."""
+
+    def __init__(self, model, preprocessor, model_version, threshold=DEFAULT_THRESHOLD):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.model_version = model_version
+        self.threshold = threshold
+
+    @property
+    def features(self):
+        return self.preprocessor.features
+
+    def predict_proba(self, df):
+        """Readmission probability for every row of ``df``."""
+        X = self.preprocessor.transform(df)
+        return self.model.predict_proba(X)[:, 1]
+
+    def predict(self, df):
+        probabilities = self.predict_proba(df)
+        return probabilities, (probabilities >= self.threshold).astype(np.int8)
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def artifact_version(model_path):
+    """Model version recorded with predictions: the file name plus a digest of its contents."""
+    return f"{os.path.splitext(os.path.basename(model_path))[0]}-{_file_digest(model_path)}"
+
+
+def load_preprocessor(model_dir):
+    """Load preprocessor.json, or rebuild a scaling-only transform from scaler.pkl and model_features.txt."""
+    preprocessor_path = os.path.join(model_dir, 'preprocessor.json')
+    if os.path.exists(preprocessor_path):
+        return ReadmissionPreprocessor.load(preprocessor_path)
+    # Older model directories: records must then carry the model feature columns directly
+    with open(os.path.join(model_dir, 'model_features.txt')) as f:
+        features = [line.strip() for line in f if line.strip()]
+    preprocessor = ReadmissionPreprocessor({}, {}, features=features)
+    preprocessor.set_scaler(joblib.load(os.path.join(model_dir, 'scaler.pkl')), features)
+    return preprocessor
+
+
+def load_operating_point(model_dir):
+    """The saved operating point of the model in ``model_dir``, or None if none was chosen."""
+    path = os.path.join(model_dir, OPERATING_POINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_scorer(model_dir='../models', model_file='readmission_model.pkl'):
+    """Load the model, its preprocessing and a content-derived model version.
+
+    ``model_file`` may be a joblib pickle or a compiled tree ensemble (.npz)
+    exported by compiled_trees.py. Encounters are flagged at the saved
+    operating point's threshold, or at DEFAULT_THRESHOLD without one.
+    """
+    model_path = os.path.join(model_dir, model_file)
+    if model_path.endswith('.npz'):
+        model = CompiledTreeEnsemble.load(model_path)
+    else:
+        model = joblib.load(model_path)
+    model_version = artifact_version(model_path)
+    operating_point = load_operating_point(model_dir)
+    threshold = operating_point['threshold'] if operating_point else DEFAULT_THRESHOLD
+    return ReadmissionScorer(model, load_preprocessor(model_dir), model_version, threshold)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Online Scoring Service
+This script serves the saved readmission model over HTTP for the Next.js predictor page
+"""
+
+import os
+import re
+import math
+import asyncio
+import argparse
+import time
+import pandas as pd
+from aiohttp import web
+from scoring import load_scorer
+from explanations import ReadmissionExplainer, supports_tree_shap, CACHE_FILE, DEFAULT_CACHE_SIZE
+
+# Micro-batching defaults: concurrent requests arriving within MAX_WAIT_MS share one predict_proba call
+MAX_BATCH_SIZE = 256
+MAX_WAIT_MS = 2.0
+# Encounter fields coerced to numbers before a request is queued
+NUMERIC_FIELDS = ['time_in_hospital', 'num_lab_procedures', 'num_procedures', 'num_medications',
+                  'number_outpatient', 'number_emergency', 'number_inpatient', 'number_diagnoses',
+                  'admission_type_id', 'discharge_disposition_id', 'admission_source_id']
+AGE_BRACKET = re.compile(r'^\[(\d+)-(\d+)\)$')
+
+
+class MicroBatcher:
+    """Collect concurrent scoring requests into a single vectorized model call."""
+
+    def __init__(self, scorer, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def score(self, records):
+        """Score a list of encounter dicts; resolves once their batch has been scored."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _predict(self, records):
+        # The model call runs off the event loop so new requests keep queueing
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.scorer.predict, pd.DataFrame.from_records(records)
+        )
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            records = [record for request_records, _ in batch for record in request_records]
+            try:
+                probabilities, predictions = await self._predict(records)
+            except Exception:
+                # Score each request on its own so a failure only reaches the request that caused it
+                for request_records, future in batch:
+                    try:
+                        result = await self._predict(request_records)
+                    except Exception as error:
+                        if not future.done():
+                            future.set_exception(error)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                continue
+            offset = 0
+            for request_records, future in batch:
+                end = offset + len(request_records)
+                if not future.done():
+                    future.set_result((probabilities[offset:end], predictions[offset:end]))
+                offset = end
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    # The predictor page is served from a different origin than the scoring service
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+def _number(field, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"'{field}' must be a number")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"'{field}' must be a number, not {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"'{field}' must be a finite number")
+    return number
+
+
+def coerce_encounter(record, preprocessor):
+    """Validated copy of one encounter with numbers parsed; raises ValueError for bad input.
+
+    Ages are given as years or as an age bracket such as '[70-80)', which
+    becomes its midpoint, so every record of a batch has a numeric age.
+    """
+    lab_results = {'max_glu_serum': preprocessor.glucose_mapping, 'A1Cresult': preprocessor.a1c_mapping}
+    encounter = {}
+    for field, value in record.items():
+        if value is None:
+            encounter[field] = None
+        elif field == 'age':
+            bracket = AGE_BRACKET.match(value) if isinstance(value, str) else None
+            encounter[field] = ((int(bracket[1]) + int(bracket[2])) / 2 if bracket
+                                else _number(field, value))
+        elif field in NUMERIC_FIELDS:
+            encounter[field] = _number(field, value)
+        elif field in lab_results:
+            if value not in lab_results[field]:
+                raise ValueError(f"'{field}' must be one of {sorted(lab_results[field])}, not {value!r}")
+            encounter[field] = value
+        elif isinstance(value, (str, int, float, bool)):
+            encounter[field] = value
+        else:
+            raise ValueError(f"'{field}' must be a string or a number")
+    return encounter
+
+
+async def _encounter_records(request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+
+    # A single encounter object or {"encounters": [...]} for a batch
+    single = 'encounters' not in payload if isinstance(payload, dict) else False
+    if single:
+        records = [payload.get('encounter', payload)]
+    elif isinstance(payload, dict):
+        records = payload['encounters']
+    else:
+        records = payload
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+        raise web.HTTPBadRequest(text="Expected an encounter object or a non-empty list of encounters")
+    preprocessor = request.app['batcher'].scorer.preprocessor
+    try:
+        records = [coerce_encounter(record, preprocessor) for record in records]
+    except ValueError as error:
+        raise web.HTTPBadRequest(text=f"Invalid encounter: {error}")
+    return records, single
+
+
+async def predict(request):
+    records, single = await _encounter_records(request)
+    batcher = request.app['batcher']
+    probabilities, predictions = await batcher.score(records)
+    model_version = batcher.scorer.model_version
+    if single:
+        return web.json_response({
+            'probability': float(probabilities[0]),
+            'prediction': int(predictions[0]),
+            'model_version': model_version
+        })
+    return web.json_response({
+        'probabilities': probabilities.tolist(),
+        'predictions': predictions.tolist(),
+        'model_version': model_version
+    })
+
+
+def _explain_records(explainer, preprocessor, records):
+    # One TreeSHAP call for the uncached encounters of the request
+    df = pd.DataFrame.from_records(records)
+    unscaled = preprocessor.transform(df, scale=False)
+    contributions = explainer.explain(preprocessor.transform(df), unscaled)
+    factors = explainer.factors(contributions, unscaled)
+    return [{'base_value': explainer.base_value,
+             'contributions': dict(zip(explainer.features, row.tolist())),
+             'factors': row_factors} for row, row_factors in zip(contributions, factors)]
+
+
+async def explain(request):
+    explainer = request.app['explainer']
+    if explainer is None:
+        raise web.HTTPNotImplemented(text="Explanations need a random forest or XGBoost model")
+    records, single = await _encounter_records(request)
+    scorer = request.app['batcher'].scorer
+    explanations = await asyncio.get_running_loop().run_in_executor(
+        None, _explain_records, explainer, scorer.preprocessor, records
+    )
+    if single:
+        return web.json_response(dict(explanations[0], model_version=scorer.model_version))
+    return web.json_response({'explanations': explanations, 'model_version': scorer.model_version})
+
+
+async def health(request):
+    scorer = request.app['batcher'].scorer
+    return web.json_response({'status': 'ok', 'model_version': scorer.model_version,
+                              'features': scorer.features})
+
+
+def create_app(scorer, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, explainer=None):
+    app = web.Application(middlewares=[cors_middleware])
+    app['batcher'] = MicroBatcher(scorer, max_batch_size, max_wait_ms)
+    app['explainer'] = explainer
+
+    async def on_startup(app):
+        app['batcher'].start()
+
+    async def on_cleanup(app):
+        await app['batcher'].stop()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post('/predict', predict)
+    app.router.add_post('/explain', explain)
+    app.router.add_get('/health', health)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve readmission risk predictions over HTTP")
+    parser.add_argument('--model-dir', default='../models')
+    parser.add_argument('--model-file', default='readmission_model.pkl')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--explanation-cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Online Scoring Service")
+    print("-" * 70)
+    scorer = load_scorer(args.model_dir, args.model_file)
+    print(f"Loaded model {scorer.model_version} with {len(scorer.features)} features")
+    explainer = None
+    if supports_tree_shap(scorer.model):
+        explainer = ReadmissionExplainer(scorer.model, scorer.features, args.explanation_cache_size)
+        # Explanations precomputed for the test export (explanations.py) are served from the cache
+        warmed = explainer.load_cache(os.path.join(args.model_dir, CACHE_FILE), scorer.model_version)
+        print(f"TreeSHAP explanations enabled ({warmed:,} cached)")
+    else:
+        print(f"Explanations disabled: TreeSHAP does not support {type(scorer.model).__name__}")
+    web.run_app(create_app(scorer, args.max_batch_size, args.max_wait_ms, explainer),
+                host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Chunked Data Preparation
+This module prepares larger-than-memory extracts in two streaming passes over the raw file
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from ingestion import load_raw_encounters, MODEL_FEATURES
+from cleaning import (add_derived_columns, encode_with_categories, merge_admission_type_descriptions,
+                      ENCODED_COLUMNS, NON_FEATURE_COLUMNS)
+from artifact_store import ParquetAppender
+from preprocessing import ReadmissionPreprocessor
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def _clean_chunk(chunk, admission_type_mapping, categories=None):
+    # Same step order as data_preparation.main so the columns come out in the same order
+    chunk = add_derived_columns(chunk)
+    if categories is not None:
+        for column in ENCODED_COLUMNS:
+            chunk[f'{column}_encoded'] = encode_with_categories(chunk[column], categories[column])
+    if admission_type_mapping is not None:
+        chunk = merge_admission_type_descriptions(chunk, admission_type_mapping)
+    return chunk
+
+
+def _median_from_counts(counts):
+    # Exact median of the values described by a value -> count table
+    if counts.empty:
+        return np.nan
+    counts = counts.sort_index()
+    cumulative = counts.cumsum().to_numpy()
+    total = cumulative[-1]
+    lower = counts.index[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+    upper = counts.index[np.searchsorted(cumulative, total // 2, side='right')]
+    return (lower + upper) / 2
+
+
+def _mode_from_counts(counts):
+    # Ties resolve to the smallest value, as with Series.mode()[0]
+    if counts.empty:
+        return None
+    return counts.sort_index().idxmax()
+
+
+def profile_encounters(raw_path, chunksize=DEFAULT_CHUNKSIZE, admission_type_mapping=None):
+    """First pass over the raw extract: imputation values and category sets.
+
+    Value counts are accumulated per chunk for the categorical columns, the columns
+    that get label-encoded and the float columns that may need a median, so memory
+    is bounded by their cardinality rather than by the number of encounters.
+    """
+    value_counts = {}
+    float_columns = set()
+    categorical_columns = set()
+    for chunk in load_raw_encounters(raw_path, chunksize=chunksize):
+        chunk = _clean_chunk(chunk, admission_type_mapping)
+        for column in chunk.columns:
+            series = chunk[column]
+            if not pd.api.types.is_numeric_dtype(series):
+                categorical_columns.add(column)
+            elif series.dtype.kind == 'f':
+                float_columns.add(column)
+            elif column not in ENCODED_COLUMNS and column not in MODEL_FEATURES:
+                continue
+            counts = series.value_counts()
+            counts = counts[counts > 0]
+            # Plain index so counts from chunks with different categories align
+            counts.index = np.asarray(counts.index, dtype=object)
+            if column in value_counts:
+                counts = value_counts[column].add(counts, fill_value=0)
+            value_counts[column] = counts
+
+    # Integer model features have no missing values in the extract, but new batches may
+    median_columns = float_columns | (set(MODEL_FEATURES) & set(value_counts))
+    medians = {column: _median_from_counts(value_counts[column]) for column in median_columns}
+    modes = {column: _mode_from_counts(value_counts[column]) for column in categorical_columns}
+    categories = {column: value_counts[column].sort_index().index.infer_objects()
+                  for column in categorical_columns | set(ENCODED_COLUMNS)}
+    return {'medians': medians, 'modes': modes, 'categories': categories,
+            'value_counts': value_counts}
+
+
+def _impute_chunk(chunk, profile):
+    for column, median in profile['medians'].items():
+        chunk[column] = chunk[column].fillna(median)
+    for column, mode in profile['modes'].items():
+        # A fixed category set keeps the Parquet schema identical across chunks
+        values = chunk[column].astype(object)
+        if mode is not None:
+            values = values.fillna(mode)
+        chunk[column] = pd.Categorical(values, categories=profile['categories'][column])
+    return chunk
+
+
+def _update_moments(moments, chunk):
+    # Chan et al. pairwise update of count, mean and sum of squared deviations
+    numeric = chunk.select_dtypes(include='number')
+    values = numeric.to_numpy(dtype='float64')
+    count = np.sum(~np.isnan(values), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(values, axis=0) / count
+    m2 = np.nansum((values - mean) ** 2, axis=0)
+    chunk_moments = {
+        'count': count, 'mean': mean, 'm2': m2,
+        'min': np.nanmin(values, axis=0), 'max': np.nanmax(values, axis=0)
+    }
+    if not moments:
+        moments.update(chunk_moments, columns=list(numeric.columns))
+        return
+    total = moments['count'] + count
+    delta = mean - moments['mean']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moments['mean'] = moments['mean'] + delta * count / total
+        moments['m2'] = moments['m2'] + m2 + delta ** 2 * moments['count'] * count / total
+    moments['count'] = total
+    moments['min'] = np.fmin(moments['min'], chunk_moments['min'])
+    moments['max'] = np.fmax(moments['max'], chunk_moments['max'])
+
+
+def prepare_in_chunks(raw_path, output_dir, chunksize=DEFAULT_CHUNKSIZE, admission_type_mapping=None,
+                      test_size=0.2, random_state=42):
+    """Clean the raw extract chunk by chunk and append the results to Parquet.
+
+    Writes diabetic_data_cleaned.parquet, train_data.parquet and test_data.parquet in
+    ``output_dir``. Rows are assigned to the test set with probability ``test_size``,
+    so the split sizes are approximate. Returns the summary statistics (count, mean,
+    std, min, max), the data dictionary of the cleaned dataset and the fitted
+    ReadmissionPreprocessor.
+    """
+    profile = profile_encounters(raw_path, chunksize, admission_type_mapping)
+    rng = np.random.default_rng(random_state)
+    moments = {}
+    missing_values = None
+    dtypes = None
+
+    with ParquetAppender(os.path.join(output_dir, 'diabetic_data_cleaned.parquet')) as cleaned_writer, \
+            ParquetAppender(os.path.join(output_dir, 'train_data.parquet')) as train_writer, \
+            ParquetAppender(os.path.join(output_dir, 'test_data.parquet')) as test_writer:
+        for chunk in load_raw_encounters(raw_path, chunksize=chunksize):
+            chunk = _clean_chunk(chunk, admission_type_mapping, profile['categories'])
+            chunk = _impute_chunk(chunk, profile)
+            cleaned_writer.write(chunk)
+
+            features = [col for col in chunk.columns if col not in NON_FEATURE_COLUMNS]
+            split = chunk[features + ['readmitted_binary']]
+            is_test = rng.random(len(chunk)) < test_size
+            train_writer.write(split[~is_test])
+            test_writer.write(split[is_test])
+
+            _update_moments(moments, chunk)
+            chunk_missing = chunk.isna().sum()
+            missing_values = chunk_missing if missing_values is None else missing_values + chunk_missing
+            dtypes = chunk.dtypes
+
+        print(f"Cleaned rows written: {cleaned_writer.rows_written}")
+        print(f"Training set rows: {train_writer.rows_written}")
+        print(f"Testing set rows: {test_writer.rows_written}")
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(moments['m2'] / (moments['count'] - 1))
+    stats = pd.DataFrame(
+        [moments['count'], moments['mean'], std, moments['min'], moments['max']],
+        index=['count', 'mean', 'std', 'min', 'max'], columns=moments['columns']
+    )
+    # Distinct counts are only tracked for the profiled (low-cardinality) columns
+    data_dict = pd.DataFrame({
+        'Column': dtypes.index,
+        'Type': dtypes.values,
+        'Missing_Values': missing_values.values,
+        'Unique_Values': [len(profile['value_counts'][col]) if col in profile['value_counts'] else np.nan
+                          for col in dtypes.index]
+    })
+    preprocessor = ReadmissionPreprocessor(
+        {column: profile['categories'][column].tolist() for column in ENCODED_COLUMNS},
+        profile['medians'], profile['modes']
+    )
+    return stats, data_dict, preprocessor
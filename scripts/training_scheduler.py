@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Training Scheduler
+This module runs model trainings as a dependency graph on a process pool, sharing the training arrays through memory-mapped files
+"""
+
+import os
+import time
+import shutil
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+# Task arguments standing for a shared array (opened memory-mapped in the worker)
+# or for the result of another task (which makes that task a dependency)
+ArrayRef = namedtuple('ArrayRef', ['name'])
+TaskRef = namedtuple('TaskRef', ['name'])
+Task = namedtuple('Task', ['function', 'args', 'kwargs', 'depends_on', 'threads'])
+
+
+class SharedArrays:
+    """Arrays written once as .npy files that every worker opens read-only with mmap."""
+
+    def __init__(self, arrays, directory=None):
+        self.directory = tempfile.mkdtemp(prefix='readmission_arrays_', dir=directory)
+        self.paths = {}
+        for name, array in arrays.items():
+            path = os.path.join(self.directory, f'{name}.npy')
+            np.save(path, np.ascontiguousarray(np.asarray(array)))
+            self.paths[name] = path
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _resolve(value, lookup, ref_type):
+    if isinstance(value, ref_type):
+        return lookup(value.name)
+    if isinstance(value, list):
+        return [_resolve(item, lookup, ref_type) for item in value]
+    if isinstance(value, tuple) and not isinstance(value, (ArrayRef, TaskRef)):
+        return tuple(_resolve(item, lookup, ref_type) for item in value)
+    return value
+
+
+def _task_refs(value):
+    if isinstance(value, TaskRef):
+        return [value.name]
+    if isinstance(value, (list, tuple)) and not isinstance(value, ArrayRef):
+        return [name for item in value for name in _task_refs(item)]
+    return []
+
+
+def _run_task(function, array_paths, args, kwargs, threads):
+    # Runs in the worker: open the shared arrays and cap BLAS/OpenMP pools at the task's cores
+    def open_array(name):
+        return np.load(array_paths[name], mmap_mode='r')
+
+    args = _resolve(args, open_array, ArrayRef)
+    kwargs = {key: _resolve(value, open_array, ArrayRef) for key, value in kwargs.items()}
+    start = time.perf_counter()
+    with threadpool_limits(limits=threads):
+        result = function(*args, n_jobs=threads, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def set_thread_count(estimator, n_jobs):
+    """Set every ``n_jobs`` parameter of an estimator, nested ones included."""
+    params = {key: n_jobs for key in estimator.get_params(deep=True)
+              if key == 'n_jobs' or key.endswith('__n_jobs')}
+    if params:
+        estimator.set_params(**params)
+    return estimator
+
+
+def fit_estimator(cache, estimator, X, y, features=None, n_jobs=1):
+    """Task function: fit ``estimator`` on its allotted cores, through the model cache."""
+    return cache.fit(set_thread_count(estimator, n_jobs), X, y, features=features)
+
+
+class TrainingScheduler:
+    """Runs training tasks on a process pool as soon as the tasks they depend on have finished.
+
+    Every task gets ``threads_per_task`` cores: its ``n_jobs`` argument and the
+    BLAS/OpenMP thread pools in the worker are capped to that, so with
+    ``n_workers * threads_per_task`` at most the core count, multithreaded
+    estimators such as XGBoost do not oversubscribe the machine.
+    """
+
+    def __init__(self, n_workers=None, threads_per_task=None):
+        cores = os.cpu_count() or 1
+        self.n_workers = n_workers or cores
+        self.threads_per_task = threads_per_task or max(1, cores // self.n_workers)
+        self.tasks = {}
+
+    def add(self, name, function, *args, threads=None, **kwargs):
+        """Register ``function(*args, n_jobs=threads, **kwargs)``.
+
+        ArrayRef arguments are replaced by the shared arrays and TaskRef
+        arguments (also inside lists and tuples) by the results of those tasks.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        depends_on = set(_task_refs(list(args) + list(kwargs.values())))
+        self.tasks[name] = Task(function, args, kwargs, depends_on, threads or self.threads_per_task)
+        return TaskRef(name)
+
+    def run(self, arrays):
+        """Run every task; returns ({name: result}, {name: seconds})."""
+        for name, task in self.tasks.items():
+            missing = task.depends_on - set(self.tasks)
+            if missing:
+                raise ValueError(f"Task '{name}' depends on unknown tasks: {sorted(missing)}")
+
+        results, timings = {}, {}
+        pending = dict(self.tasks)
+        running = {}
+        with SharedArrays(arrays) as shared, ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    if task.depends_on <= set(results):
+                        args = _resolve(task.args, results.__getitem__, TaskRef)
+                        kwargs = {key: _resolve(value, results.__getitem__, TaskRef)
+                                  for key, value in task.kwargs.items()}
+                        future = pool.submit(_run_task, task.function, shared.paths, args, kwargs, task.threads)
+                        running[future] = name
+                        del pending[name]
+                if not running:
+                    raise ValueError(f"Dependency cycle between tasks: {sorted(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name], timings[name] = future.result()
+                    print(f"  {name} finished in {timings[name]:.1f}s")
+        return results, timings
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Healthcare Readmission Predictive Analytics - Hyperparameter Tuning
+This module tunes the baseline models with Optuna, pruning weak trials on data subsamples
+"""
+
+import os
+import time
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+import optuna
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, cross_val_score, train_test_split
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+import xgboost as xgb
+from model_cache import fingerprint_array
+
+TUNING_DIR = '../models/tuning'
+STORAGE_URL = f'sqlite:///{TUNING_DIR}/optuna_studies.db'
+
+# Successive-halving rungs: trials are scored on 1/9, then 1/3, then all of the training data
+SUBSAMPLE_FRACTIONS = [1 / 9, 1 / 3, 1.0]
+REDUCTION_FACTOR = 3
+CV_FOLDS = 3
+DEFAULT_TRIALS = 40
+# Bump when suggest_params, the rungs or the CV scheme change, so stored studies are not resumed
+SEARCH_SPACE_VERSION = 1
+
+# The exhaustive grids previously run by model_development.py, kept for comparison
+PARAM_GRIDS = {
+    'logistic_regression': {
+        'C': [0.01, 0.1, 1, 10],
+        'solver': ['liblinear', 'saga'],
+        'max_iter': [100, 1000]
+    },
+    'random_forest': {
+        'n_estimators': [100, 200],
+        'max_depth': [None, 10, 20],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4]
+    },
+    'xgboost': {
+        'n_estimators': [100, 200],
+        'learning_rate': [0.01, 0.1],
+        'max_depth': [3, 5, 7],
+        'subsample': [0.8, 1.0],
+        'colsample_bytree': [0.8, 1.0]
+    }
+}
+
+
+def build_estimator(model_name, params=None):
+    params = params or {}
+    if model_name == 'logistic_regression':
+        return LogisticRegression(random_state=42, **params)
+    if model_name == 'random_forest':
+        return RandomForestClassifier(random_state=42, **params)
+    if model_name == 'xgboost':
+        return xgb.XGBClassifier(random_state=42, **params)
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+def suggest_params(trial, model_name):
+    """Search space per model, covering (and widening) the old grid ranges."""
+    if model_name == 'logistic_regression':
+        return {
+            'C': trial.suggest_float('C', 1e-3, 100, log=True),
+            'solver': trial.suggest_categorical('solver', ['liblinear', 'saga']),
+            'max_iter': trial.suggest_int('max_iter', 100, 1000, log=True)
+        }
+    if model_name == 'random_forest':
+        return {
+            'n_estimators': trial.suggest_int('n_estimators', 50, 300, step=50),
+            'max_depth': trial.suggest_categorical('max_depth', [None, 6, 10, 14, 20, 30]),
+            'min_samples_split': trial.suggest_int('min_samples_split', 2, 10),
+            'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 4)
+        }
+    if model_name == 'xgboost':
+        return {
+            'n_estimators': trial.suggest_int('n_estimators', 50, 400, step=50),
+            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+            'max_depth': trial.suggest_int('max_depth', 3, 8),
+            'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0)
+        }
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+def _subsamples(X, y, random_state=42):
+    # Fixed stratified subsamples so every trial on a rung sees the same rows
+    y = np.asarray(y)
+    subsamples = []
+    for fraction in SUBSAMPLE_FRACTIONS:
+        if fraction >= 1.0:
+            subsamples.append((X, y))
+        else:
+            X_part, _, y_part, _ = train_test_split(X, y, train_size=fraction, stratify=y,
+                                                    random_state=random_state)
+            subsamples.append((X_part, y_part))
+    return subsamples
+
+
+def _objective(model_name, subsamples, cache=None):
+    cv = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=42)
+    steps = [round(fraction * REDUCTION_FACTOR ** (len(SUBSAMPLE_FRACTIONS) - 1))
+             for fraction in SUBSAMPLE_FRACTIONS]
+
+    def objective(trial):
+        estimator = build_estimator(model_name, suggest_params(trial, model_name))
+        score = np.nan
+        for step, (X_part, y_part) in zip(steps, subsamples):
+            if cache is not None:
+                scores = cache.cross_val_score(estimator, X_part, y_part, cv=cv, scoring='f1', n_jobs=-1)
+            else:
+                scores = cross_val_score(estimator, X_part, y_part, cv=cv, scoring='f1', n_jobs=-1)
+            score = scores.mean()
+            # Trials that made it to the full data are kept rather than pruned after the fact
+            if step == steps[-1]:
+                break
+            trial.report(score, step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return score
+
+    return objective
+
+
+def study_fingerprint(X_train, y_train):
+    """Short hash of the training data and search space a study's trials were scored on."""
+    parts = [fingerprint_array(X_train), fingerprint_array(y_train), str(SEARCH_SPACE_VERSION),
+             repr(SUBSAMPLE_FRACTIONS), str(CV_FOLDS)]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:12]
+
+
+def load_study(model_name, fingerprint, storage=STORAGE_URL):
+    """Open (or create) the persisted study for a model and training set so reruns resume it.
+
+    The study name includes ``fingerprint``, so new data, features,
+    resampling or search space start a fresh study instead of reusing
+    parameters tuned on something else.
+    """
+    os.makedirs(TUNING_DIR, exist_ok=True)
+    return optuna.create_study(
+        study_name=f'{model_name}_f1_{fingerprint}',
+        storage=storage,
+        load_if_exists=True,
+        direction='maximize',
+        sampler=optuna.samplers.TPESampler(seed=42),
+        pruner=optuna.pruners.SuccessiveHalvingPruner(min_resource=1, reduction_factor=REDUCTION_FACTOR)
+    )
+
+
+def time_to_best(study):
+    """Summed trial run time (pruned trials included) until the best F1 was first reached."""
+    trials = [trial for trial in study.trials
+              if trial.datetime_complete is not None and trial.datetime_start is not None]
+    trials.sort(key=lambda trial: trial.datetime_complete)
+    elapsed = 0.0
+    best_value = study.best_value
+    for trial in trials:
+        elapsed += (trial.datetime_complete - trial.datetime_start).total_seconds()
+        if trial.state == optuna.trial.TrialState.COMPLETE and trial.value >= best_value:
+            return elapsed
+    return elapsed
+
+
+def tune_model(model_name, X_train, y_train, n_trials=DEFAULT_TRIALS, storage=STORAGE_URL, cache=None):
+    """Run the study up to ``n_trials`` finished trials and return an unfitted best estimator.
+
+    Trials already stored for this model and training data count towards
+    ``n_trials``, so an interrupted or repeated run only runs the remaining
+    ones. With a ModelCache, fold scores of previously evaluated
+    configurations are reused.
+    """
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = load_study(model_name, study_fingerprint(X_train, y_train), storage)
+    finished = [trial for trial in study.trials if trial.state.is_finished()]
+    remaining = max(n_trials - len(finished), 0)
+    if remaining:
+        study.optimize(_objective(model_name, _subsamples(X_train, y_train), cache), n_trials=remaining)
+    else:
+        print(f"Study '{study.study_name}' already has {len(finished)} trials; reusing its best parameters")
+
+    states = [trial.state for trial in study.trials]
+    report = {
+        'Model': model_name,
+        'Best F1 (CV)': study.best_value,
+        'Trials': len(states),
+        'Pruned': states.count(optuna.trial.TrialState.PRUNED),
+        'Time to Best (s)': time_to_best(study),
+        'Best Params': study.best_params
+    }
+    return build_estimator(model_name, study.best_params), report
+
+
+def run_grid_search(model_name, X_train, y_train):
+    """The previous exhaustive GridSearchCV, timed for comparison."""
+    start = time.perf_counter()
+    grid_search = GridSearchCV(build_estimator(model_name), PARAM_GRIDS[model_name],
+                               cv=5, scoring='f1', n_jobs=-1)
+    grid_search.fit(X_train, y_train)
+    return {
+        'Model': model_name,
+        'Best F1 (CV)': grid_search.best_score_,
+        'Trials': len(grid_search.cv_results_['params']),
+        'Pruned': 0,
+        'Time to Best (s)': time.perf_counter() - start,
+        'Best Params': grid_search.best_params_
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Optuna tuning with the exhaustive grids")
+    parser.add_argument('--models', nargs='+', default=list(PARAM_GRIDS))
+    parser.add_argument('--trials', type=int, default=DEFAULT_TRIALS)
+    args = parser.parse_args()
+
+    print("Healthcare Readmission Predictive Analytics - Hyperparameter Tuning")
+    print("-" * 70)
+
+    from sklearn.preprocessing import StandardScaler
+    from ingestion import load_cleaned_encounters, MODEL_FEATURES, TARGET_COLUMN
+    df = load_cleaned_encounters('../data/processed/diabetic_data_cleaned.parquet',
+                                 columns=MODEL_FEATURES + [TARGET_COLUMN])
+    features = [feature for feature in MODEL_FEATURES if feature in df.columns]
+    X_train, _, y_train, _ = train_test_split(df[features], df[TARGET_COLUMN], test_size=0.2, random_state=42)
+    X_train_scaled = StandardScaler().fit_transform(X_train)
+
+    rows = []
+    for model_name in args.models:
+        print(f"\nTuning {model_name} with Optuna...")
+        start = time.perf_counter()
+        _, report = tune_model(model_name, X_train_scaled, y_train, n_trials=args.trials)
+        report['Search'] = 'optuna'
+        print(f"Best F1 {report['Best F1 (CV)']:.4f} after {report['Time to Best (s)']:.1f}s of trials "
+              f"({report['Pruned']} of {report['Trials']} trials pruned, run took {time.perf_counter() - start:.1f}s)")
+        rows.append(report)
+
+        print(f"Running the exhaustive grid for {model_name}...")
+        grid_report = run_grid_search(model_name, X_train_scaled, y_train)
+        grid_report['Search'] = 'grid'
+        print(f"Best F1 {grid_report['Best F1 (CV)']:.4f} after {grid_report['Time to Best (s)']:.1f}s "
+              f"({grid_report['Trials']} configurations)")
+        rows.append(grid_report)
+
+    comparison = pd.DataFrame(rows)[['Model', 'Search', 'Best F1 (CV)', 'Trials', 'Pruned',
+                                     'Time to Best (s)', 'Best Params']]
+    print("\nTuning Comparison:")
+    print(comparison.drop(columns='Best Params'))
+    comparison.to_csv(os.path.join(TUNING_DIR, 'tuning_comparison.csv'), index=False)
+    print(f"Comparison saved to '{TUNING_DIR}/tuning_comparison.csv'")
+
+if __name__ == "__main__":
+    main()
@@ -51,12 +51,16 @@ CREATE TABLE admission_sources (
 CREATE TABLE model_predictions (
     id SERIAL PRIMARY KEY,
     patient_id BIGINT,
+    encounter_id BIGINT,
     prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     readmission_probability FLOAT,
     predicted_readmission BOOLEAN,
     model_version VARCHAR(50)
 );
 
+-- Unique key for upserting encounters (see scripts/bulk_loading.py)
+CREATE UNIQUE INDEX idx_encounter_id ON patient_readmission(encounter_id);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_patient_nbr ON patient_readmission(patient_nbr);
 CREATE INDEX idx_readmitted ON patient_readmission(readmitted);
@@ -64,69 +68,112 @@ CREATE INDEX idx_age ON patient_readmission(age);
 CREATE INDEX idx_time_in_hospital ON patient_readmission(time_in_hospital);
 CREATE INDEX idx_number_diagnoses ON patient_readmission(number_diagnoses);
 
+-- Worklist order per model version for flagged predictions (see scripts/risk_worklist.py);
+-- MySQL has no partial indexes, so the flag is a key column matched by equality
+CREATE INDEX idx_predictions_worklist
+    ON model_predictions(model_version, predicted_readmission, readmission_probability DESC, id DESC);
+-- Each patient's latest prediction per model version, so the worklist lists a patient once
+CREATE INDEX idx_predictions_patient ON model_predictions(model_version, patient_id, id);
+
+-- Materialized readmission rollups, refreshed incrementally by scripts/rollups.py
+-- (only rows with id above the watermark are aggregated on each refresh)
+CREATE TABLE readmission_rollup_age (
+    age_group VARCHAR(10) PRIMARY KEY,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL
+);
+
+CREATE TABLE readmission_rollup_time (
+    time_in_hospital INT PRIMARY KEY,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL
+);
+
+CREATE TABLE readmission_rollup_diagnoses (
+    number_diagnoses INT PRIMARY KEY,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL
+);
+
+CREATE TABLE readmission_rollup_trend (
+    year INT,
+    month INT,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL,
+    PRIMARY KEY (year, month)
+);
+
+CREATE TABLE readmission_rollup_watermark (
+    id INT PRIMARY KEY,
+    last_id BIGINT NOT NULL
+);
+
 -- Create view for readmission statistics by age group
 CREATE VIEW readmission_by_age AS
 SELECT 
-    CASE 
-        WHEN age < 30 THEN '<30'
-        WHEN age BETWEEN 30 AND 50 THEN '30-50'
-        WHEN age BETWEEN 51 AND 70 THEN '51-70'
-        ELSE '>70'
-    END AS age_group,
-    COUNT(*) AS total_patients,
-    SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) AS readmitted_count,
-    (SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) AS readmission_rate
-FROM patient_readmission
-GROUP BY age_group
+    age_group,
+    total_patients,
+    readmitted_count,
+    (readmitted_count * 100.0 / total_patients) AS readmission_rate
+FROM readmission_rollup_age
 ORDER BY age_group;
 
 -- Create view for readmission statistics by time in hospital
 CREATE VIEW readmission_by_time AS
 SELECT 
     time_in_hospital,
-    COUNT(*) AS total_patients,
-    SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) AS readmitted_count,
-    (SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) AS readmission_rate
-FROM patient_readmission
-GROUP BY time_in_hospital
+    total_patients,
+    readmitted_count,
+    (readmitted_count * 100.0 / total_patients) AS readmission_rate
+FROM readmission_rollup_time
 ORDER BY time_in_hospital;
 
 -- Create view for readmission statistics by number of diagnoses
 CREATE VIEW readmission_by_diagnoses AS
 SELECT 
     number_diagnoses,
-    COUNT(*) AS total_patients,
-    SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) AS readmitted_count,
-    (SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) AS readmission_rate
-FROM patient_readmission
-GROUP BY number_diagnoses
+    total_patients,
+    readmitted_count,
+    (readmitted_count * 100.0 / total_patients) AS readmission_rate
+FROM readmission_rollup_diagnoses
 ORDER BY number_diagnoses;
 
 -- Create stored procedure for high-risk patient identification
 DELIMITER //
-CREATE PROCEDURE identify_high_risk_patients()
+CREATE PROCEDURE identify_high_risk_patients(IN version VARCHAR(50), IN top_k INT)
 BEGIN
+    -- Highest-risk patients by their latest flagged prediction, read in order from
+    -- idx_predictions_worklist; scripts/risk_worklist.py pages through the rest with keyset cursors.
+    -- A NULL version ranks the latest model version scored
+    DECLARE ranked_version VARCHAR(50) DEFAULT version;
+    IF ranked_version IS NULL THEN
+        SELECT model_version INTO ranked_version FROM model_predictions ORDER BY id DESC LIMIT 1;
+    END IF;
     SELECT 
-        id,
-        patient_nbr,
-        age,
-        gender,
-        race,
-        time_in_hospital,
-        number_diagnoses,
-        number_inpatient,
-        number_emergency
-    FROM patient_readmission
-    WHERE 
-        (age > 70 OR
-        number_diagnoses >= 9 OR
-        time_in_hospital >= 8 OR
-        number_inpatient >= 2)
-        AND readmitted = FALSE
+        p.id AS prediction_id,
+        p.patient_id,
+        p.encounter_id,
+        p.readmission_probability,
+        r.age,
+        r.gender,
+        r.race,
+        r.time_in_hospital,
+        r.number_diagnoses,
+        r.number_inpatient,
+        r.number_emergency
+    FROM (
+        SELECT id, patient_id, encounter_id, readmission_probability
+        FROM model_predictions m
+        WHERE model_version = ranked_version AND predicted_readmission = TRUE
+            AND id = (SELECT MAX(id) FROM model_predictions latest
+                      WHERE latest.model_version = ranked_version AND latest.patient_id = m.patient_id)
+        ORDER BY readmission_probability DESC, id DESC
+        LIMIT top_k
+    ) p
+    LEFT JOIN patient_readmission r ON r.encounter_id = p.encounter_id
     ORDER BY 
-        number_inpatient DESC,
-        number_diagnoses DESC,
-        age DESC;
+        p.readmission_probability DESC,
+        p.id DESC;
 END //
 DELIMITER ;
 
@@ -135,13 +182,12 @@ DELIMITER //
 CREATE PROCEDURE readmission_trend_analysis()
 BEGIN
     SELECT 
-        YEAR(created_at) AS year,
-        MONTH(created_at) AS month,
-        COUNT(*) AS total_patients,
-        SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) AS readmitted_count,
-        (SUM(CASE WHEN readmitted = TRUE THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) AS readmission_rate
-    FROM patient_readmission
-    GROUP BY YEAR(created_at), MONTH(created_at)
-    ORDER BY YEAR(created_at), MONTH(created_at);
+        year,
+        month,
+        total_patients,
+        readmitted_count,
+        (readmitted_count * 100.0 / total_patients) AS readmission_rate
+    FROM readmission_rollup_trend
+    ORDER BY year, month;
 END //
 DELIMITER ;
@@ -0,0 +1,87 @@
+-- SQLite stand-in for the tables in create_tables.sql, for running the database scripts locally
+-- sqlite3 data/readmission.db < sql/create_tables_sqlite.sql
+
+-- Create table for patient data
+CREATE TABLE IF NOT EXISTS patient_readmission (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    encounter_id BIGINT,
+    patient_nbr BIGINT,
+    age INT,
+    gender VARCHAR(20),
+    race VARCHAR(50),
+    admission_type_id INT,
+    discharge_disposition_id INT,
+    admission_source_id INT,
+    time_in_hospital INT,
+    num_lab_procedures INT,
+    num_procedures INT,
+    num_medications INT,
+    number_outpatient INT,
+    number_emergency INT,
+    number_inpatient INT,
+    number_diagnoses INT,
+    max_glu_serum VARCHAR(10),
+    a1c_result VARCHAR(10),
+    readmitted BOOLEAN,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create table for model predictions
+CREATE TABLE IF NOT EXISTS model_predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id BIGINT,
+    encounter_id BIGINT,
+    prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    readmission_probability FLOAT,
+    predicted_readmission BOOLEAN,
+    model_version VARCHAR(50)
+);
+
+-- Unique key for upserting encounters (see scripts/bulk_loading.py)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_encounter_id ON patient_readmission(encounter_id);
+
+-- Create indexes for better query performance
+CREATE INDEX IF NOT EXISTS idx_patient_nbr ON patient_readmission(patient_nbr);
+CREATE INDEX IF NOT EXISTS idx_readmitted ON patient_readmission(readmitted);
+CREATE INDEX IF NOT EXISTS idx_age ON patient_readmission(age);
+CREATE INDEX IF NOT EXISTS idx_time_in_hospital ON patient_readmission(time_in_hospital);
+CREATE INDEX IF NOT EXISTS idx_number_diagnoses ON patient_readmission(number_diagnoses);
+
+-- Worklist order per model version, for flagged predictions only (see scripts/risk_worklist.py)
+CREATE INDEX IF NOT EXISTS idx_predictions_worklist ON model_predictions(model_version, readmission_probability DESC, id DESC)
+    WHERE predicted_readmission;
+-- Each patient's latest prediction per model version, so the worklist lists a patient once
+CREATE INDEX IF NOT EXISTS idx_predictions_patient ON model_predictions(model_version, patient_id, id);
+
+-- Materialized readmission rollups, refreshed incrementally by scripts/rollups.py
+-- (only rows with id above the watermark are aggregated on each refresh)
+CREATE TABLE IF NOT EXISTS readmission_rollup_age (
+    age_group VARCHAR(10) PRIMARY KEY,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS readmission_rollup_time (
+    time_in_hospital INT PRIMARY KEY,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS readmission_rollup_diagnoses (
+    number_diagnoses INT PRIMARY KEY,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS readmission_rollup_trend (
+    year INT,
+    month INT,
+    total_patients BIGINT NOT NULL,
+    readmitted_count BIGINT NOT NULL,
+    PRIMARY KEY (year, month)
+);
+
+CREATE TABLE IF NOT EXISTS readmission_rollup_watermark (
+    id INT PRIMARY KEY,
+    last_id BIGINT NOT NULL
+);
@@ -86,17 +86,49 @@ INSERT INTO patient_readmission (
 (63730, 52492562, 38, 'Female', 'Caucasian', 1, 1, 7, 2, 44, 1, 16, 0, 0, 0, 9, 'None', 'None', FALSE),
 (67968, 41256262, 87, 'Female', 'Caucasian', 1, 1, 7, 6, 53, 0, 24, 0, 0, 0, 9, 'None', 'None', FALSE);
 
+-- Seed the readmission rollups from the sample patients (later loads refresh them with scripts/rollups.py)
+INSERT INTO readmission_rollup_age (age_group, total_patients, readmitted_count)
+SELECT 
+    CASE 
+        WHEN age < 30 THEN '<30'
+        WHEN age BETWEEN 30 AND 50 THEN '30-50'
+        WHEN age BETWEEN 51 AND 70 THEN '51-70'
+        ELSE '>70'
+    END AS age_group,
+    COUNT(*),
+    SUM(CASE WHEN readmitted THEN 1 ELSE 0 END)
+FROM patient_readmission
+GROUP BY age_group;
+
+INSERT INTO readmission_rollup_time (time_in_hospital, total_patients, readmitted_count)
+SELECT time_in_hospital, COUNT(*), SUM(CASE WHEN readmitted THEN 1 ELSE 0 END)
+FROM patient_readmission
+GROUP BY time_in_hospital;
+
+INSERT INTO readmission_rollup_diagnoses (number_diagnoses, total_patients, readmitted_count)
+SELECT number_diagnoses, COUNT(*), SUM(CASE WHEN readmitted THEN 1 ELSE 0 END)
+FROM patient_readmission
+GROUP BY number_diagnoses;
+
+INSERT INTO readmission_rollup_trend (year, month, total_patients, readmitted_count)
+SELECT YEAR(created_at), MONTH(created_at), COUNT(*), SUM(CASE WHEN readmitted THEN 1 ELSE 0 END)
+FROM patient_readmission
+GROUP BY YEAR(created_at), MONTH(created_at);
+
+INSERT INTO readmission_rollup_watermark (id, last_id)
+SELECT 1, MAX(id) FROM patient_readmission;
+
 -- Insert sample model predictions
 INSERT INTO model_predictions (
-    patient_id, prediction_date, readmission_probability, predicted_readmission, model_version
+    patient_id, encounter_id, prediction_date, readmission_probability, predicted_readmission, model_version
 ) VALUES
-(8222157, '2025-01-15 10:30:00', 0.78, TRUE, 'XGBoost v1.0'),
-(55629189, '2025-01-15 10:35:00', 0.23, FALSE, 'XGBoost v1.0'),
-(86047875, '2025-01-15 10:40:00', 0.45, FALSE, 'XGBoost v1.0'),
-(82442376, '2025-01-15 10:45:00', 0.67, TRUE, 'XGBoost v1.0'),
-(42519267, '2025-01-15 10:50:00', 0.32, FALSE, 'XGBoost v1.0'),
-(82637451, '2025-01-15 10:55:00', 0.85, TRUE, 'XGBoost v1.0'),
-(84259809, '2025-01-15 11:00:00', 0.28, FALSE, 'XGBoost v1.0'),
-(88548212, '2025-01-15 11:05:00', 0.56, TRUE, 'XGBoost v1.0'),
-(52492562, '2025-01-15 11:10:00', 0.19, FALSE, 'XGBoost v1.0'),
-(41256262, '2025-01-15 11:15:00', 0.92, TRUE, 'XGBoost v1.0');
+(8222157, 2278392, '2025-01-15 10:30:00', 0.78, TRUE, 'XGBoost v1.0'),
+(55629189, 149190, '2025-01-15 10:35:00', 0.23, FALSE, 'XGBoost v1.0'),
+(86047875, 64410, '2025-01-15 10:40:00', 0.45, FALSE, 'XGBoost v1.0'),
+(82442376, 500364, '2025-01-15 10:45:00', 0.67, TRUE, 'XGBoost v1.0'),
+(42519267, 16680, '2025-01-15 10:50:00', 0.32, FALSE, 'XGBoost v1.0'),
+(82637451, 35754, '2025-01-15 10:55:00', 0.85, TRUE, 'XGBoost v1.0'),
+(84259809, 55842, '2025-01-15 11:00:00', 0.28, FALSE, 'XGBoost v1.0'),
+(88548212, 57996, '2025-01-15 11:05:00', 0.56, TRUE, 'XGBoost v1.0'),
+(52492562, 63730, '2025-01-15 11:10:00', 0.19, FALSE, 'XGBoost v1.0'),
+(41256262, 67968, '2025-01-15 11:15:00', 0.92, TRUE, 'XGBoost v1.0');
@@ -45,8 +45,8 @@ JOIN admission_types a ON p.admission_type_id = a.admission_type_id
 GROUP BY a.description
 ORDER BY readmission_rate DESC;
 
--- 8. Identify patients with high risk of readmission
-CALL identify_high_risk_patients();
+-- 8. Identify patients with high risk of readmission (top 50 for the latest model version)
+CALL identify_high_risk_patients(NULL, 50);
 
 -- 9. Readmission trend analysis
 CALL readmission_trend_analysis();
@@ -94,5 +94,5 @@ SELECT
     SUM(CASE WHEN mp.predicted_readmission = pr.readmitted THEN 1 ELSE 0 END) AS correct_predictions,
     (SUM(CASE WHEN mp.predicted_readmission = pr.readmitted THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) AS accuracy
 FROM model_predictions mp
-JOIN patient_readmission pr ON mp.patient_id = pr.patient_nbr
+JOIN patient_readmission pr ON mp.encounter_id = pr.encounter_id
 GROUP BY mp.model_version;
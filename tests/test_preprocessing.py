@@ -0,0 +1,37 @@
+import io
+import numpy as np
+import pandas as pd
+from ingestion import load_raw_encounters, MODEL_FEATURES
+from cleaning import add_derived_columns, encode_with_categories, ENCODED_COLUMNS
+from preprocessing import ReadmissionPreprocessor
+
+RAW_CSV = (
+    "encounter_id,patient_nbr,race,gender,age,admission_type_id,discharge_disposition_id,"
+    "admission_source_id,time_in_hospital,num_lab_procedures,num_procedures,num_medications,"
+    "number_outpatient,number_emergency,number_inpatient,number_diagnoses,max_glu_serum,A1Cresult,readmitted\n"
+    "1,10,Caucasian,Female,[70-80),1,1,7,3,41,0,12,0,0,1,7,None,None,<30\n"
+)
+CATEGORIES = {
+    'gender': ['Female', 'Male'],
+    'race': ['AfricanAmerican', 'Caucasian'],
+    'admission_type_id': [1, 2, 3],
+    'discharge_disposition_id': [1, 2],
+    'admission_source_id': [1, 7],
+}
+MEDIANS = {'max_glu_serum_numeric': 1.0, 'A1Cresult_numeric': 3.0}
+
+
+def test_raw_and_cleaned_records_give_the_same_features():
+    preprocessor = ReadmissionPreprocessor(CATEGORIES, MEDIANS, features=MODEL_FEATURES)
+    # The scoring service receives the raw strings; 'None' means the test was not performed
+    raw = pd.read_csv(io.StringIO(RAW_CSV), keep_default_na=False)
+    # Training reads the extract with the default NA markers and fills the gaps, as data_preparation.py does
+    cleaned = add_derived_columns(load_raw_encounters(io.StringIO(RAW_CSV)))
+    for column in ENCODED_COLUMNS:
+        cleaned[f'{column}_encoded'] = encode_with_categories(cleaned[column], CATEGORIES[column])
+    cleaned = cleaned.fillna(MEDIANS)
+
+    raw_features = preprocessor.transform(raw, scale=False)
+    np.testing.assert_array_equal(raw_features, preprocessor.transform(cleaned, scale=False))
+    lab_columns = [MODEL_FEATURES.index('max_glu_serum_numeric'), MODEL_FEATURES.index('A1Cresult_numeric')]
+    np.testing.assert_array_equal(raw_features[0, lab_columns], [1.0, 3.0])